@@ -24,9 +24,8 @@
 import html
 from typing import Optional
 
-from mistletoe import block_tokens
 from mistletoe.parse_context import ParseContext
-from mistletoe.renderers.base import BaseRenderer
+from mistletoe.renderers.base import BaseRenderer, render_from_emit
 from mistletoe.renderers.html import HTMLRenderer
 
 
@@ -39,6 +38,8 @@ class JIRARenderer(BaseRenderer):
 
     default_block_tokens = HTMLRenderer.default_block_tokens
     default_span_tokens = HTMLRenderer.default_span_tokens
+    # list item prefixes depend on the ``listTokens`` of all enclosing lists
+    iterative_context_tokens = ("List", "ListItem")
 
     def __init__(
         self,
@@ -59,32 +60,45 @@ class JIRARenderer(BaseRenderer):
         super().__init__(parse_context=parse_context)
         self.listTokens = []
 
-    def render_strong(self, token):
-        template = "*{}*"
-        return template.format(self.render_inner(token))
+    def reset_document(self):
+        super().reset_document()
+        self.listTokens = []
+
+    def _emit_wrapped(self, token, out: list, start: str, end: str):
+        out.append(start)
+        self.emit_inner(token, out)
+        out.append(end)
+
+    def emit_strong(self, token, out: list):
+        self._emit_wrapped(token, out, "*", "*")
+
+    render_strong = render_from_emit("emit_strong")
+
+    def emit_emphasis(self, token, out: list):
+        self._emit_wrapped(token, out, "_", "_")
+
+    render_emphasis = render_from_emit("emit_emphasis")
 
-    def render_emphasis(self, token):
-        template = "_{}_"
-        return template.format(self.render_inner(token))
+    def emit_inline_code(self, token, out: list):
+        self._emit_wrapped(token, out, "{{", "}}")
 
-    def render_inline_code(self, token):
-        template = "{{{{{}}}}}"
-        return template.format(self.render_inner(token))
+    render_inline_code = render_from_emit("emit_inline_code")
 
-    def render_strikethrough(self, token):
-        template = "-{}-"
-        return template.format(self.render_inner(token))
+    def emit_strikethrough(self, token, out: list):
+        self._emit_wrapped(token, out, "-", "-")
+
+    render_strikethrough = render_from_emit("emit_strikethrough")
 
     def render_image(self, token):
         template = "!{src}!"
         self.render_inner(token)
         return template.format(src=token.src)
 
-    def render_link(self, token):
-        template = "[{inner}|{target}]"
+    def emit_link(self, token, out: list):
         target = escape_url(token.target)
-        inner = self.render_inner(token)
-        return template.format(target=target, inner=inner)
+        self._emit_wrapped(token, out, "[", "|{}]".format(target))
+
+    render_link = render_from_emit("emit_link")
 
     def render_auto_link(self, token):
         template = "[{target}]"
@@ -92,8 +106,10 @@ class JIRARenderer(BaseRenderer):
         # inner = self.render_inner(token)
         return template.format(target=target)
 
-    def render_escape_sequence(self, token):
-        return self.render_inner(token)
+    def emit_escape_sequence(self, token, out: list):
+        self.emit_inner(token, out)
+
+    render_escape_sequence = render_from_emit("emit_escape_sequence")
 
     @staticmethod
     def render_raw_text(token):
@@ -103,77 +119,45 @@ class JIRARenderer(BaseRenderer):
     def render_html_span(token):
         return token.content
 
-    def render_heading(self, token):
-        template = "h{level}. {inner}\n"
-        inner = self.render_inner(token)
-        return template.format(level=token.level, inner=inner)
+    def emit_heading(self, token, out: list):
+        self._emit_wrapped(token, out, "h{}. ".format(token.level), "\n")
 
-    def render_quote(self, token):
-        template = "bq. {inner}\n"
-        return template.format(inner=self.render_inner(token))
+    render_heading = render_from_emit("emit_heading")
 
-    def render_paragraph(self, token):
-        return "{}\n".format(self.render_inner(token))
+    def emit_quote(self, token, out: list):
+        self._emit_wrapped(token, out, "bq. ", "\n")
 
-    def render_block_code(self, token):
-        # template = '<pre>\n<code{attr}>\n{inner}</code>\n</pre>\n'
-        # if token.language:
-        #     attr = ' class="{}"'.format('lang-{}'.format(token.language))
-        # else:
-        #     attr = ''
+    render_quote = render_from_emit("emit_quote")
 
-        template = "{{code:{attr}}}\n{inner}{{code}}\n"
-        if token.language:
-            attr = "{}".format(token.language)
-        else:
-            attr = ""
+    def emit_paragraph(self, token, out: list):
+        self._emit_wrapped(token, out, "", "\n")
 
-        inner = self.render_inner(token)
-        return template.format(attr=attr, inner=inner)
+    render_paragraph = render_from_emit("emit_paragraph")
 
-    def render_list(self, token):
-        inner = self.render_inner(token)
-        return inner
-
-    def render_list_item(self, token):
-        template = "{prefix} {inner}\n"
-        prefix = "".join(self.listTokens)
-        result = template.format(prefix=prefix, inner=self.render_inner(token))
-        return result
-
-    def render_inner(self, token):
-        if isinstance(token, block_tokens.List):
-            if token.start_at:
-                self.listTokens.append("#")
-            else:
-                self.listTokens.append("*")
-
-        rendered = [self.render(child) for child in token.children]
-
-        if isinstance(token, block_tokens.List):
-            del self.listTokens[-1]
-
-        return "".join(rendered)
-
-    def render_table(self, token):
-        # This is actually gross and I wonder if there's a better way to do it.
-        #
-        # The primary difficulty seems to be passing down alignment options to
-        # reach individual cells.
-        template = "{inner}\n"
-        if getattr(token, "header", None) is not None:
-            head_template = "{inner}"
-            header = token.children[0]
-            head_inner = self.render_table_row(header, True)
-            head_rendered = head_template.format(inner=head_inner)
+    def emit_block_code(self, token, out: list):
+        attr = "{}".format(token.language) if token.language else ""
+        self._emit_wrapped(token, out, "{{code:{}}}\n".format(attr), "{code}\n")
 
-        else:
-            head_rendered = ""
+    render_block_code = render_from_emit("emit_block_code")
+
+    def emit_list(self, token, out: list):
+        self.listTokens.append("#" if token.start_at else "*")
+        self.emit_inner(token, out)
+        del self.listTokens[-1]
+
+    render_list = render_from_emit("emit_list")
 
-        body_template = "{inner}"
-        body_inner = self.render_inner(token)
-        body_rendered = body_template.format(inner=body_inner)
-        return template.format(inner=head_rendered + body_rendered)
+    def emit_list_item(self, token, out: list):
+        self._emit_wrapped(token, out, "".join(self.listTokens) + " ", "\n")
+
+    render_list_item = render_from_emit("emit_list_item")
+
+    def emit_table(self, token, out: list):
+        if getattr(token, "header", None) is not None:
+            out.append(self.render_table_row(token.children[0], True))
+        self._emit_wrapped(token, out, "", "\n")
+
+    render_table = render_from_emit("emit_table")
 
     def render_table_row(self, token, is_header=False):
         if is_header:
@@ -208,8 +192,10 @@ class JIRARenderer(BaseRenderer):
     def render_html_block(token):
         return token.content
 
-    def render_document(self, token):
-        return self.render_inner(token)
+    def emit_document(self, token, out: list):
+        self.emit_blocks(token.children, out)
+
+    render_document = render_from_emit("emit_document")
 
 
 def escape_url(raw):
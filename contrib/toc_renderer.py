@@ -27,6 +27,10 @@ class TOCRenderer(HTMLRenderer):
         self.omit_title = omit_title
         self.filter_conds = filter_conds
 
+    def reset_document(self):
+        super().reset_document()
+        self._headings = []
+
     @property
     def toc(self):
         """
@@ -12,10 +12,11 @@ __all__ = [
     "span_tokenizer",
 ]
 
+from mistletoe import block_tokenizer
 from mistletoe.block_tokens import Document
 from mistletoe.renderers.base import BaseRenderer  # noqa: F401
 from mistletoe.renderers.html import HTMLRenderer
-from mistletoe.parse_context import ParseContext  # noqa: F401
+from mistletoe.parse_context import ParseContext, set_parse_context  # noqa: F401
 
 
 def markdown(
@@ -24,6 +25,8 @@ def markdown(
     parse_context=None,
     init_token=Document,
     read_kwargs=None,
+    parse_cache=None,
+    sink=None,
     **kwargs
 ):
     """
@@ -39,7 +42,35 @@ def markdown(
     :type parse_context: mistletoe.parse_context.ParseContext
     :param init_token: The initial token to use for parsing the text `init_token.read`
     :param read_kwargs: key-word arguments to parse to the ``init_token.read`` method
+    :param parse_cache: a cache to read the document from/store it in
+    :type parse_cache: mistletoe.cache.ParseCache
+    :param sink: if given, the output is written to this object (e.g. a file),
+        as it is rendered (see ``BaseRenderer.render_to``), and None is returned
     :param kwargs: key-word arguments to parse to the renderer initialisation
     """
     with renderer(parse_context=parse_context, **kwargs) as renderer:
-        return renderer.render(init_token.read(iterable, **(read_kwargs or {})))
+        if parse_cache is not None:
+            token = parse_cache.read(
+                iterable, init_token=init_token, **(read_kwargs or {})
+            )
+        else:
+            token = init_token.read(iterable, **(read_kwargs or {}))
+        if sink is not None:
+            return renderer.render_to(token, sink)
+        return renderer.render(token)
+
+
+def outline(iterable, parse_context=None, **kwargs) -> list:
+    """Return the block structure of a text, without tokenizing any spans,
+    as a list of ``(block_type, line_start, line_end, info)`` tuples,
+    e.g. ``("Heading", 1, None, 2)`` or ``("CodeFence", 3, 6, "python")``.
+
+    :param iterable: string or list of strings
+    :param parse_context: the parse context to use (set for the current thread),
+        or None to use the current one
+    :type parse_context: mistletoe.parse_context.ParseContext
+    :param kwargs: key-word arguments to parse to ``block_tokenizer.outline``
+    """
+    if parse_context is not None:
+        set_parse_context(parse_context)
+    return block_tokenizer.outline(iterable, **kwargs)
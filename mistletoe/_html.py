@@ -4,11 +4,12 @@ Taken from Python 3.4 standard library. Conforms to its original license.
 General functions for HTML manipulation.
 """
 
+from functools import lru_cache as _lru_cache
 import re as _re
 from html.entities import html5 as _html5
 
 
-__all__ = ["escape", "unescape"]
+__all__ = ["escape", "escape_text", "unescape", "unescape_terminated"]
 
 
 def escape(s, quote=True):
@@ -244,3 +245,45 @@ def unescape(s):
     if "&" not in s:
         return s
     return _charref.sub(_replace_charref, s)
+
+
+# html.entities.html5 includes entitydefs not ending with ';',
+# CommonMark seems to hate them, so...
+_terminated_charref = _re.compile(
+    r"&(#[0-9]+;" r"|#[xX][0-9a-fA-F]+;" r"|[^\t\n\f <&#;]{1,32};)"
+)
+
+
+def unescape_terminated(s):
+    """
+    As for ``unescape``, but only for character references terminated by ';'
+    (as required by CommonMark).
+    """
+    if "&" not in s:
+        return s
+    return _terminated_charref.sub(_replace_charref, s)
+
+
+@_lru_cache(maxsize=1024)
+def _unescape_terminated_cached(s):
+    return _terminated_charref.sub(_replace_charref, s)
+
+
+def escape_text(s):
+    """
+    Unescape the character references of ``s`` terminated by ';'
+    (see ``unescape_terminated``),
+    then replace "&", "<", ">" and '"' with HTML-safe sequences.
+
+    Only the characters present are replaced (each test being a fast ``in`` scan),
+    and the unescaping of strings containing "&" is memoized.
+    """
+    if "&" in s:
+        s = _unescape_terminated_cached(s).replace("&", "&amp;")
+    if "<" in s:
+        s = s.replace("<", "&lt;")
+    if ">" in s:
+        s = s.replace(">", "&gt;")
+    if '"' in s:
+        s = s.replace('"', "&quot;")
+    return s
@@ -0,0 +1,242 @@
+"""Render documents from ``asyncio`` code, without blocking the event loop.
+
+Documents are parsed and rendered in a pool of worker threads (or processes),
+each of which holds a long-lived ``ParseContext`` for every ``RenderService``
+(see ``mistletoe.batch``)::
+
+    >>> from mistletoe import aio
+    >>> html = await aio.render("some *text*")
+
+or, to configure the pool, limits and timeouts::
+
+    >>> service = aio.RenderService(HTMLRenderer, max_concurrency=8, timeout=0.5)
+    >>> html = await service.render("some *text*")
+"""
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import threading
+from time import monotonic
+from typing import Optional, Union
+import uuid
+import weakref
+
+from mistletoe.batch import _Worker
+from mistletoe.block_tokens import Document
+from mistletoe.parse_context import ParseAborted
+from mistletoe.renderers.base import BaseRenderer
+from mistletoe.renderers.html import HTMLRenderer
+
+# the workers of the current thread (and process), by service key
+_LOCAL = threading.local()
+# the default services of ``render``, by renderer class
+_SERVICES = {}
+_SERVICES_LOCK = threading.Lock()
+_DEFAULT = object()
+
+
+class RenderService:
+    """Render documents asynchronously, in a pool of workers.
+
+    :param renderer: the renderer class to use
+        (must be importable by the workers, if using processes)
+    :param executor: ``"thread"`` or ``"process"`` to create a pool,
+        or an existing ``concurrent.futures.Executor`` (not shut down by ``close``)
+    :param max_workers: the number of workers of a created pool
+    :param max_concurrency: the maximum number of documents rendered at once
+        (further requests wait their turn), or None for no limit
+    :param timeout: the default time limit (in seconds) of each render
+    :param coalesce: share the result of identical requests, made concurrently
+    :param init_token: The initial token to use for parsing the text `init_token.read`
+    :param read_kwargs: key-word arguments to parse to the ``init_token.read`` method
+    :param kwargs: key-word arguments to parse to the renderer initialisation
+
+    When a render times out (raising ``asyncio.TimeoutError``) or is cancelled,
+    the parse is aborted the next time it reads a block, tokenizes a span
+    (or scans a further ``nested_tokenizer.ABORT_INTERVAL`` characters of one),
+    or renders a top-level block with ``BaseRenderer.emit_blocks``
+    (as the HTML renderer does, see ``ParseContext.abort``).
+    The timeout is therefore only a bound up to the time of one of these steps,
+    and of any span tokens or renderers that do not check ``abort``.
+    A parse already running in a worker process is only aborted on a timeout.
+    """
+
+    def __init__(
+        self,
+        renderer: BaseRenderer = HTMLRenderer,
+        executor: Union[str, Executor] = "thread",
+        max_workers: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        coalesce: bool = True,
+        init_token=Document,
+        read_kwargs: Optional[dict] = None,
+        **kwargs
+    ):
+        if executor == "thread":
+            self._executor = ThreadPoolExecutor(max_workers)
+        elif executor == "process":
+            self._executor = ProcessPoolExecutor(max_workers)
+        elif isinstance(executor, Executor):
+            self._executor = executor
+        else:
+            raise ValueError(
+                "executor must be 'thread', 'process' or an Executor: {}".format(
+                    executor
+                )
+            )
+        self._owns_executor = not isinstance(executor, Executor)
+        self._in_process = isinstance(self._executor, ProcessPoolExecutor)
+        self._key = uuid.uuid4().hex
+        self._worker_args = (renderer, kwargs, init_token, read_kwargs or {}, None)
+        self.renderer = renderer
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.coalesce = coalesce
+        # the semaphore and in-flight requests of each event loop
+        self._loops = weakref.WeakKeyDictionary()
+
+    def __repr__(self):
+        return "{0}(renderer={1},executor={2})".format(
+            self.__class__.__name__,
+            self.renderer.__name__,
+            self._executor.__class__.__name__,
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.close(wait=False)
+
+    def close(self, wait: bool = True):
+        """Shut down the pool of workers (if created by this service)."""
+        if self._owns_executor:
+            self._executor.shutdown(wait=wait)
+
+    async def render(self, text: str, timeout: Optional[float] = _DEFAULT) -> str:
+        """Parse and render a text in a worker.
+
+        :param timeout: the time limit (in seconds), if different to the default
+        """
+        if timeout is _DEFAULT:
+            timeout = self.timeout
+        semaphore, in_flight = self._loop_state()
+        key = (text, timeout)
+        entry = in_flight.get(key) if self.coalesce else None
+        if entry is None:
+            task = asyncio.ensure_future(self._render(text, timeout, semaphore))
+            entry = _InFlight(task)
+            if self.coalesce:
+                in_flight[key] = entry
+                entry.task.add_done_callback(lambda _: in_flight.pop(key, None))
+        entry.waiters += 1
+        try:
+            return await asyncio.shield(entry.task)
+        except asyncio.CancelledError:
+            # only abort the render if no other request is waiting for it
+            if entry.waiters == 1:
+                entry.task.cancel()
+            raise
+        finally:
+            entry.waiters -= 1
+
+    def _loop_state(self):
+        loop = asyncio.get_event_loop()
+        try:
+            return self._loops[loop]
+        except KeyError:
+            semaphore = None
+            if self.max_concurrency:
+                semaphore = asyncio.Semaphore(self.max_concurrency)
+            state = self._loops[loop] = (semaphore, {})
+            return state
+
+    async def _render(self, text, timeout, semaphore):
+        loop = asyncio.get_event_loop()
+        cancelled = None if self._in_process else threading.Event()
+        if semaphore is not None:
+            await semaphore.acquire()
+        try:
+            future = self._executor.submit(
+                _render_in_worker,
+                self._key,
+                self._worker_args,
+                text,
+                timeout,
+                cancelled,
+            )
+        except BaseException:
+            if semaphore is not None:
+                semaphore.release()
+            raise
+        if semaphore is not None:
+            # the slot is only freed once the worker has actually stopped
+            future.add_done_callback(lambda _: _call_soon(loop, semaphore.release))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except ParseAborted:
+            raise asyncio.TimeoutError()
+        except BaseException:
+            if cancelled is not None:
+                cancelled.set()
+            raise
+
+
+class _InFlight:
+    """A running render, and the number of requests waiting for it."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+def get_service(renderer: BaseRenderer = HTMLRenderer) -> RenderService:
+    """Return the shared service (with a thread pool) used by ``render``."""
+    with _SERVICES_LOCK:
+        try:
+            return _SERVICES[renderer]
+        except KeyError:
+            service = _SERVICES[renderer] = RenderService(renderer)
+            return service
+
+
+async def render(
+    text: str, renderer: BaseRenderer = HTMLRenderer, timeout: Optional[float] = None
+) -> str:
+    """Parse and render a text, in a thread pool shared per renderer class.
+
+    :param timeout: the time limit (in seconds), after which the parse is aborted
+        and ``asyncio.TimeoutError`` is raised.
+    """
+    return await get_service(renderer).render(text, timeout=timeout)
+
+
+def _call_soon(loop, callback):
+    try:
+        loop.call_soon_threadsafe(callback)
+    except RuntimeError:  # the loop is closed
+        pass
+
+
+def _render_in_worker(key, worker_args, text, timeout, cancelled):
+    """Render a text, with the worker of this thread for the service."""
+    try:
+        workers = _LOCAL.workers
+    except AttributeError:
+        workers = _LOCAL.workers = {}
+    try:
+        worker = workers[key]
+    except KeyError:
+        worker = workers[key] = _Worker(*worker_args)
+    if timeout is None and cancelled is None:
+        return worker.render_text(text)
+    deadline = None if timeout is None else monotonic() + timeout
+
+    def abort():
+        if cancelled is not None and cancelled.is_set():
+            return True
+        return deadline is not None and monotonic() > deadline
+
+    return worker.render_text(text, abort)
@@ -1,10 +1,17 @@
+from array import array
 from collections import namedtuple, OrderedDict
+from collections.abc import MutableSequence
+import codecs
+from itertools import accumulate, chain, repeat
 import json
+import mmap
 import re
-from typing import List, Optional, Pattern, Tuple, Union
+from types import MappingProxyType
+from typing import Iterable, List, Optional, Pattern, Tuple, Union
 
 import attr
 from mistletoe.attr_doc import autodoc
+from mistletoe.parse_context import get_parse_context, OrderedSet, set_parse_context
 
 
 WalkItem = namedtuple("WalkItem", ["node", "parent", "index", "depth"])
@@ -13,6 +20,8 @@ WalkItem = namedtuple("WalkItem", ["node", "parent", "index", "depth"])
 class Token:
     """Base class of all mistletoe tokens."""
 
+    __slots__ = ()
+
     def __getattr__(self, name):
         # ensure certain attributes are always available
         if name == "children":
@@ -41,14 +50,31 @@ class Token:
             info.append("children={}".format(len(self.children)))
         return "{}({})".format(self.name, ",".join(info))
 
+    def __getstate__(self):
+        # only pickle slots that are set (``getattr`` would add the defaults above)
+        slots = {}
+        for name in _slot_names(type(self)):
+            try:
+                slots[name] = object.__getattribute__(self, name)
+            except AttributeError:
+                pass
+        return getattr(self, "__dict__", None), slots
+
     def to_dict(self) -> dict:
-        """Convert instatiated attributes to a dict"""
+        """Convert instatiated (non-private) attributes to a dict"""
         try:
-            dct = attr.asdict(self, recurse=False)
+            dct = attr.asdict(
+                self, recurse=False, filter=lambda a, v: not a.name.startswith("_")
+            )
         except attr.exceptions.NotAnAttrsClassError:
-            dct = self.__dict__
-        if isinstance(dct.get("position", None), Position):
-            dct["position"] = attr.asdict(dct["position"])
+            dct = dict(getattr(self, "__dict__", {}))
+            for name in _slot_names(type(self)):
+                try:
+                    dct[name] = object.__getattribute__(self, name)
+                except AttributeError:
+                    pass
+        if isinstance(dct.get("position", None), (Position, CompactPosition)):
+            dct["position"] = dct["position"].to_dict()
         return dct
 
     def walk(
@@ -104,6 +130,17 @@ class Token:
                 result.node.children = result.node.children.expand()
 
 
+def _slot_names(cls) -> list:
+    """Return the names of all (non-special) slots, defined by a class and its bases."""
+    names = []
+    for klass in reversed(cls.__mro__):
+        slots = klass.__dict__.get("__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name not in ("__dict__", "__weakref__") and name not in names:
+                names.append(name)
+    return names
+
+
 class TokenEncoder(json.JSONEncoder):
     """A JSON encoder for mistletoe tokens."""
 
@@ -115,6 +152,8 @@ class TokenEncoder(json.JSONEncoder):
             return dict(obj)
         if isinstance(obj, SpanContainer):
             return list(obj.expand())
+        if isinstance(obj, LazyFootrefOrder):
+            return list(obj.expand())
         if isinstance(obj, Token):
             return {obj.name: obj.to_dict()}
         return super().default(obj)
@@ -133,9 +172,10 @@ class SpanContainer:
 
     We use it in order to delay the assessment of span text, when parsing a document,
     so that all link definitions can be gathered first.
-    After the initial block parse, we walk through the document
-    and replace these span containers with the actual span tokens
-    (see `block_tokenizer.tokenize_main`).
+    After the initial block parse, we replace these span containers
+    with the actual span tokens (see `block_tokenizer.tokenize_main`).
+    Block tokens that create them should be recorded with
+    `block_tokenizer.register_spans`.
     """
 
     def __init__(self, text):
@@ -159,6 +199,130 @@ class SpanContainer:
         return "{0}({1})".format(self.__class__.__name__, repr(self.text))
 
 
+class LazySpans(SpanContainer, MutableSequence):
+    """A container for inline span text, which is expanded on first access.
+
+    It acts as the list of span tokens, which are tokenized (once)
+    when it is first iterated, indexed, etc,
+    against the parse context it was created with (see ``ParseContext.span_context``),
+    rather than the current one.
+    Note, the spans of a single document should not be expanded
+    in multiple threads at once.
+    """
+
+    def __init__(self, text, context):
+        super().__init__(text)
+        self.context = context
+        self._tokens = None
+        # the footnote reference targets of the spans, in the order they are read
+        self.foot_references = None
+
+    @property
+    def expanded(self) -> bool:
+        """Whether the text has been tokenized."""
+        return self._tokens is not None
+
+    def expand(self):
+        """Return the span tokens, tokenizing the text on the first call."""
+        if self._tokens is None:
+            context = self.context
+            previous = get_parse_context()
+            set_parse_context(context)
+            references = context._foot_references
+            context._foot_references = OrderedSet()
+            try:
+                self._tokens = super().expand()
+                self.foot_references = list(context._foot_references)
+            finally:
+                context._foot_references = references
+                set_parse_context(previous)
+        return self._tokens
+
+    def __iter__(self):
+        return iter(self.expand())
+
+    def __len__(self):
+        return len(self.expand())
+
+    def __getitem__(self, index):
+        return self.expand()[index]
+
+    def __setitem__(self, index, value):
+        self.expand()[index] = value
+
+    def __delitem__(self, index):
+        del self.expand()[index]
+
+    def insert(self, index, value):
+        self.expand().insert(index, value)
+
+    def __eq__(self, other):
+        if isinstance(other, LazySpans):
+            other = other.expand()
+        return self.expand() == other
+
+    __hash__ = None
+
+
+class LazyFootrefOrder(MutableSequence):
+    """The ``footref_order`` of a document read with ``LazySpans``.
+
+    On first access, the spans of the document are expanded
+    (those of its blocks in document order, then of its footnote definitions),
+    and the order is that of an eager read:
+    every footnote reference with a definition, in the order they are read.
+
+    :param spans: the ``LazySpans`` of the document, in document order
+    :param definitions: the footnote definitions of the document
+    """
+
+    def __init__(self, spans: list, definitions: dict):
+        self._spans = spans
+        self._definitions = definitions
+        self._order = None
+
+    def expand(self) -> list:
+        """Return the order (as a list), expanding the spans on the first call."""
+        if self._order is None:
+            order = OrderedSet()
+            for spans in self._spans:
+                spans.expand()
+                for target in spans.foot_references:
+                    if target in self._definitions:
+                        order.add(target)
+            self._order = list(order)
+            self._spans = None
+        return self._order
+
+    def __iter__(self):
+        return iter(self.expand())
+
+    def __len__(self):
+        return len(self.expand())
+
+    def __getitem__(self, index):
+        return self.expand()[index]
+
+    def __setitem__(self, index, value):
+        self.expand()[index] = value
+
+    def __delitem__(self, index):
+        del self.expand()[index]
+
+    def insert(self, index, value):
+        self.expand().insert(index, value)
+
+    def __eq__(self, other):
+        if isinstance(other, LazyFootrefOrder):
+            other = other.expand()
+        return self.expand() == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "{}({!r})".format(self.__class__.__name__, self.expand())
+
+
 class SourceLines:
     """A class for storing source lines and tracking current line index.
 
@@ -168,7 +332,10 @@ class SourceLines:
     :param metadata: any metadata associated with the lines
     """
 
-    line_end_pattern = re.compile(".*(\n|\r)$")
+    #: whether to create ``CompactPosition`` from these lines (see ``Position.make``),
+    #: set by ``block_tokenizer.tokenize_block`` once per read,
+    #: or None to check the current ``ParseContext``
+    compact_positions = None
 
     def __init__(
         self,
@@ -180,12 +347,11 @@ class SourceLines:
     ):
 
         if isinstance(lines, str):
+            if standardize_ends and "\r" in lines:
+                lines = lines.replace("\r\n", "\n").replace("\r", "\n")
             lines = lines.splitlines(keepends=True)
         if standardize_ends:
-            lines = [
-                "{}\n".format(l[:-1] if self.line_end_pattern.match(l) else l)
-                for l in lines
-            ]
+            lines = self.standardize_lines(lines)
 
         self.lines = lines
         self.uri = uri
@@ -194,6 +360,38 @@ class SourceLines:
         self.start_line = start_line
         self.metadata = metadata or {}
 
+    @staticmethod
+    def standardize_line(line: str) -> str:
+        """Return the line, ending with a single ``\\n``
+        (in place of any ``\\r\\n`` or ``\\r``).
+        """
+        if line.endswith("\r\n"):
+            return line[:-2] + "\n"
+        if line.endswith("\r"):
+            return line[:-1] + "\n"
+        if line.endswith("\n"):
+            return line
+        return line + "\n"
+
+    @classmethod
+    def standardize_lines(cls, lines: Iterable[str]) -> List[str]:
+        """Return the lines, all ending with a single ``\\n``.
+
+        The usual case, where only the final line may need changing,
+        is checked in bulk, without processing each line in Python.
+        """
+        if not isinstance(lines, list):
+            lines = list(lines)
+        if not lines:
+            return lines
+        if all(map(str.endswith, lines, repeat("\n", len(lines) - 1))) and not any(
+            map(str.endswith, lines, repeat("\r\n"))
+        ):
+            if lines[-1].endswith("\n"):
+                return lines
+            return lines[:-1] + [cls.standardize_line(lines[-1])]
+        return list(map(cls.standardize_line, lines))
+
     @property
     def lineno(self):
         """Return the line number in the source text
@@ -238,6 +436,224 @@ class SourceLines:
         if self._index != -1:
             self._index -= 1
 
+    @classmethod
+    def from_path(
+        cls,
+        path,
+        encoding: str = "utf-8",
+        start_line: int = 0,
+        standardize_ends: bool = True,
+        uri: Optional[str] = None,
+        metadata: Optional[dict] = None,
+    ) -> "MappedSourceLines":
+        """Read the lines of a file, without loading it into memory
+        (see ``MappedSourceLines``).
+        """
+        return MappedSourceLines(
+            path,
+            encoding=encoding,
+            start_line=start_line,
+            standardize_ends=standardize_ends,
+            uri=uri,
+            metadata=metadata,
+        )
+
+
+class MappedLines:
+    """A read-only sequence of the lines of a buffer, decoded when accessed.
+
+    Lines are decoded in chunks of ``chunk_size``,
+    of which only the most recent is kept.
+
+    :param buffer: the encoded text (e.g. an ``mmap``)
+    :param starts: the offset of each line, followed by the end of the text
+    """
+
+    __slots__ = ("buffer", "starts", "encoding", "standardize_ends", "_first", "_chunk")
+
+    chunk_size = 1024
+
+    def __init__(self, buffer, starts: array, encoding: str, standardize_ends: bool):
+        self.buffer = buffer
+        self.starts = starts
+        self.encoding = encoding
+        self.standardize_ends = standardize_ends
+        self._first = 0
+        self._chunk = []
+
+    def __len__(self):
+        return len(self.starts) - 1
+
+    def __getitem__(self, index):
+        if type(index) is slice:
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self.starts) - 1
+        offset = index - self._first
+        if 0 <= offset < len(self._chunk):
+            return self._chunk[offset]
+        if not 0 <= index < len(self.starts) - 1:
+            raise IndexError("line index out of range")
+        first = index - index % self.chunk_size
+        self._chunk = self._decode(first, min(first + self.chunk_size, len(self)))
+        self._first = first
+        return self._chunk[index - first]
+
+    def _decode(self, first: int, last: int) -> List[str]:
+        """Decode the lines from index ``first`` to ``last``."""
+        starts = self.starts
+        if not self.standardize_ends:
+            return [
+                str(self.buffer[starts[i] : starts[i + 1]], self.encoding)
+                for i in range(first, last)
+            ]
+        text = str(self.buffer[starts[first] : starts[last]], self.encoding)
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        lines = text.split("\n")
+        if lines[-1]:  # the final line of the text has no line break
+            lines.append("")
+        return [line + "\n" for line in lines[:-1]]
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+
+class MappedSourceLines(SourceLines):
+    """Source lines of a memory-mapped file.
+
+    Only the offset of each line is stored (in an ``array("Q")``),
+    and lines are decoded as they are read,
+    so that memory use does not grow with the text of the file.
+    Lines end at ``\\n``, ``\\r\\n`` or ``\\r``,
+    and the encoding must be ASCII compatible (e.g. UTF-8 or Latin-1).
+
+    :param path: the path of the file
+    :param encoding: the encoding of the file (a UTF-8 byte order mark is skipped)
+    :param start_line: the position of the initial line within the full source text.
+    :param standardize_ends: standardize all lines to end with ``\\n``
+    :param metadata: any metadata associated with the lines
+    """
+
+    line_break_pattern = re.compile(b"\r\n?|\n")
+
+    def __init__(
+        self,
+        path,
+        encoding: str = "utf-8",
+        start_line: int = 0,
+        standardize_ends: bool = True,
+        uri: Optional[str] = None,
+        metadata: Optional[dict] = None,
+    ):
+        super().__init__([], start_line=start_line, uri=uri, metadata=metadata)
+        with open(path, "rb") as handle:
+            try:
+                self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # an empty file cannot be mapped
+                self._map = b""
+            first = 0
+            if self._map[:3] == codecs.BOM_UTF8 and codecs.lookup(
+                encoding
+            ).name in ("utf-8", "utf-8-sig"):
+                first = 3
+            if re.search(b"\r(?!\n)", self._map) is None:
+                # only (\r)\n line breaks, so lines can be read by the file object
+                handle.seek(0)
+                starts = array("Q", chain((first,), accumulate(map(len, handle))))
+                if starts[1:2] == array("Q", [first]):  # only a byte order mark
+                    del starts[1]
+            else:
+                starts = array("Q", [first])
+                starts.extend(
+                    match.end()
+                    for match in self.line_break_pattern.finditer(self._map, first)
+                )
+                if starts[-1] != len(self._map):
+                    starts.append(len(self._map))
+        self.lines = MappedLines(self._map, starts, encoding, standardize_ends)
+
+    def close(self):
+        """Close the memory-mapped file."""
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class StreamSourceLines(SourceLines):
+    """A class for lazily reading source lines from an iterable (e.g. a file object).
+
+    Lines are only read as they are required,
+    and those before the current line can be discarded with ``release``,
+    so that memory use does not grow with the length of the source.
+
+    :param stream: an iterable of source lines
+    :param start_line: the position of the initial line within the full source text.
+    :param standardize_ends: standardize all lines to end with ``\\n``
+    :param metadata: any metadata associated with the lines
+    """
+
+    def __init__(
+        self,
+        stream: Iterable[str],
+        start_line: int = 0,
+        standardize_ends: bool = False,
+        uri: Optional[str] = None,
+        metadata: Optional[dict] = None,
+    ):
+        super().__init__([], start_line=start_line, uri=uri, metadata=metadata)
+        self._stream = iter(stream)
+        self._standardize_ends = standardize_ends
+        # the index of the first line in the buffer
+        self._offset = 0
+
+    def _fill(self, index: int) -> bool:
+        """Read lines until ``index`` is in the buffer,
+        returning False if the stream ends first.
+        """
+        while index - self._offset >= len(self.lines):
+            try:
+                line = next(self._stream)
+            except StopIteration:
+                return False
+            if self._standardize_ends:
+                line = self.standardize_line(line)
+            self.lines.append(line)
+        return True
+
+    def __next__(self):
+        """Progress the line index and return the line.
+
+        :raises: ``StopIteration`` if reached the end of the source lines.
+        """
+        if self._fill(self._index + 1):
+            self._index += 1
+            return self.lines[self._index - self._offset]
+        raise StopIteration
+
+    def __repr__(self):
+        return repr(self.lines[self._index + 1 - self._offset :])
+
+    def peek(self) -> Optional[str]:
+        """Return the next line, if exists,
+        without actually advancing the line index.
+        """
+        if self._fill(self._index + 1):
+            return self.lines[self._index + 1 - self._offset]
+        return None
+
+    def release(self):
+        """Discard the lines before the current line from memory."""
+        if self._index > self._offset:
+            del self.lines[: self._index - self._offset]
+            self._offset = self._index
+
 
 @autodoc
 @attr.s(slots=True, kw_only=True, repr=False)
@@ -258,14 +674,37 @@ class Position:
         :param start_line: the index of the start line, if different to ``lines.lineno``
         """
         if start_line is None:
-            return cls(line_start=lines.lineno, uri=lines.uri, data=lines.metadata)
+            return cls.make(lines.lineno, lines=lines)
+        return cls.make(start_line, lines.lineno, lines=lines)
+
+    @classmethod
+    def make(
+        cls, line_start: int, line_end: Optional[int] = None, lines=None
+    ) -> Union["Position", "CompactPosition"]:
+        """Create a position, or a ``CompactPosition`` if ``compact_positions``
+        (or ``outline``) is set on the current ``ParseContext``
+        (as recorded on ``lines.compact_positions``, if given).
+
+        :param lines: the ``SourceLines`` to take the ``uri`` and ``data`` from
+        """
+        compact = None if lines is None else lines.compact_positions
+        if compact is None:
+            parse_context = get_parse_context()
+            compact = parse_context.compact_positions or parse_context.outline
+        if compact:
+            return CompactPosition((line_start, line_end))
+        if lines is None:
+            return cls(line_start=line_start, line_end=line_end)
         return cls(
-            line_start=start_line,
-            line_end=lines.lineno,
+            line_start=line_start,
+            line_end=line_end,
             uri=lines.uri,
             data=lines.metadata,
         )
 
+    def to_dict(self) -> dict:
+        return attr.asdict(self)
+
     def make_loc_str(self) -> str:
         """Create a location string ``<uri>:<line_start>:<line_end>``"""
         string = "{0}:{1}:{2}".format(
@@ -288,6 +727,49 @@ class Position:
         return "{0}({1})".format(self.__class__.__name__, args)
 
 
+class CompactPosition(tuple):
+    """A ``(line_start, line_end)`` pair, used in place of ``Position``
+    when memory matters more than the ``uri`` and ``data`` of the source.
+
+    It has the same (read-only) attributes as ``Position``.
+    """
+
+    __slots__ = ()
+
+    uri = None
+    data = MappingProxyType({})
+
+    @property
+    def line_start(self) -> int:
+        return self[0]
+
+    @property
+    def line_end(self) -> Optional[int]:
+        return self[1]
+
+    def __getnewargs__(self):
+        return (tuple(self),)
+
+    def to_dict(self) -> dict:
+        return {
+            "line_start": self[0],
+            "line_end": self[1],
+            "uri": None,
+            "data": {},
+        }
+
+    def make_loc_str(self) -> str:
+        """Create a location string ``:<line_start>:<line_end>``"""
+        return ":{0}:{1}".format(self[0], "" if self[1] is None else self[1])
+
+    def __repr__(self):
+        if self[1] is not None:
+            return "{0}(lines=[{1}:{2}])".format(
+                self.__class__.__name__, self[0], self[1]
+            )
+        return "{0}(line={1})".format(self.__class__.__name__, self[0])
+
+
 class BlockToken(Token):
     """Base class for block-level tokens. Recursively parse inner tokens.
 
@@ -319,8 +801,21 @@ class BlockToken(Token):
       to a previous state. See `SourceLines.anchor`,
       `SourceLines.reset`.
 
+    * BlockToken.start_chars is a string of the characters that a line can begin
+      with (after up to three spaces of indentation) for this token to start.
+      It is used to skip calls to `start` that cannot succeed.
+      If None (the default), `start` is tested on every line.
+
+    * BlockToken.outline_field is the name of an attribute to include
+      in the entries of `block_tokenizer.outline` (e.g. the heading level).
+
     """
 
+    __slots__ = ()
+
+    start_chars: Optional[str] = None
+    outline_field: Optional[str] = None
+
     @classmethod
     def start(cls, line: str) -> bool:
         """Takes a line from the document as argument, and
@@ -353,12 +848,17 @@ class SpanToken(Token):
     :arg parse_inner: whether to do a nested parse of the content
     :arg parse_group: the group within the pattern match corresponding to the content
     :arg precedence: Alter the relative order by which the span token is assessed.
+    :arg start_chars: the characters that a pattern match can begin with
+        (used by ``SpanScanner`` to skip ahead), or None if unknown.
     """
 
+    __slots__ = ()
+
     pattern = None
     parse_inner = True
     parse_group = 1
     precedence = 5
+    start_chars = None
 
     def __init__(
         self,
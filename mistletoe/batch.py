@@ -0,0 +1,166 @@
+"""Render many documents, optionally in parallel across worker processes.
+
+Each worker process holds a single, long-lived renderer (and ``ParseContext``),
+which is reused for every document it is sent,
+after clearing its per-document state (see ``BaseRenderer.reset_document``).
+"""
+from collections import namedtuple
+import multiprocessing
+import os
+import traceback
+from typing import Callable, Iterable, Iterator, Optional, Union
+
+from mistletoe.block_tokens import Document
+from mistletoe.renderers.base import BaseRenderer
+from mistletoe.renderers.html import HTMLRenderer
+
+
+BatchResult = namedtuple("BatchResult", ["index", "source", "output", "error"])
+BatchResult.__doc__ = """The result of rendering a single document.
+
+:param index: the position of the document in the input sources
+:param source: the input source (path or text)
+:param output: the rendered output (None if an error occurred)
+:param error: the formatted traceback of any error (None if successful)
+"""
+
+# the worker of this process (when run in a process pool)
+_WORKER = None
+
+
+def render_many(
+    sources: Iterable[Union[str, os.PathLike]],
+    renderer: BaseRenderer = HTMLRenderer,
+    jobs: Optional[int] = 1,
+    chunksize: int = 1,
+    ordered: bool = True,
+    init_token=Document,
+    read_kwargs: Optional[dict] = None,
+    encoding: Optional[str] = None,
+    cache_dir: Optional[Union[str, os.PathLike]] = None,
+    **kwargs
+) -> Iterator[BatchResult]:
+    """Render many documents, yielding a ``BatchResult`` per document.
+
+    Errors are caught and reported per document, rather than stopping the batch.
+
+    :param sources: ``os.PathLike`` objects (e.g. ``pathlib.Path``) are read as files,
+        any other item is treated as the text to parse.
+    :param renderer: the renderer class to use (must be importable by the workers)
+    :param jobs: the number of worker processes;
+        ``1`` renders in the current process, ``None`` or ``0`` uses all CPUs.
+    :param chunksize: the number of documents sent to a worker at a time
+    :param ordered: yield results in the order of ``sources``,
+        otherwise yield them as they are completed.
+    :param init_token: The initial token to use for parsing the text `init_token.read`
+    :param read_kwargs: key-word arguments to parse to the ``init_token.read`` method
+    :param encoding: the encoding used to read files
+    :param cache_dir: a directory to cache the rendered outputs in,
+        shared by all workers (see ``mistletoe.cache.DiskCache``)
+    :param kwargs: key-word arguments to parse to the renderer initialisation
+    """
+    sources = list(sources)
+    initargs = (renderer, kwargs, init_token, read_kwargs or {}, encoding, cache_dir)
+    if jobs == 1 or len(sources) <= 1:
+        with _Worker(*initargs) as worker:
+            for index, source in enumerate(sources):
+                yield BatchResult(index, source, *worker.render(source))
+        return
+
+    with multiprocessing.Pool(
+        processes=jobs or None, initializer=_init_worker, initargs=initargs
+    ) as pool:
+        imap = pool.imap if ordered else pool.imap_unordered
+        for index, output, error in imap(
+            _render_in_worker, enumerate(sources), chunksize=chunksize
+        ):
+            yield BatchResult(index, sources[index], output, error)
+
+
+class _Worker:
+    """A long-lived renderer, for rendering multiple documents."""
+
+    def __init__(
+        self,
+        renderer,
+        renderer_kwargs,
+        init_token,
+        read_kwargs,
+        encoding,
+        cache_dir=None,
+    ):
+        self.renderer = renderer(**renderer_kwargs)
+        self.init_token = init_token
+        self.read_kwargs = read_kwargs
+        self.encoding = encoding
+        self.cache = None
+        if cache_dir is not None:
+            from mistletoe.cache import DiskCache
+
+            # the renderer options are part of the key
+            self.cache = DiskCache(cache_dir)
+            self.fingerprint = (
+                repr(sorted(renderer_kwargs.items())) if renderer_kwargs else ""
+            )
+
+    def __enter__(self):
+        self.renderer.__enter__()
+        return self
+
+    def __exit__(self, *args):
+        self.renderer.__exit__(*args)
+
+    def reset_renderer(self) -> BaseRenderer:
+        """Return (and enter) the renderer, reset for a new document,
+        so that no state is carried over from previous documents.
+        """
+        self.renderer.reset_document()
+        return self.renderer.__enter__()
+
+    def render(self, source):
+        """Render a single source, returning ``(output, error)``."""
+        try:
+            if isinstance(source, os.PathLike):
+                with open(source, "r", encoding=self.encoding) as handle:
+                    text = handle.read()
+            else:
+                text = source
+            renderer = self.reset_renderer()
+            if self.cache is not None:
+                output = self.cache.render(
+                    text,
+                    renderer,
+                    self.init_token,
+                    self.fingerprint,
+                    **self.read_kwargs
+                )
+                return output, None
+            token = self.init_token.read(text, **self.read_kwargs)
+            return renderer.render(token), None
+        except Exception:
+            return None, traceback.format_exc()
+
+    def render_text(self, text: str, abort: Optional[Callable[[], bool]] = None):
+        """Render a single text (raising any errors).
+
+        :param abort: set as the ``ParseContext.abort`` for the parse
+        """
+        # the worker may share its thread with other renderers
+        renderer = self.reset_renderer()
+        parse_context = renderer.parse_context
+        parse_context.abort = abort
+        try:
+            return renderer.render(self.init_token.read(text, **self.read_kwargs))
+        finally:
+            parse_context.abort = None
+
+
+def _init_worker(*args):
+    """Instantiate the renderer for this worker process."""
+    global _WORKER
+    _WORKER = _Worker(*args).__enter__()
+
+
+def _render_in_worker(item):
+    index, source = item
+    return (index,) + _WORKER.render(source)
@@ -1,8 +1,33 @@
 """
 Block-level tokenizer for mistletoe.
 """
-from mistletoe.base_elements import SourceLines
-from mistletoe.parse_context import get_parse_context
+import re
+from typing import Iterator, Optional
+
+from mistletoe.base_elements import (
+    BlockToken,
+    LazySpans,
+    SourceLines,
+    SpanContainer,
+    StreamSourceLines,
+)
+from mistletoe.nested_tokenizer import normalize_label
+from mistletoe.parse_context import (
+    get_parse_context,
+    OrderedSet,
+    ParseAborted,
+    ParseContext,
+)
+
+# innermost brackets, followed by the label of a full or collapsed reference
+# (``[text][label]`` or ``[label][]``), or by what is (most likely) the
+# destination and title of an inline link (otherwise the text may be a label)
+_reference_pattern = re.compile(
+    r"\[((?:[^\\\[\]]|\\.){0,999})\]"
+    r"(?:\[((?:[^\\\[\]]|\\.){0,999})\]"
+    r"|(\(\s*(?:<[^<>\n]*>|[^\s()<]*(?:\([^\s()]*\)[^\s()]*)*)"
+    r"(?:\s+(?:\"[^\"]*\"|'[^']*'|\([^()]*\)))?\s*\)))?"
+)
 
 
 def tokenize_main(
@@ -10,6 +35,8 @@ def tokenize_main(
     token_types=None,
     expand_spans: bool = True,
     skip_tokens: list = ("LinkDefinition", "Footnote"),
+    block_lines: Optional[list] = None,
+    lazy_spans: Optional[ParseContext] = None,
 ):
     """Searches for token_types in an iterable.
 
@@ -18,40 +45,192 @@ def tokenize_main(
     :param start_line: the source line number corresponding to `iterable[0]`
     :param expand_spans: After the initial parse the span text is not yet tokenized,
         but stored instead as raw text in `SpanContainer`, in order to ensure
-        all link definitons are read first. Setting True, runs a second walk of the
-        syntax tree to replace these `SpanContainer` with the final span tokens.
+        all link definitons are read first. Setting True, replaces these
+        `SpanContainer` with the final span tokens, once the block parse is complete
+        (see ``expand_span_containers``).
     :param skip_tokens: do not store these ``token.name`` in the syntax tree.
         These are usually tokens that store themselves in the global context
+    :param block_lines: if a list is given, the (first, last) source lines
+        read for each returned token are appended to it.
+    :param lazy_spans: if a context is given, the `SpanContainer` are instead
+        replaced with `LazySpans`, expanded against this context on first access
+        (see ``ParseContext.span_context``).
 
     :returns: list of block-level token instances.
     """
     if not isinstance(lines, SourceLines):
         lines = SourceLines(lines)
+    parse_context = get_parse_context()
     if token_types is None:
-        token_types = get_parse_context().block_tokens
-    tokens = tokenize_block(lines, token_types=token_types, skip_tokens=skip_tokens)
-    if expand_spans:
-        for token in tokens + list(get_parse_context().foot_definitions.values()):
-            token.expand_spans()
+        token_types = parse_context.block_tokens
+    registered = len(parse_context.span_containers)
+    try:
+        tokens = tokenize_block(
+            lines,
+            token_types=token_types,
+            skip_tokens=skip_tokens,
+            block_lines=block_lines,
+        )
+        if lazy_spans is not None:
+            expand_span_containers(registered, lazy_spans)
+            for token in parse_context.foot_definitions.values():
+                if type(token.children) is SpanContainer:
+                    token.children = LazySpans(token.children.text, lazy_spans)
+                    lazy_spans.lazy_spans.append(token.children)
+        elif expand_spans:
+            expand_span_containers(registered)
+            for token in parse_context.foot_definitions.values():
+                token.expand_spans()
+    finally:
+        del parse_context.span_containers[registered:]
     return tokens
 
 
+def register_spans(token, text: str, expand: bool = False):
+    """Set the children of a token to a ``SpanContainer`` of ``text``,
+    and record it to be expanded later.
+
+    Tokens are appended to ``ParseContext.span_containers``, in the order they are
+    read, so that the spans can be expanded without walking the syntax tree
+    (see ``expand_span_containers``).
+    If the ``outline`` option of the context is set, the text is not stored.
+
+    :param expand: expand the spans of the token immediately, instead
+    :returns: the token
+    """
+    parse_context = get_parse_context()
+    if parse_context.outline:
+        token.children = []
+    elif expand:
+        token.children = SpanContainer(text).expand()
+    else:
+        token.children = SpanContainer(text)
+        parse_context.span_containers.append(token)
+    return token
+
+
+def expand_span_containers(start: int = 0, lazy: Optional[ParseContext] = None):
+    """Expand the spans of the tokens in ``ParseContext.span_containers``,
+    from index ``start``, then remove them from the list.
+
+    :param lazy: if a context is given, replace the `SpanContainer` with `LazySpans`
+        instead, which are expanded against this context on first access
+        (and appended to its ``lazy_spans``)
+    """
+    span_containers = get_parse_context().span_containers
+    for index in range(start, len(span_containers)):
+        token = span_containers[index]
+        children = token.children
+        if isinstance(children, SpanContainer):
+            if lazy is None:
+                token.children = children.expand()
+            elif not isinstance(children, LazySpans):
+                token.children = LazySpans(children.text, lazy)
+                lazy.lazy_spans.append(token.children)
+    del span_containers[start:]
+
+
+def outline(
+    lines,
+    token_types=None,
+    skip_tokens: list = ("LinkDefinition", "Footnote"),
+    reset_definitions: bool = True,
+) -> list:
+    """Return the block structure of a document, without tokenizing any spans.
+
+    The blocks are read with the ``outline`` option of the current context set,
+    so that no ``Position`` or ``SpanContainer`` is created,
+    and returned in document order (container blocks before their contents,
+    but omitting the rows of tables) as ``(block_type, line_start, line_end, info)``
+    tuples, where ``info`` is the ``outline_field`` attribute of the block
+    (e.g. the heading level or code language), or None.
+
+    :param lines: the source text or lines
+    :param token_types: override block-level tokens set in global context
+    :param skip_tokens: do not include these ``token.name``
+    :param reset_definitions: remove any previously stored definitions
+        in the global context (see ``ParseContext.reset_definitions()``).
+    """
+    parse_context = get_parse_context()
+    if reset_definitions:
+        parse_context.reset_definitions()
+    if not isinstance(lines, SourceLines):
+        lines = SourceLines(lines, standardize_ends=True)
+    previous = parse_context.outline
+    parse_context.outline = True
+    try:
+        tokens = tokenize_block(lines, token_types=token_types, skip_tokens=skip_tokens)
+    finally:
+        parse_context.outline = previous
+    entries = []
+    stack = tokens[::-1]
+    while stack:
+        token = stack.pop()
+        position = token.position
+        field = token.outline_field
+        entries.append(
+            (
+                token.name,
+                None if position is None else position.line_start,
+                None if position is None else position.line_end,
+                None if field is None else getattr(token, field),
+            )
+        )
+        if token.children and token.name != "Table":
+            stack.extend(
+                child
+                for child in reversed(token.children)
+                if isinstance(child, BlockToken)
+            )
+    return entries
+
+
 def tokenize_block(
-    lines: SourceLines, token_types=None, skip_tokens=("LinkDefinition", "Footnote")
+    lines: SourceLines,
+    token_types=None,
+    skip_tokens=("LinkDefinition", "Footnote"),
+    stop_lines=None,
+    block_lines=None,
 ):
-    """Returns a list of parsed tokens."""
+    """Returns a list of parsed tokens.
+
+    :param stop_lines: stop before reading a block starting on any of these lines
+    :param block_lines: if a list is given, the (first, last) source lines
+        read for each returned token are appended to it.
+    """
     assert isinstance(lines, SourceLines), "lines must be `SourceLines` instance"
     if token_types is None:
         token_types = get_parse_context().block_tokens
+    if isinstance(token_types, OrderedSet):
+        dispatch = token_types.cached("start_dispatch", StartDispatch)
+    else:
+        dispatch = StartDispatch(token_types)
+    parse_context = get_parse_context()
+    if parse_context.profiler is not None:
+        dispatch = parse_context.profiler.block_dispatch(dispatch)
+    abort = parse_context.abort
+    span_containers = parse_context.span_containers
+    # decided once, rather than for every position created
+    lines.compact_positions = parse_context.compact_positions or parse_context.outline
     parsed_tokens = ParseBuffer()
     line = lines.peek()
     while line is not None:
-        for token_type in token_types:
+        if stop_lines is not None and lines.lineno + 1 in stop_lines:
+            break
+        if abort is not None and abort():
+            raise ParseAborted("at line {}".format(lines.lineno + 1))
+        for token_type in dispatch.candidates(line):
             if token_type.start(line):
+                start_line = lines.lineno + 1
+                registered = len(span_containers)
                 token = token_type.read(lines)
                 if token is not None:
                     if token.name not in skip_tokens:
                         parsed_tokens.append(token)
+                        if block_lines is not None:
+                            block_lines.append((start_line, lines.lineno))
+                    else:
+                        del span_containers[registered:]
                     break
         else:  # unmatched newlines
             next(lines)
@@ -60,6 +239,146 @@ def tokenize_block(
     return parsed_tokens
 
 
+def tokenize_stream(
+    lines,
+    token_types=None,
+    expand_spans: Optional[str] = "barrier",
+    skip_tokens: list = ("LinkDefinition", "Footnote"),
+    max_pending: int = 64,
+) -> Iterator:
+    """Lazily search for token_types, yielding each top-level token once it is read.
+
+    :param lines: the source lines, or an iterable of lines (e.g. a file object),
+        which will be read as they are required.
+    :param token_types: override block-level tokens set in global context
+    :param expand_spans: ``"barrier"`` expands the spans of each token
+        once every link label and footnote reference it may contain is defined
+        (see ``unresolved_labels``), holding back it and any later tokens until then,
+        or until ``max_pending`` tokens are held back,
+        so that the tokens are (almost always) as for ``tokenize_main``;
+        ``"eager"`` expands the spans of each token before it is
+        yielded, using the link/footnote definitions read so far
+        (so references to later definitions are left unresolved);
+        ``"deferred"`` holds back all tokens until the end of the source;
+        ``None`` leaves the spans unexpanded.
+        Unless None, the spans of footnote definitions are expanded at the end.
+    :param skip_tokens: do not yield these ``token.name``.
+        These are usually tokens that store themselves in the global context
+    :param max_pending: the maximum number of tokens the barrier holds back;
+        beyond this, the first is expanded with the definitions read so far
+        (as for ``"eager"``), to bound the memory and delay of the stream.
+
+    :yields: block-level token instances.
+    """
+    if expand_spans not in ("barrier", "eager", "deferred", None):
+        raise ValueError(
+            "expand_spans must be 'barrier', 'eager', 'deferred' or None: {}".format(
+                expand_spans
+            )
+        )
+    if not isinstance(lines, SourceLines):
+        lines = StreamSourceLines(lines)
+    if token_types is None:
+        token_types = get_parse_context().block_tokens
+    if isinstance(token_types, OrderedSet):
+        dispatch = token_types.cached("start_dispatch", StartDispatch)
+    else:
+        dispatch = StartDispatch(token_types)
+    parse_context = get_parse_context()
+    if parse_context.profiler is not None:
+        dispatch = parse_context.profiler.block_dispatch(dispatch)
+    abort = parse_context.abort
+    release = getattr(lines, "release", None)
+    span_containers = parse_context.span_containers
+    start = len(span_containers)
+    # tokens held back by the barrier, as (token, span containers, labels)
+    pending = []
+    deferred = []
+    try:
+        line = lines.peek()
+        while line is not None:
+            if abort is not None and abort():
+                raise ParseAborted("at line {}".format(lines.lineno + 1))
+            for token_type in dispatch.candidates(line):
+                if token_type.start(line):
+                    registered = len(span_containers)
+                    token = token_type.read(lines)
+                    if token is not None:
+                        if token.name in skip_tokens:
+                            del span_containers[registered:]
+                        elif expand_spans == "deferred":
+                            deferred.append(token)
+                        elif expand_spans == "barrier":
+                            containers = span_containers[registered:]
+                            del span_containers[registered:]
+                            pending.append(
+                                (token, containers, unresolved_labels(containers))
+                            )
+                        else:
+                            if expand_spans == "eager":
+                                expand_span_containers(registered)
+                            else:
+                                del span_containers[registered:]
+                            yield token
+                        break
+            else:  # unmatched newlines
+                next(lines)
+            # the block may have added definitions
+            while pending:
+                token, containers, labels = pending[0]
+                labels = unresolved_labels(labels=labels)
+                if labels and len(pending) <= max_pending:
+                    pending[0] = (token, containers, labels)
+                    break
+                pending.pop(0)
+                span_containers.extend(containers)
+                expand_span_containers(start)
+                yield token
+            if release is not None:
+                release()
+            line = lines.peek()
+        for token, containers, _ in pending:
+            span_containers.extend(containers)
+            deferred.append(token)
+        if expand_spans is not None:
+            expand_span_containers(start)
+            for token in parse_context.foot_definitions.values():
+                token.expand_spans()
+    finally:
+        del span_containers[start:]
+    yield from deferred
+
+
+def unresolved_labels(containers=(), labels=()) -> set:
+    """Return the (possible) link labels and footnote references,
+    in ``labels`` and the span text of the ``containers`` tokens,
+    which are not yet defined in the global context.
+
+    These are found from innermost pairs of brackets
+    (since labels cannot contain unescaped brackets):
+    the label of ``[text][label]``, ``[label][]`` or ``[label]``,
+    skipping the text of inline links ``[text](url "title")``.
+    A shortcut label may also be text that is not a reference (e.g. ``a[0]``).
+    """
+    parse_context = get_parse_context()
+    link_definitions = parse_context.link_definitions
+    foot_definitions = parse_context.foot_definitions
+    labels = set(labels)
+    for token in containers:
+        children = token.children
+        if isinstance(children, SpanContainer) and "[" in children.text:
+            for text, label, inline in _reference_pattern.findall(children.text):
+                if not inline:
+                    labels.add(label or text)
+    return {
+        label
+        for label in labels
+        if label.strip()
+        and normalize_label(label) not in link_definitions
+        and not (label.startswith("^") and label[1:] in foot_definitions)
+    }
+
+
 class ParseBuffer(list):
     """
     A wrapper around builtin list,
@@ -69,3 +388,41 @@ class ParseBuffer(list):
     def __init__(self, *args):
         super().__init__(*args)
         self.loose = False
+
+
+class StartDispatch:
+    """A lookup of the block tokens whose ``start`` may match a line.
+
+    Tokens are indexed by their ``start_chars``,
+    so that only a (token ordered) subset of candidates is tested for each line,
+    based on its first non-space character.
+    Lines indented by four or more spaces, or beginning with other whitespace,
+    are tested against all tokens.
+    """
+
+    __slots__ = ("all_tokens", "by_char", "default")
+
+    def __init__(self, token_types):
+        self.all_tokens = tuple(token_types)
+        chars = set()
+        for token_type in self.all_tokens:
+            chars.update(getattr(token_type, "start_chars", None) or "")
+        self.by_char = {
+            char: tuple(
+                t
+                for t in self.all_tokens
+                if getattr(t, "start_chars", None) is None or char in t.start_chars
+            )
+            for char in chars
+        }
+        self.default = tuple(
+            t for t in self.all_tokens if getattr(t, "start_chars", None) is None
+        )
+
+    def candidates(self, line: str) -> tuple:
+        """Return the tokens to test for this line, in order."""
+        stripped = line.lstrip(" ")
+        first = stripped[:1]
+        if len(line) - len(stripped) > 3 or (first.isspace() and first != "\n"):
+            return self.all_tokens
+        return self.by_char.get(first, self.default)
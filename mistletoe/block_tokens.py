@@ -2,7 +2,7 @@
 Built-in block-level token classes.
 """
 import re
-from typing import Dict, Optional, Union
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
 from typing import List as ListType
 
 import attr
@@ -20,9 +20,11 @@ from mistletoe.parse_context import get_parse_context
 from mistletoe.base_elements import (
     Token,
     BlockToken,
+    CompactPosition,
+    LazyFootrefOrder,
     Position,
-    SpanContainer,
     SourceLines,
+    StreamSourceLines,
 )
 from mistletoe.attr_doc import autodoc
 
@@ -113,7 +115,7 @@ class FrontMatter(BlockToken):
 
 
 @autodoc
-@attr.s(slots=False, kw_only=True)
+@attr.s(slots=True, kw_only=True)
 class Document(BlockToken):
     """Document container."""
 
@@ -143,6 +145,26 @@ class Document(BlockToken):
     front_matter: Optional[FrontMatter] = attr.ib(
         default=None, metadata={"doc": "Front matter YAML block"}
     )
+    _line_count: Optional[int] = attr.ib(
+        default=None,
+        repr=False,
+        eq=False,
+        metadata={"doc": "Number of source lines read (used by ``reparse``)"},
+    )
+    _block_lines: list = attr.ib(
+        factory=list,
+        repr=False,
+        eq=False,
+        metadata={"doc": "(first, last) source lines of each child"},
+    )
+    _definition_lines: list = attr.ib(
+        factory=list,
+        repr=False,
+        eq=False,
+        metadata={
+            "doc": "(line_start, line_end) of definitions (used by ``reparse``)"
+        },
+    )
     # TODO add is_nested parameter?
     # or have a subclass of document specifically for nesting?
 
@@ -153,6 +175,7 @@ class Document(BlockToken):
         reset_definitions: bool = True,
         skip_tokens: list = ("LinkDefinition", "Footnote"),
         front_matter: bool = False,
+        lazy_spans: bool = False,
     ):
         """Read a document
 
@@ -163,9 +186,15 @@ class Document(BlockToken):
             These are usually tokens that store themselves in the global context.
         :param front_matter: search for an initial YAML block front matter block
             (note this is not strictly CommonMark compliant)
+        :param lazy_spans: only tokenize the span text of each block
+            when its children are first accessed (see ``LazySpans``),
+            against the definitions of this document.
+            ``footref_order`` is then a ``LazyFootrefOrder``,
+            which expands all the spans when first accessed (e.g. by a renderer).
         """
+        parse_context = get_parse_context()
         if reset_definitions:
-            get_parse_context().reset_definitions()
+            parse_context.reset_definitions()
 
         if not isinstance(lines, SourceLines):
             lines = SourceLines(lines, standardize_ends=True)
@@ -177,17 +206,249 @@ class Document(BlockToken):
         if front_matter and lines.peek() and lines.peek().startswith("---"):
             front_matter_token = FrontMatter.read(lines)
 
-        children = tokenizer.tokenize_main(lines=lines, skip_tokens=skip_tokens)
-        foot_defs = get_parse_context().foot_definitions
+        block_lines = []
+        span_context = parse_context.span_context() if lazy_spans else None
+        children = tokenizer.tokenize_main(
+            lines=lines,
+            skip_tokens=skip_tokens,
+            block_lines=block_lines,
+            lazy_spans=span_context,
+        )
+        foot_defs = parse_context.foot_definitions
+        if lazy_spans:
+            footref_order = LazyFootrefOrder(span_context.lazy_spans, foot_defs)
+        else:
+            footref_order = [t for t in parse_context.foot_references if t in foot_defs]
         return cls(
             children=children,
             front_matter=front_matter_token,
-            link_definitions=get_parse_context().link_definitions,
+            link_definitions=parse_context.link_definitions,
             footnotes=foot_defs,
-            footref_order=[
-                t for t in get_parse_context().foot_references if t in foot_defs
-            ],
+            footref_order=footref_order,
+            line_count=len(lines.lines) if lines.start_line == 0 else None,
+            block_lines=block_lines,
+            definition_lines=list(parse_context.definition_lines),
+        )
+
+    @classmethod
+    def iter_read(
+        cls,
+        lines: Union[str, Iterable[str]],
+        reset_definitions: bool = True,
+        skip_tokens: list = ("LinkDefinition", "Footnote"),
+        front_matter: bool = False,
+        expand_spans: Optional[str] = "barrier",
+        max_pending: int = 64,
+    ) -> Iterator[Token]:
+        """Lazily read a document, yielding each top-level token once it is read.
+
+        Lines are pulled from ``lines`` (e.g. a file object) only as they are needed,
+        so that memory use does not grow with the length of the document.
+        The front matter (if found) is yielded first,
+        and the definitions are left in the global context once finished.
+
+        :param lines: Lines to parse
+        :param reset_definitions: remove any previously stored definitions
+            in the global context (see ``ParseContext.reset_definitions()``).
+        :param skip_tokens: do not yield these ``token.name``.
+        :param front_matter: search for an initial YAML block front matter block
+        :param expand_spans: when to expand span tokens
+            (see ``block_tokenizer.tokenize_stream``);
+            by default, each token is yielded once the definitions it may refer to
+            are read, so that the tokens are the same as for ``read``
+        :param max_pending: the maximum number of tokens held back
+            until their definitions are read (see ``block_tokenizer.tokenize_stream``)
+        """
+        if reset_definitions:
+            get_parse_context().reset_definitions()
+
+        if isinstance(lines, str):
+            lines = lines.splitlines(keepends=True)
+        if not isinstance(lines, SourceLines):
+            lines = StreamSourceLines(lines, standardize_ends=True)
+
+        if front_matter and lines.peek() and lines.peek().startswith("---"):
+            yield FrontMatter.read(lines)
+
+        yield from tokenizer.tokenize_stream(
+            lines,
+            skip_tokens=skip_tokens,
+            expand_spans=expand_spans,
+            max_pending=max_pending,
+        )
+
+    def reparse(
+        self,
+        lines: Union[str, ListType[str]],
+        changed_range: Tuple[int, int],
+        skip_tokens: list = ("LinkDefinition", "Footnote"),
+        front_matter: bool = False,
+    ) -> "Document":
+        """Update the document in-place, after an edit of its source lines.
+
+        Only the run of top-level blocks affected by the edit is re-tokenized,
+        starting after a blank line preceding it,
+        until the new parse reaches the start of an unchanged block.
+        The new blocks are then spliced in, and the positions of later blocks shifted.
+
+        A full parse is performed if the document was not created by ``read``,
+        if the edit touches the front matter or any link/footnote definitions,
+        or if the re-tokenized blocks add definitions or change footnote references,
+        since these alter the span tokens of the whole document.
+
+        :param lines: the full source lines, after the edit
+        :param changed_range: ``(start, stop)`` indexes of the lines
+            replaced in the original source (as for ``original_lines[start:stop]``)
+        :param skip_tokens: as for ``Document.read``
+        :param front_matter: as for ``Document.read``
+        """
+        if isinstance(lines, str):
+            lines = lines.splitlines(keepends=True)
+        start, stop = changed_range
+        if self._line_count is None:
+            return self._read_in_place(lines, skip_tokens, front_matter)
+        delta = len(lines) - self._line_count
+        if not 0 <= start <= stop <= self._line_count or stop + delta < start:
+            raise ValueError(
+                "changed_range {} is not consistent with {} original "
+                "and {} new lines".format(changed_range, self._line_count, len(lines))
+            )
+        if (
+            front_matter
+            and self.front_matter is not None
+            and start < (self.front_matter.position.line_end or 0)
+        ) or any(
+            line_start <= stop + 1 and line_end >= start
+            for line_start, line_end in self._definition_lines
+        ):
+            return self._read_in_place(lines, skip_tokens, front_matter)
+
+        # the first block ending at, or after, the line preceding the edit
+        spans = self._block_lines
+        first = 0
+        while first < len(spans) and spans[first][1] < start:
+            first += 1
+        # the (1-based) line to start re-tokenizing from,
+        # which must be unchanged, since the preceding block may look ahead to it
+        region_start = start + 1
+        if first < len(spans):
+            region_start = min(spans[first][0], region_start)
+        if first > 0 and region_start > start:
+            first -= 1
+            region_start = spans[first][0]
+        # blocks starting after the edit may be re-used
+        last = first
+        while last < len(spans) and spans[last][0] <= stop:
+            last += 1
+        sync_lines = {span[0] + delta: i for i, span in enumerate(spans[last:], last)}
+
+        # a link definition reads ahead to the next blank line,
+        # so also step back until the region is preceded by one
+        line_min = 1
+        if self.front_matter is not None and front_matter:
+            line_min = (self.front_matter.position.line_end or 0) + 1
+        while region_start > line_min and lines[region_start - 2].strip():
+            if first == 0 or spans[first - 1][1] < region_start - 1:
+                return self._read_in_place(lines, skip_tokens, front_matter)
+            first -= 1
+            region_start = spans[first][0]
+
+        parse_context = get_parse_context()
+        parse_context.reset_definitions()
+        source = SourceLines(
+            lines[region_start - 1 :],
+            start_line=region_start - 1,
+            standardize_ends=True,
         )
+        new_lines = []
+        registered = len(parse_context.span_containers)
+        try:
+            new_children = tokenizer.tokenize_block(
+                source,
+                skip_tokens=skip_tokens,
+                stop_lines=sync_lines,
+                block_lines=new_lines,
+            )
+            sync = sync_lines.get(source.lineno + 1, len(spans))
+            region_end = spans[sync][0] - 1 if sync < len(spans) else self._line_count
+            if parse_context.definition_lines or any(
+                line_start <= region_end and line_end >= region_start
+                for line_start, line_end in self._definition_lines
+            ):
+                return self._read_in_place(lines, skip_tokens, front_matter)
+
+            # expand spans against the document definitions
+            parse_context.link_definitions.update(self.link_definitions)
+            parse_context.foot_definitions.update(self.footnotes)
+            for target in self.footref_order:
+                parse_context.foot_references.add(target)
+            tokenizer.expand_span_containers(registered)
+        finally:
+            del parse_context.span_containers[registered:]
+        if self._foot_targets(self.children[first:sync]) != self._foot_targets(
+            new_children
+        ):
+            return self._read_in_place(lines, skip_tokens, front_matter)
+
+        if delta:
+            _shift_positions(self.children[sync:], delta)
+            _shift_positions(self.footnotes.values(), delta, start=stop)
+            self._definition_lines = [
+                (s + delta, e + delta) if s > stop else (s, e)
+                for s, e in self._definition_lines
+            ]
+        self.children[first:sync] = new_children
+        self._block_lines[first:] = new_lines + [
+            (s + delta, e + delta) for s, e in self._block_lines[sync:]
+        ]
+        self._line_count = len(lines)
+        return self
+
+    def _read_in_place(self, lines, skip_tokens, front_matter):
+        """Fully re-read the source lines, and update this document."""
+        document = self.read(lines, skip_tokens=skip_tokens, front_matter=front_matter)
+        for field in attr.fields(type(self)):
+            setattr(self, field.name, getattr(document, field.name))
+        return self
+
+    @staticmethod
+    def _foot_targets(tokens) -> list:
+        return [
+            result.node.target
+            for token in tokens
+            for result in token.walk(tokens=["FootReference"])
+        ]
+
+
+def _shift_positions(tokens, delta, start=None):
+    """Shift the line positions of block tokens (and their block children),
+    which start after the ``start`` line (if given).
+    """
+    for token in tokens:
+        if not isinstance(token, BlockToken):
+            continue
+        position = token.position
+        if isinstance(position, CompactPosition) and (
+            start is None or position.line_start > start
+        ):
+            token.position = CompactPosition(
+                (
+                    position.line_start + delta,
+                    None if position.line_end is None else position.line_end + delta,
+                )
+            )
+        elif isinstance(position, Position) and (
+            start is None or position.line_start > start
+        ):
+            position.line_start += delta
+            if position.line_end is not None:
+                position.line_end += delta
+        if getattr(token, "header", None) is not None:
+            _shift_positions([token.header], delta, start)
+        # children are either all block or all span tokens
+        children = token.children
+        if children and isinstance(children[0], BlockToken):
+            _shift_positions(children, delta, start)
 
 
 @autodoc
@@ -207,29 +468,28 @@ class Heading(BlockToken):
     )
 
     pattern = re.compile(r" {0,3}(#{1,6})(?:\n|\s+?(.*?)(?:\n|\s+?#+\s*?$))")
+    start_chars = "#"
+    outline_field = "level"
 
     @classmethod
     def start(cls, line):
         match_obj = cls.pattern.match(line)
         if match_obj is None:
             return False
-        cls.level = len(match_obj.group(1))
-        cls.content = (match_obj.group(2) or "").strip()
-        if set(cls.content) == {"#"}:
-            cls.content = ""
+        content = (match_obj.group(2) or "").strip()
+        if set(content) == {"#"}:
+            content = ""
+        get_parse_context().block_starts[cls] = (len(match_obj.group(1)), content)
         return True
 
     @classmethod
     def read(cls, lines, expand_spans=False):
         next(lines)
-        children = SpanContainer(cls.content)
-        if expand_spans:
-            children = children.expand()
-        return cls(
-            level=cls.level,
-            children=children,
-            position=Position.from_source_lines(lines),
+        level, content = get_parse_context().block_starts.pop(cls)
+        token = cls(
+            level=level, children=None, position=Position.from_source_lines(lines)
         )
+        return tokenizer.register_spans(token, content, expand_spans)
 
 
 @autodoc
@@ -248,6 +508,8 @@ class SetextHeading(BlockToken):
         default=None, metadata={"doc": "Line position in source text"}
     )
 
+    outline_field = "level"
+
     @classmethod
     def start(cls, line):
         raise NotImplementedError()
@@ -269,6 +531,8 @@ class Quote(BlockToken):
         default=None, metadata={"doc": "Line position in source text"}
     )
 
+    start_chars = ">"
+
     @staticmethod
     def start(line):
         stripped = line.lstrip(" ")
@@ -327,13 +591,15 @@ class Quote(BlockToken):
 
         # block level tokens are parsed here, so that link_definitions
         # in quotes can be recognized before span-level tokenizing.
-        Paragraph.parse_setext = False
+        parse_context = get_parse_context()
+        parse_setext = parse_context.parse_setext
+        parse_context.parse_setext = False
         try:
             child_tokens = tokenizer.tokenize_block(
                 SourceLines(line_buffer, start_line=start_line)
             )
         finally:
-            Paragraph.parse_setext = True
+            parse_context.parse_setext = parse_setext
         return cls(
             children=child_tokens,
             position=Position.from_source_lines(lines, start_line=start_line),
@@ -371,7 +637,8 @@ class Paragraph(BlockToken):
     )
 
     _setext_pattern = re.compile(r" {0,3}(=|-)+ *$")
-    parse_setext = True  # can be disabled by Quote
+    # (also disabled within a Quote, by ``ParseContext.parse_setext``)
+    parse_setext = True
 
     @staticmethod
     def start(line):
@@ -399,6 +666,7 @@ class Paragraph(BlockToken):
     def read(cls, lines, expand_spans=False):
         line_buffer = [next(lines)]
         start_line = lines.lineno
+        parse_setext = cls.parse_setext and get_parse_context().parse_setext
         next_line = lines.peek()
         while not cls.transition(next_line):
             # check if next_line starts List
@@ -417,19 +685,16 @@ class Paragraph(BlockToken):
                 break
 
             # check if we see a setext underline
-            if cls.parse_setext and cls.is_setext_heading(next_line):
+            if parse_setext and cls.is_setext_heading(next_line):
                 line_buffer.append(next(lines))
                 level = 1 if line_buffer.pop().lstrip().startswith("=") else 2
-                children = SpanContainer(
-                    "\n".join([line.strip() for line in line_buffer])
-                )
-                if expand_spans:
-                    children = children.expand()
-                return SetextHeading(
-                    children=children,
+                token = SetextHeading(
+                    children=None,
                     level=level,
                     position=Position.from_source_lines(lines, start_line=start_line),
                 )
+                content = "\n".join([line.strip() for line in line_buffer])
+                return tokenizer.register_spans(token, content, expand_spans)
 
             # check if we have a ThematicBreak (has to be after setext)
             if ThematicBreak.start(next_line):
@@ -440,13 +705,11 @@ class Paragraph(BlockToken):
             next_line = lines.peek()
 
         content = "".join([line.lstrip() for line in line_buffer]).strip()
-        children = SpanContainer(content)
-        if expand_spans:
-            children = children.expand()
-        return cls(
-            children=children,
+        token = cls(
+            children=None,
             position=Position.from_source_lines(lines, start_line=start_line),
         )
+        return tokenizer.register_spans(token, content, expand_spans)
 
 
 @autodoc
@@ -464,6 +727,9 @@ class BlockCode(BlockToken):
         default=None, metadata={"doc": "Line position in source text"}
     )
 
+    start_chars = ""  # only starts on lines indented by 4 or more
+    outline_field = "language"
+
     @staticmethod
     def start(line):
         return line.replace("\t", "    ", 1).startswith("    ")
@@ -530,7 +796,8 @@ class CodeFence(BlockToken):
     # Tildes and backticks cannot be mixed.
     pattern_tick = re.compile(r"^( {0,3})(`{3,}) *([^`\s]*) *([^`]*)$")
     pattern_tilde = re.compile(r"^( {0,3})(~{3,}) *([^~\s]*) *([^~]*)$")
-    _open_info = None
+    start_chars = "`~"
+    outline_field = "language"
 
     @classmethod
     def start(cls, line):
@@ -542,11 +809,12 @@ class CodeFence(BlockToken):
         prepend, leader, lang, arguments = match_obj.groups()
         if leader[0] in lang or leader[0] in line[match_obj.end() :]:
             return False
-        cls._open_info = len(prepend), leader, lang, arguments
+        get_parse_context().block_starts[cls] = len(prepend), leader, lang, arguments
         return True
 
     @classmethod
     def read(cls, lines):
+        indent, leader, lang, arguments = get_parse_context().block_starts.pop(cls)
         start_line = lines.lineno + 1
         next(lines)
         line_buffer = []
@@ -554,17 +822,17 @@ class CodeFence(BlockToken):
             stripped_line = line.lstrip(" ")
             diff = len(line) - len(stripped_line)
             if (
-                stripped_line.startswith(cls._open_info[1])
+                stripped_line.startswith(leader)
                 and len(stripped_line.split(maxsplit=1)) == 1
                 and diff < 4
             ):
                 break
-            if diff > cls._open_info[0]:
-                stripped_line = " " * (diff - cls._open_info[0]) + stripped_line
+            if diff > indent:
+                stripped_line = " " * (diff - indent) + stripped_line
             line_buffer.append(stripped_line)
 
-        language = span_tokens.EscapeSequence.strip(cls._open_info[2])
-        arg_lines = cls._open_info[3].splitlines() or [""]
+        language = span_tokens.EscapeSequence.strip(lang)
+        arg_lines = arguments.splitlines() or [""]
         arguments = span_tokens.EscapeSequence.strip(arg_lines[0])
         children = (span_tokens.RawText("".join(line_buffer)),)
 
@@ -595,6 +863,8 @@ class List(BlockToken):
     )
 
     _pattern = re.compile(r" {0,3}(?:\d{0,9}[.)]|[+\-*])(?:[ \t]*$|[ \t]+)")
+    start_chars = "0123456789.)+-*"
+    outline_field = "start_at"
 
     @classmethod
     def start(cls, line):
@@ -606,14 +876,18 @@ class List(BlockToken):
         leader = None
         next_marker = None
         children = []
+        span_containers = get_parse_context().span_containers
         while True:
+            registered = len(span_containers)
             item = ListItem.read(lines, next_marker)
             next_marker = item.next_marker
             item_leader = item.leader
             if leader is None:
                 leader = item_leader
             elif not cls.same_marker_type(leader, item_leader):
+                # the item is discarded, and re-read as the start of a new list
                 lines.reset()
+                del span_containers[registered:]
                 break
             children.append(item)
             if next_marker is None:
@@ -669,6 +943,7 @@ class ListItem(BlockToken):
     )
 
     _pattern = re.compile(r"\s*(\d{0,9}[.)]|[+\-*])(\s*$|\s+)")
+    outline_field = "leader"
 
     @staticmethod
     def in_continuation(line, prepend):
@@ -812,6 +1087,7 @@ class LinkDefinition(BlockToken):
     )
 
     label_pattern = re.compile(r"[ \n]{0,3}\[(.+?)\]", re.DOTALL)
+    start_chars = "["
 
     @classmethod
     def start(cls, line):
@@ -869,7 +1145,8 @@ class LinkDefinition(BlockToken):
         start = -1
         end = -1
         escaped = False
-        for i, c in enumerate(string[offset:], start=offset):
+        for i in range(offset, len(string)):
+            c = string[i]
             if c == "\\" and not escaped:
                 escaped = True
             elif c == "[" and not escaped:
@@ -894,7 +1171,8 @@ class LinkDefinition(BlockToken):
             return None
         if string[offset] == "<":
             escaped = False
-            for i, c in enumerate(string[offset + 1 :], start=offset + 1):
+            for i in range(offset + 1, len(string)):
+                c = string[i]
                 if c == "\\" and not escaped:
                     escaped = True
                 elif c == " " or c == "\n" or (c == "<" and not escaped):
@@ -907,7 +1185,8 @@ class LinkDefinition(BlockToken):
         else:
             escaped = False
             count = 0
-            for i, c in enumerate(string[offset:], start=offset):
+            for i in range(offset, len(string)):
+                c = string[i]
                 if c == "\\" and not escaped:
                     escaped = True
                 elif c in whitespace:
@@ -928,11 +1207,8 @@ class LinkDefinition(BlockToken):
     @classmethod
     def match_link_title(cls, string, offset):
         new_offset = shift_whitespace(string, offset)
-        if (
-            new_offset == len(string)
-            or "\n" in string[offset:new_offset]
-            and string[new_offset] == "["
-        ):
+        newline = string.find("\n", offset, new_offset) != -1
+        if new_offset == len(string) or newline and string[new_offset] == "[":
             return offset, new_offset, ""
         if string[new_offset] == '"':
             closing = '"'
@@ -940,18 +1216,19 @@ class LinkDefinition(BlockToken):
             closing = "'"
         elif string[new_offset] == "(":
             closing = ")"
-        elif "\n" in string[offset:new_offset]:
+        elif newline:
             return offset, offset, ""
         else:
             return None
         offset = new_offset
         escaped = False
-        for i, c in enumerate(string[offset + 1 :], start=offset + 1):
+        for i in range(offset + 1, len(string)):
+            c = string[i]
             if c == "\\" and not escaped:
                 escaped = True
             elif c == closing and not escaped:
                 new_offset = shift_whitespace(string, i + 1)
-                if "\n" not in string[i + 1 : new_offset]:
+                if string.find("\n", i + 1, new_offset) == -1:
                     return None
                 return offset, new_offset, string[offset + 1 : i]
             elif escaped:
@@ -960,6 +1237,10 @@ class LinkDefinition(BlockToken):
 
     @staticmethod
     def append_link_definitions(matches, position):
+        if matches:
+            get_parse_context().definition_lines.append(
+                (position.line_start, position.line_end)
+            )
         for key, dest, title in matches:
             key = normalize_label(key)
             dest = span_tokens.EscapeSequence.strip(dest.strip())
@@ -976,7 +1257,7 @@ class LinkDefinition(BlockToken):
 
     @staticmethod
     def backtrack(lines, string, offset):
-        lines._index -= string[offset + 1 :].count("\n")
+        lines._index -= string.count("\n", offset + 1)
 
 
 @autodoc
@@ -989,6 +1270,7 @@ class ThematicBreak(BlockToken):
     )
 
     _pattern = re.compile(r" {0,3}(?:([-_*])\s*?)(?:\1\s*?){2,}$")
+    start_chars = "-_*"
 
     @classmethod
     def start(cls, line):
@@ -1012,7 +1294,7 @@ class HTMLBlock(BlockToken):
         default=None, metadata={"doc": "Line position in source text"}
     )
 
-    _end_cond = None
+    start_chars = "<"
     multiblock = re.compile(r"<(script|pre|style)[ >\n]")
     predefined = re.compile(r"<\/?(.+?)(?:\/?>|[ \n])")
     custom_tag = re.compile(
@@ -1024,48 +1306,53 @@ class HTMLBlock(BlockToken):
         stripped = line.lstrip()
         if len(line) - len(stripped) >= 4:
             return False
+        rule, end_cond = cls.match_rule(stripped)
+        if not rule:
+            return False
+        get_parse_context().block_starts[cls] = end_cond
+        return rule
+
+    @classmethod
+    def match_rule(cls, stripped):
+        """Return the HTML block rule (1-7) matching the stripped line (or 0),
+        and the string that ends the block (or None to end at a blank line).
+        """
         # rule 1: <pre>, <script> or <style> tags, allow newlines in block
         match_obj = cls.multiblock.match(stripped)
         if match_obj is not None:
-            cls._end_cond = "</{}>".format(match_obj.group(1).casefold())
-            return 1
+            return 1, "</{}>".format(match_obj.group(1).casefold())
         # rule 2: html comment tags, allow newlines in block
         if stripped.startswith("<!--"):
-            cls._end_cond = "-->"
-            return 2
+            return 2, "-->"
         # rule 3: tags that starts with <?, allow newlines in block
         if stripped.startswith("<?"):
-            cls._end_cond = "?>"
-            return 3
+            return 3, "?>"
         # rule 4: tags that starts with <!, allow newlines in block
         if stripped.startswith("<!") and stripped[2].isupper():
-            cls._end_cond = ">"
-            return 4
+            return 4, ">"
         # rule 5: CDATA declaration, allow newlines in block
         if stripped.startswith("<![CDATA["):
-            cls._end_cond = "]]>"
-            return 5
+            return 5, "]]>"
         # rule 6: predefined tags (see html_token._tags), read until newline
         match_obj = cls.predefined.match(stripped)
         if match_obj is not None and match_obj.group(1).casefold() in span_tokens._tags:
-            cls._end_cond = None
-            return 6
+            return 6, None
         # rule 7: custom tags, read until newline
         match_obj = cls.custom_tag.match(stripped)
         if match_obj is not None:
-            cls._end_cond = None
-            return 7
-        return False
+            return 7, None
+        return 0, None
 
     @classmethod
     def read(cls, lines):
         # note: stop condition can trigger on the starting line
+        end_cond = get_parse_context().block_starts.pop(cls)
         start_line = lines.lineno
         line_buffer = []
         for line in lines:
             line_buffer.append(line)
-            if cls._end_cond is not None:
-                if cls._end_cond in line.casefold():
+            if end_cond is not None:
+                if end_cond in line.casefold():
                     break
             elif line.strip() == "":
                 line_buffer.pop()
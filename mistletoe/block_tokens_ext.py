@@ -16,6 +16,7 @@ from mistletoe.base_elements import (
     SourceLines,
     SpanContainer,
 )
+from mistletoe.block_tokenizer import register_spans
 from mistletoe.parse_context import get_parse_context
 
 
@@ -51,6 +52,7 @@ class Footnote(BlockToken):
     )
 
     label_pattern = re.compile(r"^[ \n]{0,3}\[\^([a-zA-Z0-9#@]+)\]\:\s*(.*)$")
+    start_chars = "["
 
     @classmethod
     def start(cls, line):
@@ -71,6 +73,9 @@ class Footnote(BlockToken):
         token = cls(
             target=target, children=SpanContainer(first_line), position=position
         )
+        get_parse_context().definition_lines.append(
+            (position.line_start, position.line_end)
+        )
         if target not in get_parse_context().foot_definitions:
             get_parse_context().foot_definitions[target] = token
         else:
@@ -111,14 +116,9 @@ class TableCell(BlockToken):
         lineno=0,
         lines: SourceLines = None,
     ):
-        children = SpanContainer(content)
-        if expand_spans:
-            children = children.expand()
-        if lines is not None:
-            position = Position(line_start=lineno, uri=lines.uri, data=lines.metadata)
-        else:
-            position = Position(line_start=lineno)
-        return cls(children=children, align=align, position=position)
+        position = Position.make(lineno, lines=lines)
+        token = cls(children=None, align=align, position=position)
+        return register_spans(token, content, expand_spans)
 
 
 @autodoc
@@ -148,10 +148,7 @@ class TableRow(BlockToken):
             )
             for cell, align in zip_longest(cells, row_align)
         ]
-        if lines is not None:
-            position = Position(line_start=lineno, uri=lines.uri, data=lines.metadata)
-        else:
-            position = Position(line_start=lineno)
+        position = Position.make(lineno, lines=lines)
         return cls(children=children, row_align=row_align, position=position)
 
 
@@ -0,0 +1,402 @@
+"""An opt-in, content-addressed cache of parsed documents."""
+from collections import OrderedDict
+import hashlib
+import os
+import pickle
+import tempfile
+from threading import Lock
+import time
+from typing import List, Optional, Union
+
+from mistletoe import __version__, serialize
+from mistletoe.base_elements import SourceLines
+from mistletoe.block_tokens import Document
+from mistletoe.parse_context import get_parse_context
+
+
+class ParseCache:
+    """A least-recently-used cache of parsed documents, keyed by their content.
+
+    The key is a hash of the source text, together with a fingerprint of the
+    mistletoe version, the current ``ParseContext`` (token sets and the options
+    of ``ParseContext.tree_options``) and the read options.
+    Documents are stored pickled, so that every call returns a new copy of the
+    syntax tree, which renderers can mutate without affecting the cache.
+
+    :param max_entries: the maximum number of documents to store
+    :param max_bytes: the maximum (approximate) total size of the stored documents,
+        or None for no limit
+    """
+
+    def __init__(self, max_entries: int = 128, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = Lock()
+
+    def __repr__(self):
+        return "{0}(entries={1},hits={2},misses={3},evictions={4})".format(
+            self.__class__.__name__,
+            len(self),
+            self.hits,
+            self.misses,
+            self.evictions,
+        )
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        """The total size of the stored (pickled) documents."""
+        return self._nbytes
+
+    def stats(self) -> dict:
+        """Return the cache counters."""
+        return {
+            "entries": len(self),
+            "bytes": self._nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def clear(self):
+        """Remove all stored documents (the counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def read(
+        self, lines: Union[str, List[str]], init_token=Document, **read_kwargs
+    ) -> Document:
+        """Return ``init_token.read(lines, **read_kwargs)``, from the cache if possible.
+
+        On a hit, the link/footnote definitions of the document are also restored
+        to the current ``ParseContext``, as if it had been read.
+        ``SourceLines`` input, and reads with ``reset_definitions=False``,
+        depend on more than the text, and so are never cached.
+        """
+        if isinstance(lines, SourceLines) or not read_kwargs.get(
+            "reset_definitions", True
+        ):
+            return init_token.read(lines, **read_kwargs)
+
+        parse_context = get_parse_context()
+        key = self.make_key(lines, init_token, read_kwargs)
+        data = self._get(key)
+        entry = None
+        if data is not None:
+            try:
+                entry = self._loads(data)
+                token, link_definitions, foot_definitions, foot_references = entry
+            except Exception:  # e.g. a corrupted file
+                entry = None
+                self._discard(key)
+        if entry is not None:
+            parse_context.reset_definitions()
+            parse_context.link_definitions.update(link_definitions)
+            parse_context.foot_definitions.update(foot_definitions)
+            for target in foot_references:
+                parse_context.foot_references.add(target)
+            return token
+
+        token = init_token.read(lines, **read_kwargs)
+        try:
+            data = self._dumps(
+                (
+                    token,
+                    parse_context.link_definitions,
+                    parse_context.foot_definitions,
+                    list(parse_context.foot_references),
+                )
+            )
+        except (pickle.PicklingError, TypeError, AttributeError):
+            # e.g. a custom token storing an un-picklable object
+            return token
+        self._store(key, data)
+        return token
+
+    def render(
+        self,
+        lines: Union[str, List[str]],
+        renderer,
+        init_token=Document,
+        fingerprint: str = "",
+        **read_kwargs
+    ) -> str:
+        """Return ``renderer.render(init_token.read(lines, **read_kwargs))``,
+        from the cache if possible.
+
+        Only the rendered output is stored (not the document).
+
+        :param renderer: the renderer instance (whose parse context is current)
+        :param fingerprint: identifies any options of the renderer,
+            which change its output (its class is already part of the key)
+        """
+        if isinstance(lines, SourceLines) or not read_kwargs.get(
+            "reset_definitions", True
+        ):
+            return renderer.render(init_token.read(lines, **read_kwargs))
+
+        key = self.make_key(
+            lines, init_token, read_kwargs, (_class_path(type(renderer)), fingerprint)
+        )
+        data = self._get(key)
+        if data is not None:
+            try:
+                return data.decode("utf8", "surrogatepass")
+            except UnicodeDecodeError:  # e.g. a corrupted file
+                self._discard(key)
+        output = renderer.render(init_token.read(lines, **read_kwargs))
+        self._store(key, output.encode("utf8", "surrogatepass"))
+        return output
+
+    @staticmethod
+    def make_key(
+        lines: Union[str, List[str]], init_token, read_kwargs: dict, extra=None
+    ) -> str:
+        """Create the cache key for a read.
+
+        :param extra: any other (``repr``-able) data the entry depends on
+        """
+        parse_context = get_parse_context()
+        text = lines if isinstance(lines, str) else "".join(lines)
+        fingerprint = repr(
+            (
+                __version__,
+                _class_path(init_token),
+                [_class_path(t) for t in parse_context.block_tokens],
+                [_class_path(t) for t in parse_context.span_tokens],
+                sorted(parse_context.tree_options().items()),
+                sorted(read_kwargs.items()),
+                extra,
+            )
+        )
+        hasher = hashlib.sha256(text.encode("utf8", "surrogatepass"))
+        hasher.update(fingerprint.encode("utf8"))
+        return hasher.hexdigest()
+
+    @staticmethod
+    def _dumps(entry: tuple) -> bytes:
+        return pickle.dumps(entry, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _loads(data: bytes) -> tuple:
+        return pickle.loads(data)
+
+    def _get(self, key: str) -> Optional[bytes]:
+        """Return the stored data (or None), recording the hit or miss."""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        return data
+
+    def _discard(self, key: str):
+        """Remove an entry, which could not be loaded, and record a miss (not a hit)."""
+        with self._lock:
+            data = self._entries.pop(key, None)
+            if data is not None:
+                self._nbytes -= len(data)
+            self.hits -= 1
+            self.misses += 1
+
+    def _store(self, key: str, data: bytes):
+        if self.max_bytes is not None and len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._nbytes -= len(previous)
+            self._entries[key] = data
+            self._nbytes += len(data)
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._nbytes > self.max_bytes
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= len(evicted)
+                self.evictions += 1
+
+
+def _class_path(cls) -> str:
+    return "{}.{}".format(cls.__module__, cls.__qualname__)
+
+
+class DiskCache(ParseCache):
+    """A persistent ``ParseCache``, storing each entry as a file in a directory,
+    which can be shared between processes and runs (e.g. repeated site builds).
+
+    Entries are written atomically (to a temporary file, then renamed),
+    and the least-recently-used entries are removed once the cache exceeds
+    ``max_entries`` or ``max_bytes``.
+    Entries which cannot be loaded (e.g. corrupted files) are removed,
+    as are temporary files left by interrupted writes, after ``TEMP_FILE_AGE``.
+    Documents are stored with ``mistletoe.serialize``
+    (so their tokens must be importable classes, with serializable attributes).
+
+    :param path: the cache directory (created if it does not exist)
+    :param max_entries: the maximum number of entries to store, or None for no limit
+    :param max_bytes: the maximum total size of the entry files, or None for no limit
+    """
+
+    #: the age (in seconds) after which a temporary file is assumed abandoned
+    TEMP_FILE_AGE = 3600
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = 2 ** 28,
+    ):
+        super().__init__(max_entries=max_entries, max_bytes=max_bytes)
+        self.path = os.fspath(path)
+        os.makedirs(self.path, exist_ok=True)
+        # the total size of the entries, as last scanned (plus any stored since)
+        self._nbytes = None
+        self._nentries = None
+
+    def __repr__(self):
+        return "{0}(path={1!r},hits={2},misses={3},evictions={4})".format(
+            self.__class__.__name__, self.path, self.hits, self.misses, self.evictions
+        )
+
+    def __len__(self):
+        return len(self._scan())
+
+    @property
+    def nbytes(self) -> int:
+        """The total size of the entry files."""
+        return sum(size for _, size, _ in self._scan())
+
+    def stats(self) -> dict:
+        """Return the cache counters."""
+        entries = self._scan()
+        return {
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def clear(self):
+        """Remove all stored entries (the counters are kept)."""
+        with self._lock:
+            for _, _, path in self._scan():
+                _remove(path)
+            self._nbytes = self._nentries = 0
+
+    _dumps = staticmethod(serialize.dumps)
+    _loads = staticmethod(serialize.loads)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.path, key + ".entry")
+
+    def _scan(self) -> list:
+        """Return ``(mtime, size, path)`` for each entry file,
+        removing any stale temporary files.
+        """
+        entries = []
+        stale = time.time() - self.TEMP_FILE_AGE
+        with os.scandir(self.path) as iterator:
+            for entry in iterator:
+                is_temp = entry.name.endswith(".tmp")
+                if not (is_temp or entry.name.endswith(".entry")):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:  # removed by another process
+                    continue
+                if not is_temp:
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                elif stat.st_mtime < stale:
+                    _remove(entry.path)
+        return entries
+
+    def _get(self, key: str) -> Optional[bytes]:
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as handle:
+                data = handle.read()
+            # the modification time records the last use
+            os.utime(path)
+        except OSError:
+            data = None
+        with self._lock:
+            if data is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return data
+
+    def _discard(self, key: str):
+        _remove(self._entry_path(key))
+        with self._lock:
+            # rescanned on the next store
+            self._nbytes = self._nentries = None
+            self.hits -= 1
+            self.misses += 1
+
+    def _store(self, key: str, data: bytes):
+        if self.max_bytes is not None and len(data) > self.max_bytes:
+            return
+        path = self._entry_path(key)
+        handle, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.path)
+        try:
+            with os.fdopen(handle, "wb") as temp:
+                temp.write(data)
+            try:
+                previous = os.stat(path).st_size
+            except FileNotFoundError:
+                previous = None
+            os.replace(temp_path, path)
+        except BaseException:
+            _remove(temp_path)
+            raise
+        with self._lock:
+            if self._nbytes is None:
+                entries = self._scan()
+                self._nbytes = sum(size for _, size, _ in entries)
+                self._nentries = len(entries)
+            elif previous is None:
+                self._nbytes += len(data)
+                self._nentries += 1
+            else:  # overwritten
+                self._nbytes += len(data) - previous
+            if self._over_limit(self._nentries, self._nbytes):
+                self._prune()
+
+    def _over_limit(self, nentries: int, nbytes: int) -> bool:
+        return (self.max_entries is not None and nentries > self.max_entries) or (
+            self.max_bytes is not None and nbytes > self.max_bytes
+        )
+
+    def _prune(self):
+        """Remove the least-recently-used entries, until within the limits."""
+        entries = sorted(self._scan())
+        nbytes = sum(size for _, size, _ in entries)
+        nentries = len(entries)
+        for _, size, path in entries:
+            if not self._over_limit(nentries, nbytes):
+                break
+            _remove(path)
+            nbytes -= size
+            nentries -= 1
+            self.evictions += 1
+        self._nbytes = nbytes
+        self._nentries = nentries
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
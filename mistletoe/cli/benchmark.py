@@ -1,12 +1,16 @@
 #!/usr/bin/env python
 import argparse
 from importlib import import_module
+import json
 import os
 import re
 import sys
 from time import perf_counter
 
-from mistletoe import token_sets, parse_context
+from mistletoe import Document, token_sets, parse_context
+from mistletoe.cli.benchmark_suite import run_pathological, run_suite
+from mistletoe.profiler import Profiler
+from mistletoe.renderers.html import HTMLRenderer
 
 commonmark_context = parse_context.ParseContext(
     find_blocks=token_sets.get_commonmark_block_tokens(),
@@ -102,16 +106,42 @@ def run_all(package_names, text, num_parses):
     return True
 
 
+def run_profile(text, num_parses, context, json_path=None):
+    """Profile mistletoe per token type, printing a table of the slowest phases."""
+    context = context.copy()
+    context.profiler = Profiler()
+    with HTMLRenderer(parse_context=context) as renderer:
+        for i in range(num_parses):
+            renderer.render(Document.read(text))
+    prompt = "Profile of mistletoe ({} parse(s))".format(num_parses)
+    print(prompt)
+    print("=" * len(prompt))
+    print(context.profiler.format_table())
+    if json_path:
+        with open(json_path, "w") as handle:
+            json.dump(context.profiler.to_dict(), handle, indent=2)
+    return True
+
+
 def main(args=None):
     parser = argparse.ArgumentParser(description="Run benchmark test.")
-    parser.add_argument("path", type=str, help="the path to the file to parse")
+    parser.add_argument(
+        "path",
+        type=str,
+        nargs="*",
+        help=(
+            "the path to the file to parse "
+            "(with --suite: files, directories or globs, "
+            "defaulting to test/test_samples/*.md)"
+        ),
+    )
     parser.add_argument(
         "-n",
         "--num-parses",
         metavar="NPARSES",
-        default=1000,
+        default=None,
         type=int,
-        help="The number of parse iterations (default: 1000)",
+        help="The number of parse iterations (default: 1000, or 20 with --suite)",
     )
     parser.add_argument(
         "-p",
@@ -122,14 +152,116 @@ def main(args=None):
         choices=ALL_PACKAGES,
         # metavar="PACKAGE_NAME",
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=(
+            "Report the time per token type and phase for mistletoe "
+            "(or mistletoe:extra if selected), rather than comparing packages."
+        ),
+    )
+    parser.add_argument(
+        "--profile-json",
+        metavar="PATH",
+        default=None,
+        help="Also write the --profile counters to a JSON file.",
+    )
+    suite = parser.add_argument_group("suite", "Benchmark mistletoe on a corpus.")
+    suite.add_argument(
+        "--suite",
+        action="store_true",
+        help="Run the benchmark suite on the path(s), rather than comparing packages.",
+    )
+    suite.add_argument(
+        "--warmup",
+        default=2,
+        type=int,
+        help="The number of untimed runs per document (default: 2)",
+    )
+    suite.add_argument(
+        "--no-synthetic",
+        dest="synthetic",
+        action="store_false",
+        help="Do not add the synthetic, pathological documents.",
+    )
+    suite.add_argument(
+        "--no-memory",
+        dest="memory",
+        action="store_false",
+        help="Do not measure the peak memory (with tracemalloc).",
+    )
+    suite.add_argument(
+        "--compact-positions",
+        action="store_true",
+        help="Parse with ``ParseContext(compact_positions=True)``.",
+    )
+    suite.add_argument(
+        "--pathological",
+        action="store_true",
+        help=(
+            "Check the parse of pathological inputs, with a time limit per input "
+            "(and exit non-zero if any fail), rather than comparing packages."
+        ),
+    )
+    suite.add_argument(
+        "--time-limit",
+        default=1.0,
+        type=float,
+        help="The time limit (in seconds) per pathological input (default: 1.0)",
+    )
+    suite.add_argument(
+        "--json", metavar="PATH", default=None, help="Save the results to JSON."
+    )
+    suite.add_argument(
+        "--baseline",
+        metavar="PATH",
+        default=None,
+        help="Compare against saved results, exiting non-zero on a regression.",
+    )
+    suite.add_argument(
+        "--tolerance",
+        default=0.1,
+        type=float,
+        help="The allowed fractional increase in time (default: 0.1)",
+    )
     args = parser.parse_args(args)
 
-    assert os.path.exists(args.path), "path does not exist"
-    print("Test document: {}".format(os.path.basename(args.path)))
-    print("Test iterations: {}".format(args.num_parses))
-    with open(args.path, "r") as handle:
+    context = (
+        extended_context if "mistletoe:extra" in args.package else commonmark_context
+    )
+    if args.pathological:
+        if not run_pathological(context, time_limit=args.time_limit):
+            sys.exit(1)
+        return True
+    if args.suite:
+        if args.compact_positions:
+            context = context.copy()
+            context.compact_positions = True
+        if not run_suite(
+            args.path,
+            context,
+            iterations=args.num_parses or 20,
+            warmup=args.warmup,
+            synthetic=args.synthetic,
+            memory=args.memory,
+            json_path=args.json,
+            baseline_path=args.baseline,
+            tolerance=args.tolerance,
+        ):
+            sys.exit(1)
+        return True
+
+    assert len(args.path) == 1, "a single path is required"
+    path = args.path[0]
+    num_parses = args.num_parses or 1000
+    assert os.path.exists(path), "path does not exist"
+    print("Test document: {}".format(os.path.basename(path)))
+    print("Test iterations: {}".format(num_parses))
+    with open(path, "r") as handle:
         text = handle.read()
-    return run_all(args.package or ALL_PACKAGES, text, args.num_parses)
+    if args.profile:
+        return run_profile(text, num_parses, context, args.profile_json)
+    return run_all(args.package or ALL_PACKAGES, text, num_parses)
 
 
 if __name__ == "__main__":
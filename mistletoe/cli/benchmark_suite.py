@@ -0,0 +1,448 @@
+"""A corpus based benchmark of mistletoe, used by ``mistletoe-bench --suite``.
+
+Each document is parsed and rendered a number of times (after warm-up runs),
+reporting parse/render time percentiles, throughput and peak memory
+(and the time to standardize the line endings, included in the parse time).
+The results can be saved to JSON, and compared against a saved baseline.
+"""
+import glob
+import json
+import math
+import os
+import platform
+import re
+import tracemalloc
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+
+import mistletoe
+from mistletoe import Document
+from mistletoe.base_elements import SourceLines
+from mistletoe.parse_context import ParseAborted
+from mistletoe.renderers.html import HTMLRenderer
+
+SAMPLES_GLOB = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "test",
+    "test_samples",
+    "*.md",
+)
+
+
+def deep_nesting(depth: int = 40) -> str:
+    """Block quotes and lists, nested ``depth`` levels deep."""
+    quotes = "".join(">" * i + " quote *{}*\n".format(i) for i in range(1, depth + 1))
+    lists = "".join("  " * i + "- item `{}`\n".format(i) for i in range(depth))
+    return quotes + "\n" + lists
+
+
+def emphasis_runs(length: int = 2000) -> str:
+    """Long runs of mixed, mostly unmatched, emphasis delimiters."""
+    return "".join(
+        ["*a **b _c ", "a* b** c_ ", "***a*** "][i % 3] for i in range(length)
+    ) + "\n"
+
+
+def unclosed_brackets(length: int = 300) -> str:
+    """Nested and unclosed link brackets."""
+    return "[" * length + "a" + "]" * length + "\n\n" + "[a](b " * length + "\n"
+
+
+def many_brackets(length: int = 2000) -> str:
+    """A paragraph with thousands of nested, unmatched and matched brackets."""
+    nested = "[" * length + "a" + "]" * length
+    mixed = "".join(
+        ["[a ", "[b] ", "![c](d) ", "[^e] ", "f] "][i % 5] for i in range(length)
+    )
+    return nested + " " + mixed + "\n\n[b]: c\n\n[^e]: f\n"
+
+
+def huge_table(rows: int = 500, columns: int = 8) -> str:
+    """A table with many rows, and inline markup in each cell."""
+    header = "|" + "|".join(" h{} ".format(i) for i in range(columns)) + "|\n"
+    delimiter = "|" + "|".join(" --- " for _ in range(columns)) + "|\n"
+    row = "|" + "|".join(" *a* `b` c " for _ in range(columns)) + "|\n"
+    return header + delimiter + row * rows
+
+
+def crlf_lines(lines: int = 5000) -> str:
+    """Many short lines, ending with ``\\r\\n``."""
+    return "".join(
+        ["# title {}\r\n", "- item *{}*\r\n", "\r\n", "text {}\r\n"][i % 4].format(i)
+        for i in range(lines)
+    )
+
+
+SYNTHETIC = {
+    "synthetic:deep_nesting": deep_nesting,
+    "synthetic:emphasis_runs": emphasis_runs,
+    "synthetic:unclosed_brackets": unclosed_brackets,
+    "synthetic:many_brackets": many_brackets,
+    "synthetic:huge_table": huge_table,
+    "synthetic:crlf_lines": crlf_lines,
+}
+
+
+def pathological_documents(n: int = 10000) -> Dict[str, Tuple[str, str]]:
+    """Return ``name -> (text, regex of the expected HTML)``,
+    for inputs that are slow to parse with a naive inline parser
+    (after the ``pathological_tests.py`` of cmark and commonmark.js).
+
+    :param n: the number of repetitions in each input
+    """
+    # deeper nesting exceeds the recursion limit
+    depth = min(n, 100)
+    return {
+        "nested strong emphasis": (
+            "*a **a " * depth + "b" + " a** a*" * depth,
+            "<p>(<em>a <strong>a ){%d}b( a</strong> a</em>){%d}</p>\n"
+            % (depth, depth),
+        ),
+        "emphasis closers with no openers": (
+            "a_ " * n,
+            "<p>(a_ ){%d}a_</p>\n" % (n - 1),
+        ),
+        "emphasis openers with no closers": (
+            "_a " * n,
+            "<p>(_a ){%d}_a</p>\n" % (n - 1),
+        ),
+        "link closers with no openers": ("a]" * n, r"<p>(a\]){%d}</p>\n" % n),
+        "link openers with no closers": ("[a" * n, r"<p>(\[a){%d}</p>\n" % n),
+        "mismatched openers and closers": (
+            "*a_ " * n,
+            r"<p>(\*a_ ){%d}\*a_</p>\n" % (n - 1),
+        ),
+        "openers and closers multiple of 3": (
+            "a**b" + "c* " * n,
+            r"<p>a\*\*b(c\* ){%d}c\*</p>\n" % (n - 1),
+        ),
+        "link openers and emphasis closers": (
+            "[ a_" * n,
+            r"<p>(\[ a_){%d}</p>\n" % n,
+        ),
+        "pattern [ (]( repeated": (
+            "[ (](" * n,
+            r"<p>(\[ \(\]\(){%d}</p>\n" % n,
+        ),
+        "nested brackets": (
+            "[" * n + "a" + "]" * n,
+            r"<p>\[{%d}a\]{%d}</p>\n" % (n, n),
+        ),
+        "backticks": (
+            "".join("e" + "`" * i for i in range(1, n // 20)),
+            r"<p>[e`]*</p>\n",
+        ),
+        "unclosed links A": ("[a](<b" * n, r"<p>(\[a\]\(&lt;b){%d}</p>\n" % n),
+        "unclosed links B": ("[a](b" * n, r"<p>(\[a\]\(b){%d}</p>\n" % n),
+    }
+
+
+def collect_documents(
+    paths: List[str], synthetic: bool = True, encoding: Optional[str] = None
+) -> List[Tuple[str, str]]:
+    """Return ``(name, text)`` for each document of the corpus.
+
+    :param paths: files, directories (searched recursively for ``*.md``) or globs;
+        if empty, ``test/test_samples/*.md`` are used (when available).
+    :param synthetic: add the synthetic, pathological documents
+    """
+    if not paths:
+        paths = [SAMPLES_GLOB]
+    documents = []
+    for path in paths:
+        if os.path.isdir(path):
+            filenames = sorted(
+                glob.glob(os.path.join(path, "**", "*.md"), recursive=True)
+            )
+        elif glob.has_magic(path):
+            filenames = sorted(glob.glob(path, recursive=True))
+        else:
+            filenames = [path]
+        for filename in filenames:
+            with open(filename, "r", encoding=encoding) as handle:
+                documents.append((os.path.relpath(filename), handle.read()))
+    if synthetic:
+        documents.extend((name, func()) for name, func in SYNTHETIC.items())
+    return documents
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Return the (nearest rank) percentile of some values."""
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, math.ceil(fraction * len(values)) - 1))
+    return values[index]
+
+
+def summarize(values: List[float]) -> dict:
+    return {
+        "min": min(values),
+        "median": percentile(values, 0.5),
+        "p90": percentile(values, 0.9),
+        "p99": percentile(values, 0.99),
+        "mean": sum(values) / len(values),
+    }
+
+
+def benchmark_document(
+    text: str, context, iterations: int = 20, warmup: int = 2, memory: bool = True
+) -> dict:
+    """Time the parse and render of a document
+    (and, separately, the standardization of its line endings).
+
+    :param context: the ``ParseContext`` to use
+    :param iterations: the number of timed runs
+    :param warmup: the number of (untimed) runs beforehand
+    :param memory: also measure the peak memory of a run,
+        and the memory of the syntax tree per token, with ``tracemalloc``
+    """
+    line_times = []
+    parse_times = []
+    render_times = []
+    with HTMLRenderer(parse_context=context) as renderer:
+        for index in range(warmup + iterations):
+            start = perf_counter()
+            SourceLines(text, standardize_ends=True)
+            lines_end = perf_counter()
+            document = Document.read(text)
+            middle = perf_counter()
+            renderer.render(document)
+            end = perf_counter()
+            if index >= warmup:
+                line_times.append(lines_end - start)
+                parse_times.append(middle - lines_end)
+                render_times.append(end - middle)
+        peak_memory = tree_memory = None
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            try:
+                document = Document.read(text)
+                tree_memory = tracemalloc.get_traced_memory()[0]
+                renderer.render(document)
+                peak_memory = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    num_tokens = sum(1 for _ in document.walk())
+    total_times = [p + r for p, r in zip(parse_times, render_times)]
+    size = len(text.encode("utf8"))
+    return {
+        "bytes": size,
+        "lines": summarize(line_times),
+        "parse": summarize(parse_times),
+        "render": summarize(render_times),
+        "total": summarize(total_times),
+        "mb_per_s": size / 1e6 / percentile(total_times, 0.5),
+        "peak_memory": peak_memory,
+        "tokens": num_tokens,
+        "bytes_per_token": tree_memory / num_tokens
+        if tree_memory is not None and num_tokens
+        else None,
+    }
+
+
+def run_benchmarks(
+    documents: List[Tuple[str, str]],
+    context,
+    iterations: int = 20,
+    warmup: int = 2,
+    memory: bool = True,
+) -> dict:
+    """Benchmark each document, and the aggregate over all documents."""
+    results = {}
+    for name, text in documents:
+        results[name] = benchmark_document(text, context, iterations, warmup, memory)
+    size = sum(r["bytes"] for r in results.values())
+    seconds = sum(r["total"]["median"] for r in results.values())
+    return {
+        "mistletoe": mistletoe.__version__,
+        "python": platform.python_version(),
+        "iterations": iterations,
+        "warmup": warmup,
+        "documents": results,
+        "aggregate": {
+            "documents": len(results),
+            "bytes": size,
+            "seconds": seconds,
+            "mb_per_s": size / 1e6 / seconds if seconds else 0.0,
+            "docs_per_s": len(results) / seconds if seconds else 0.0,
+        },
+    }
+
+
+def format_results(results: dict) -> str:
+    """Return the results as a text table."""
+    header = (
+        "document",
+        "KB",
+        "lines ms",
+        "parse ms",
+        "render ms",
+        "p90 ms",
+        "p99 ms",
+        "MB/s",
+        "peak KB",
+        "B/token",
+    )
+    rows = []
+    for name, result in results["documents"].items():
+        peak = result["peak_memory"]
+        per_token = result["bytes_per_token"]
+        rows.append(
+            (
+                name,
+                "{:.1f}".format(result["bytes"] / 1e3),
+                "{:.3f}".format(1e3 * result["lines"]["median"]),
+                "{:.3f}".format(1e3 * result["parse"]["median"]),
+                "{:.3f}".format(1e3 * result["render"]["median"]),
+                "{:.3f}".format(1e3 * result["total"]["p90"]),
+                "{:.3f}".format(1e3 * result["total"]["p99"]),
+                "{:.2f}".format(result["mb_per_s"]),
+                "-" if peak is None else "{:.0f}".format(peak / 1e3),
+                "-" if per_token is None else "{:.0f}".format(per_token),
+            )
+        )
+    widths = [max(len(r[i]) for r in [header] + rows) for i in range(len(header))]
+    lines = []
+    for index, row in enumerate([header] + rows):
+        lines.append(
+            "  ".join(
+                cell.ljust(width) if column == 0 else cell.rjust(width)
+                for column, (cell, width) in enumerate(zip(row, widths))
+            )
+        )
+        if index == 0:
+            lines.append("  ".join("-" * width for width in widths))
+    aggregate = results["aggregate"]
+    lines.append(
+        "{} document(s), {:.1f} KB: {:.2f} MB/s, {:.1f} docs/s (median times)".format(
+            aggregate["documents"],
+            aggregate["bytes"] / 1e3,
+            aggregate["mb_per_s"],
+            aggregate["docs_per_s"],
+        )
+    )
+    return "\n".join(lines)
+
+
+def compare_results(results: dict, baseline: dict, tolerance: float = 0.1) -> List[str]:
+    """Compare median times against a baseline,
+    returning a message for each document (or the aggregate) that regressed.
+
+    :param tolerance: the allowed fractional increase in time
+    """
+    regressions = []
+    previous = baseline.get("documents", {})
+    pairs = [
+        (name, result["total"]["median"], previous[name]["total"]["median"])
+        for name, result in results["documents"].items()
+        if name in previous
+    ]
+    if "aggregate" in baseline:
+        pairs.append(
+            (
+                "(aggregate)",
+                results["aggregate"]["seconds"],
+                baseline["aggregate"]["seconds"],
+            )
+        )
+    for name, current, before in pairs:
+        if before and current > before * (1 + tolerance):
+            regressions.append(
+                "{}: {:.3f} ms -> {:.3f} ms (+{:.0%})".format(
+                    name, 1e3 * before, 1e3 * current, current / before - 1
+                )
+            )
+    return regressions
+
+
+def check_pathological(
+    text: str, pattern: str, context, time_limit: float = 1.0
+) -> Tuple[str, float]:
+    """Parse and render a pathological document,
+    aborting the parse if it takes longer than the time limit.
+
+    :returns: the status (``ok``, ``timeout``, ``failed`` or an exception name),
+        and the time taken
+    """
+    context = context.copy()
+    start = perf_counter()
+    deadline = start + time_limit
+    context.abort = lambda: perf_counter() > deadline
+    try:
+        with HTMLRenderer(parse_context=context) as renderer:
+            output = renderer.render(Document.read(text))
+    except ParseAborted:
+        status = "timeout"
+    except Exception as error:
+        status = error.__class__.__name__
+    else:
+        if perf_counter() > deadline:
+            status = "timeout"
+        elif re.fullmatch(pattern, output):
+            status = "ok"
+        else:
+            status = "failed"
+    return status, perf_counter() - start
+
+
+def run_pathological(context, n: int = 10000, time_limit: float = 1.0) -> bool:
+    """Check each pathological document, printing the results.
+
+    :returns: False if any document failed, or exceeded the time limit
+    """
+    prompt = "Checking pathological documents (time limit {} s) ...".format(
+        time_limit
+    )
+    print(prompt)
+    print("=" * len(prompt))
+    documents = pathological_documents(n)
+    width = max(len(name) for name in documents)
+    success = True
+    for name, (text, pattern) in documents.items():
+        status, seconds = check_pathological(text, pattern, context, time_limit)
+        print(
+            "{}  {:>8.1f} KB  {:>9.3f} ms  {}".format(
+                name.ljust(width), len(text) / 1e3, 1e3 * seconds, status
+            )
+        )
+        success = success and status == "ok"
+    return success
+
+
+def run_suite(
+    paths: List[str],
+    context,
+    iterations: int = 20,
+    warmup: int = 2,
+    synthetic: bool = True,
+    memory: bool = True,
+    json_path: Optional[str] = None,
+    baseline_path: Optional[str] = None,
+    tolerance: float = 0.1,
+) -> bool:
+    """Run the benchmark suite, printing the results.
+
+    :returns: False if any regressions against the baseline were found
+    """
+    documents = collect_documents(paths, synthetic=synthetic)
+    prompt = "Benchmarking {} document(s) ({} iteration(s), {} warm-up) ...".format(
+        len(documents), iterations, warmup
+    )
+    print(prompt)
+    print("=" * len(prompt))
+    results = run_benchmarks(documents, context, iterations, warmup, memory)
+    print(format_results(results))
+    if json_path:
+        with open(json_path, "w") as handle:
+            json.dump(results, handle, indent=2)
+    if not baseline_path:
+        return True
+    with open(baseline_path, "r") as handle:
+        baseline = json.load(handle)
+    regressions = compare_results(results, baseline, tolerance)
+    if regressions:
+        print("Regressions (tolerance {:.0%}):".format(tolerance))
+        for message in regressions:
+            print("  " + message)
+        return False
+    print("No regressions against baseline (tolerance {:.0%})".format(tolerance))
+    return True
@@ -1,3 +1,5 @@
+import os
+import pathlib
 import sys
 import mistletoe
 from argparse import ArgumentParser
@@ -8,32 +10,162 @@ version_str = "mistletoe [version {}]".format(mistletoe.__version__)
 
 def main(args=None):
     namespace = parse_args(args)
-    if namespace.filenames:
-        convert(namespace.filenames, namespace.renderer, namespace.front_matter)
+    if namespace.filenames and (namespace.jobs != 1 or namespace.output_dir):
+        convert_many(
+            namespace.filenames,
+            namespace.renderer,
+            namespace.front_matter,
+            jobs=namespace.jobs,
+            output=namespace.output,
+            output_dir=namespace.output_dir,
+            output_ext=namespace.output_ext,
+            cache_dir=namespace.cache_dir,
+        )
+    elif namespace.filenames:
+        convert(
+            namespace.filenames,
+            namespace.renderer,
+            namespace.front_matter,
+            output=namespace.output,
+            cache_dir=namespace.cache_dir,
+        )
     else:
         interactive(namespace.renderer)
 
 
-def convert(filenames, renderer, front_matter=False):
-    for filename in filenames:
-        convert_file(filename, renderer, front_matter)
+def convert(filenames, renderer, front_matter=False, output=None, cache_dir=None):
+    """Convert files, writing the outputs to stdout, or the ``output`` file.
 
+    :param cache_dir: a directory to cache the outputs in (see ``DiskCache``)
+    """
+    cache = None
+    if cache_dir is not None:
+        from mistletoe.cache import DiskCache
 
-def convert_file(filename, renderer, front_matter=False):
+        cache = DiskCache(cache_dir)
+    if output is None:
+        for filename in filenames:
+            convert_file(filename, renderer, front_matter, cache=cache)
+        return
+    try:
+        sink = open(output, "w", encoding="utf-8")
+    except OSError:
+        sys.exit('Cannot open output file "{}".'.format(output))
+    with sink:
+        for filename in filenames:
+            convert_file(filename, renderer, front_matter, sink=sink, cache=cache)
+
+
+def convert_file(filename, renderer, front_matter=False, sink=None, cache=None):
     """
-    Parse a Markdown file and dump the output to stdout.
+    Parse a Markdown file and write the output to ``sink`` (stdout if None),
+    as it is rendered, or from the ``cache`` (a ``ParseCache``) if given.
     """
     read_kwargs = {}
     if front_matter:
         read_kwargs["front_matter"] = True
     try:
         with open(filename, "r") as fin:
-            rendered = mistletoe.markdown(fin, renderer, read_kwargs=read_kwargs)
-            print(rendered, end="")
+            if cache is None:
+                mistletoe.markdown(
+                    fin, renderer, read_kwargs=read_kwargs, sink=sink or sys.stdout
+                )
+                return
+            text = fin.read()
+        with renderer() as instance:
+            (sink or sys.stdout).write(cache.render(text, instance, **read_kwargs))
     except OSError:
         sys.exit('Cannot open file "{}".'.format(filename))
 
 
+def convert_many(
+    filenames,
+    renderer,
+    front_matter=False,
+    jobs=1,
+    output_dir=None,
+    output_ext=".html",
+    cache_dir=None,
+    output=None,
+):
+    """
+    Parse multiple Markdown files (in parallel if ``jobs != 1``),
+    and dump the outputs to ``output_dir``, or (in order) to the ``output`` file,
+    or stdout if both are None.
+    Errors are reported for each file, and exit non-zero after all files.
+    """
+    from mistletoe.batch import render_many
+
+    read_kwargs = {}
+    if front_matter:
+        read_kwargs["front_matter"] = True
+    sources = [pathlib.Path(filename) for filename in filenames]
+    if output_dir is not None:
+        output_paths = _output_paths(sources, output_dir, output_ext)
+    sink = sys.stdout
+    if output is not None:
+        try:
+            sink = open(output, "w", encoding="utf-8")
+        except OSError:
+            sys.exit('Cannot open output file "{}".'.format(output))
+    failed = False
+    try:
+        for result in render_many(
+            sources,
+            renderer,
+            jobs=jobs,
+            read_kwargs=read_kwargs,
+            cache_dir=cache_dir,
+        ):
+            if result.error is not None:
+                failed = True
+                print(
+                    'Failed to convert "{}":\n{}'.format(result.source, result.error),
+                    file=sys.stderr,
+                )
+            elif output_dir is None:
+                sink.write(result.output)
+            else:
+                _write_output(output_paths[result.index], result.output)
+    finally:
+        if output is not None:
+            sink.close()
+    if failed:
+        sys.exit(1)
+
+
+def _output_paths(sources, output_dir, output_ext):
+    """Return the output path of each source: its path relative to the common
+    directory of all sources, within ``output_dir``, with a new suffix.
+
+    Exits if two sources would be written to the same path.
+    """
+    paths = [os.path.abspath(str(source)) for source in sources]
+    try:
+        root = os.path.commonpath([os.path.dirname(path) for path in paths])
+    except ValueError:  # e.g. on different drives
+        sys.exit("[error] cannot write files from different drives to --output-dir.")
+    outputs = {}
+    for source, path in zip(sources, paths):
+        output = pathlib.Path(output_dir).joinpath(os.path.relpath(path, root))
+        output = output.with_suffix(output_ext)
+        if output in outputs:
+            sys.exit(
+                '[error] "{}" and "{}" would both be written to "{}".'.format(
+                    outputs[output], source, output
+                )
+            )
+        outputs[output] = source
+    return list(outputs)
+
+
+def _write_output(path, output):
+    """Write an output to ``path``, creating its parent directories."""
+    os.makedirs(str(path.parent), exist_ok=True)
+    with open(str(path), "w", encoding="utf-8") as handle:
+        handle.write(output)
+
+
 def interactive(renderer):
     """
     Parse user input, dump to stdout, rinse and repeat.
@@ -70,10 +202,43 @@ def parse_args(args):
     parser.add_argument(
         "-f", "--front-matter", action="store_true", help="parse front matter block"
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of processes used to convert files (0 for all CPUs)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=None,
+        help="write the converted files to this file, instead of stdout",
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=None,
+        help="write each converted file to this directory, instead of stdout "
+        "(at its path relative to the common directory of the files)",
+    )
+    parser.add_argument(
+        "--output-ext",
+        default=".html",
+        help="the file extension used in --output-dir (default: .html)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="cache the converted outputs in this directory, "
+        "to skip unchanged files in later runs",
+    )
     parser.add_argument(
         "filenames", nargs="*", help="specify an optional list of files to convert"
     )
-    return parser.parse_args(args)
+    namespace = parser.parse_args(args)
+    if namespace.output is not None and namespace.output_dir is not None:
+        parser.error("argument -o/--output: not allowed with argument --output-dir")
+    return namespace
 
 
 def _import(arg):
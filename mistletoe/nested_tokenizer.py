@@ -1,8 +1,9 @@
 """Tokenize nested span tokens."""
+from bisect import bisect_left
 import re
 
 from mistletoe.span_tokens_ext import Math, Strikethrough, FootReference
-from mistletoe.parse_context import get_parse_context
+from mistletoe.parse_context import get_parse_context, ParseAborted
 
 
 whitespace = {" ", "\t", "\n", "\x0b", "\x0c", "\r"}
@@ -71,15 +72,26 @@ punctuation = {
     "}",
     "~",
 }
+# the maximum nesting of parentheses in a link destination
+MAX_DEST_PARENS = 32
 code_pattern = re.compile(r"(?<!\\|`)(?:\\\\)*(`+)(?!`)(.+?)(?<!`)\1(?!`)", re.DOTALL)
+backtick_pattern = re.compile(r"`+")
+# a placeholder for a match that has not been searched for
+_SEARCH = object()
+# the number of characters scanned between calls to ``ParseContext.abort``
+ABORT_INTERVAL = 4096
 
 
 def find_nested_tokenizer(string):
     get_parse_context().nesting_matches = {}  # reset nesting matches
     if not string:
         return []
-    delimiters = []
+    delimiters = DelimiterList()  # emphasis delimiter runs
+    brackets = []  # link/image openers
     matches = []
+    code_spans = CodeSpans(string)
+    # positions of link titles, after which there is no closing character
+    unclosed = {}
     escaped = False  # escaped denotes that the last cursor position had `\`
     in_delimiter_run = None  # delimiter runs are sequences of `*` or `_`
     in_image = False
@@ -90,11 +102,18 @@ def find_nested_tokenizer(string):
     has_strikethrough = Strikethrough in get_parse_context().span_tokens
     has_footrefs = FootReference in get_parse_context().span_tokens
     code_match, strike_match, math_match = advance_searches(
-        string, 0, has_strikethrough, has_math
+        string, 0, has_strikethrough, has_math, code_spans
     )
+    abort = get_parse_context().abort
+    next_abort = ABORT_INTERVAL
 
     while i < len(string):
 
+        if abort is not None and i >= next_abort:
+            next_abort = i + ABORT_INTERVAL
+            if abort():
+                raise ParseAborted("at character {}".format(i))
+
         if strike_match is not None and i == strike_match.start():
             get_parse_context().nesting_matches.setdefault("Strikethrough", []).append(
                 strike_match
@@ -113,7 +132,12 @@ def find_nested_tokenizer(string):
             )
             i = code_match.end()
             code_match, strike_match, math_match = advance_searches(
-                string, i, has_strikethrough, has_math
+                string,
+                i,
+                has_strikethrough,
+                has_math,
+                code_spans,
+                (code_match, strike_match, math_match),
             )
             continue
 
@@ -128,7 +152,12 @@ def find_nested_tokenizer(string):
             )
             i = math_match.end()
             code_match, strike_match, math_match = advance_searches(
-                string, i, has_strikethrough, has_math
+                string,
+                i,
+                has_strikethrough,
+                has_math,
+                code_spans,
+                (code_match, strike_match, math_match),
             )
             continue
 
@@ -154,17 +183,30 @@ def find_nested_tokenizer(string):
                     in_image = False
                     continue
                 if not in_image:
-                    delimiters.append(Delimiter(i, i + 1, string))
+                    bracket = Delimiter(i, i + 1, string)
                 else:
-                    delimiters.append(Delimiter(i - 1, i + 1, string))
+                    bracket = Delimiter(i - 1, i + 1, string)
                     in_image = False
+                # the bottom of the emphasis delimiters, within the link text
+                bracket.previous = delimiters.tail
+                brackets.append(bracket)
             elif c == "!":
                 in_image = True
             elif c == "]":
-                i = find_link_image(string, i, delimiters, matches)
-                code_match, strike_match, math_match = advance_searches(
-                    string, i, has_strikethrough, has_math
+                end = find_link_image(
+                    string, i, delimiters, brackets, matches, unclosed
                 )
+                if end != i:
+                    # only re-search if we jumped to the end of a link/image
+                    i = end
+                    code_match, strike_match, math_match = advance_searches(
+                        string,
+                        i,
+                        has_strikethrough,
+                        has_math,
+                        code_spans,
+                        (code_match, strike_match, math_match),
+                    )
             elif in_image:
                 in_image = False
         else:
@@ -172,112 +214,143 @@ def find_nested_tokenizer(string):
         i += 1
     if in_delimiter_run:
         delimiters.append(Delimiter(start, i, string))
-    process_emphasis(string, None, delimiters, matches)
+    process_emphasis(string, None, delimiters, matches, abort)
     return matches
 
 
-def advance_searches(string, pos=0, has_strikethrough=False, has_math=False):
+def advance_searches(
+    string,
+    pos=0,
+    has_strikethrough=False,
+    has_math=False,
+    code_spans=None,
+    previous=None,
+):
     """
     These tokens are special cases,
     because they start and end with the same character
     therefore, we need to re-search as we progress, to reset the opening character
+
+    :param previous: the previous (code, strikethrough, math) matches;
+        only those starting before ``pos`` are searched for again,
+        since a search from ``pos`` would find the same match (or None)
     """
-    code_match = code_pattern.search(string, pos)
-    strike_match = math_match = None
-    if has_strikethrough:
+    if previous is None:
+        code_match = strike_match = math_match = _SEARCH
+    else:
+        code_match, strike_match, math_match = previous
+    if is_stale(code_match, pos):
+        if code_spans is None:
+            code_match = code_pattern.search(string, pos)
+        else:
+            code_match = code_spans.search(pos)
+    if not has_strikethrough:
+        strike_match = None
+    elif is_stale(strike_match, pos):
         strike_match = Strikethrough.pattern.search(string, pos)
-    if has_math:
+    if not has_math:
+        math_match = None
+    elif is_stale(math_match, pos):
         math_match = Math.pattern.search(string, pos)
     return code_match, strike_match, math_match
 
 
+def is_stale(match, pos):
+    return match is _SEARCH or (match is not None and match.start() < pos)
+
+
 def match_foot_ref(string, offset):
-    match = FootReference.pattern.match(string[offset:])
+    match = FootReference.pattern.match(string, offset)
     if not match:
         return
     if match.group(1) in get_parse_context().foot_definitions:
-        return MatchObj(offset, match.end() + offset, (-1, -1, match.group(1)))
+        return MatchObj(
+            offset, match.end(), (match.start(1), match.end(1)), string=string
+        )
 
 
-def find_link_image(string, offset, delimiters, matches):
-    i = len(delimiters) - 1
-    for delimiter in delimiters[::-1]:
-        # found a link/image delimiter
-        if delimiter.type in ("[", "!["):
-            # not active, remove delimiter
-            if not delimiter.active:
-                delimiters.remove(delimiter)
-                return offset
-            match = match_link_image(string, offset, delimiter)
-            # found match
-            if match:
-                # parse for emphasis
-                process_emphasis(string, i, delimiters, matches)
-                # append current match
-                matches.append(match)
-                # if match is a link, set all previous links to be inactive
-                if delimiter.type == "[":
-                    deactivate_delimiters(delimiters, i, "[")
-                # shift index till end of match
-                return match.end() - 1
-            # no match, remove delimiter
-            delimiters.remove(delimiter)
-            return offset
-        i -= 1
+def find_link_image(string, offset, delimiters, brackets, matches, unclosed=None):
     # no link/image delimiter
-    return offset
-
-
-def process_emphasis(string, stack_bottom, delimiters, matches):
-    star_bottom = stack_bottom
-    underscore_bottom = stack_bottom
-    curr_pos = next_closer(stack_bottom, delimiters)
-    while curr_pos is not None:
-        closer = delimiters[curr_pos]
-        bottom = star_bottom if closer.type[0] == "*" else underscore_bottom
-        open_pos = matching_opener(curr_pos, delimiters, bottom)
-        if open_pos is not None:
-            opener = delimiters[open_pos]
+    if not brackets:
+        return offset
+    # the delimiter is removed if not active, or there is no match
+    bracket = brackets.pop()
+    if not bracket.active:
+        return offset
+    match = match_link_image(string, offset, bracket, unclosed)
+    if not match:
+        return offset
+    # parse for emphasis
+    process_emphasis(string, bracket.previous, delimiters, matches)
+    # append current match
+    matches.append(match)
+    # if match is a link, set all previous links to be inactive
+    if bracket.type == "[":
+        deactivate_delimiters(brackets, len(brackets), "[")
+    # shift index till end of match
+    return match.end() - 1
+
+
+def process_emphasis(string, stack_bottom, delimiters, matches, abort=None):
+    """Match the emphasis delimiters after ``stack_bottom`` (or all if None),
+    then remove them from the list.
+
+    This follows the CommonMark reference implementation, recording the lowest
+    delimiter to search for an opener, for each kind of closer
+    (character, can open, run length modulo 3), so that the time is linear.
+
+    :param abort: called every ``ABORT_INTERVAL`` closers (see ``ParseContext.abort``)
+    """
+    openers_bottom = {}
+    closer = delimiters.head if stack_bottom is None else stack_bottom.next
+    count = 0
+    while closer is not None:
+        if abort is not None:
+            count += 1
+            if count % ABORT_INTERVAL == 0 and abort():
+                raise ParseAborted("while processing emphasis")
+        if not closer.close:
+            closer = closer.next
+            continue
+        key = (closer.type[0], closer.open, closer.length % 3)
+        bottom = openers_bottom.get(key, stack_bottom)
+        opener = closer.previous
+        while opener is not bottom and opener is not stack_bottom:
+            if opener.open and opener.closed_by(closer):
+                break
+            opener = opener.previous
+        else:
+            opener = None
+        if opener is not None:
             n = 2 if closer.number >= 2 and opener.number >= 2 else 1
             start = opener.end - n
             end = closer.start + n
-            match = MatchObj(
-                start, end, (start + n, end - n, string[start + n : end - n])
-            )
+            match = MatchObj(start, end, (start + n, end - n), string=string)
             match.type = "Strong" if n == 2 else "Emphasis"
             matches.append(match)
             # remove all delimiters in between
-            del delimiters[open_pos + 1 : curr_pos]
-            curr_pos -= curr_pos - open_pos - 1
+            opener.next = closer
+            closer.previous = opener
             # remove appropriate number of chars from delimiters
             if not opener.remove(n, left=False):
                 delimiters.remove(opener)
-                curr_pos -= 1
             if not closer.remove(n, left=True):
                 delimiters.remove(closer)
-                curr_pos -= 1
-            if curr_pos < 0:
-                curr_pos = 0
+                closer = closer.next
         else:
-            bottom = curr_pos - 1 if curr_pos > 1 else None
-            if closer.type[0] == "*":
-                star_bottom = bottom
-            else:
-                underscore_bottom = bottom
+            # no opener for this kind of closer, down to here
+            openers_bottom[key] = closer.previous
             if not closer.open:
                 delimiters.remove(closer)
-            else:
-                curr_pos += 1
-        curr_pos = next_closer(curr_pos, delimiters)
-    del delimiters[stack_bottom:]
+            closer = closer.next
+    delimiters.truncate(stack_bottom)
 
 
-def match_link_image(string, offset, delimiter):
+def match_link_image(string, offset, delimiter, unclosed=None):
     image = delimiter.type == "!["
     start = delimiter.start
     text_start = start + delimiter.number
     text_end = offset
-    text = string[text_start:text_end]
     # inline link
     if follows(string, offset, "("):
         # link destination
@@ -285,7 +358,7 @@ def match_link_image(string, offset, delimiter):
         if match_info is not None:
             dest_start, dest_end, dest = match_info
             # link title
-            match_info = match_link_title(string, dest_end)
+            match_info = match_link_title(string, dest_end, unclosed)
             if match_info is not None:
                 title_start, title_end, title = match_info
                 # assert closing paren
@@ -295,9 +368,10 @@ def match_link_image(string, offset, delimiter):
                     match = MatchObj(
                         start,
                         end,
-                        (text_start, text_end, text),
+                        (text_start, text_end),
                         (dest_start, dest_end, dest),
                         (title_start, title_end, title),
+                        string=string,
                     )
                     match.type = "Link" if not image else "Image"
                     return match
@@ -312,13 +386,14 @@ def match_link_image(string, offset, delimiter):
             match = MatchObj(
                 start,
                 end,
-                (text_start, text_end, text),
+                (text_start, text_end),
                 (-1, -1, dest),
                 (-1, -1, title),
+                string=string,
             )
             match.type = "Link" if not image else "Image"
             return match
-        ref = is_link_label(text)
+        ref = is_link_label(string, text_start, text_end)
         if ref:
             # collapsed link definition reference: [foo][]
             # https://spec.commonmark.org/0.29/#collapsed-reference-link
@@ -328,21 +403,27 @@ def match_link_image(string, offset, delimiter):
                 match = MatchObj(
                     start,
                     end,
-                    (text_start, text_end, text),
+                    (text_start, text_end),
                     (-1, -1, dest),
                     (-1, -1, title),
+                    string=string,
                 )
                 match.type = "Link" if not image else "Image"
                 return match
         return None
     # shortcut link definition reference: [foo]
     # https://spec.commonmark.org/0.29/#shortcut-reference-link
-    ref = is_link_label(text)
+    ref = is_link_label(string, text_start, text_end)
     if ref:
         dest, title = ref
         end = offset + 1
         match = MatchObj(
-            start, end, (text_start, text_end, text), (-1, -1, dest), (-1, -1, title)
+            start,
+            end,
+            (text_start, text_end),
+            (-1, -1, dest),
+            (-1, -1, title),
+            string=string,
         )
         match.type = "Link" if not image else "Image"
         return match
@@ -351,9 +432,12 @@ def match_link_image(string, offset, delimiter):
 
 def match_link_dest(string, offset):
     offset = shift_whitespace(string, offset + 1)
+    if offset >= len(string):
+        return None
     if string[offset] == "<":
         escaped = False
-        for i, c in enumerate(string[offset + 1 :], start=offset + 1):
+        for i in range(offset + 1, len(string)):
+            c = string[i]
             if c == "\\" and not escaped:
                 escaped = True
             elif c == " " or c == "\n" or (c == "<" and not escaped):
@@ -366,7 +450,8 @@ def match_link_dest(string, offset):
     else:
         escaped = False
         count = 1
-        for i, c in enumerate(string[offset:], start=offset):
+        for i in range(offset, len(string)):
+            c = string[i]
             if c == "\\" and not escaped:
                 escaped = True
             elif c in whitespace:
@@ -374,6 +459,10 @@ def match_link_dest(string, offset):
             elif not escaped:
                 if c == "(":
                     count += 1
+                    # limit the nesting of parentheses, as allowed by the spec,
+                    # so that unclosed destinations are not scanned to the end
+                    if count > MAX_DEST_PARENS + 1:
+                        return None
                 elif c == ")":
                     count -= 1
             elif is_control_char(c):
@@ -385,8 +474,15 @@ def match_link_dest(string, offset):
         return None
 
 
-def match_link_title(string, offset):
+def match_link_title(string, offset, unclosed=None):
+    """Match a link title, starting from ``offset``.
+
+    :param unclosed: a dict to record, per closing character, the position after
+        which it does not occur (so that the rest of the string is scanned once)
+    """
     offset = shift_whitespace(string, offset)
+    if offset >= len(string):
+        return None
     if string[offset] == ")":
         return offset, offset, ""
     if string[offset] == '"':
@@ -397,14 +493,19 @@ def match_link_title(string, offset):
         closing = ")"
     else:
         return None
+    if unclosed is not None and offset >= unclosed.get(closing, len(string)):
+        return None
     escaped = False
-    for i, c in enumerate(string[offset + 1 :], start=offset + 1):
+    for i in range(offset + 1, len(string)):
+        c = string[i]
         if c == "\\" and not escaped:
             escaped = True
         elif c == closing and not escaped:
             return offset, i + 1, string[offset + 1 : i]
         elif escaped:
             escaped = False
+    if unclosed is not None:
+        unclosed[closing] = offset
     return None
 
 
@@ -412,7 +513,8 @@ def match_link_label(string, offset):
     start = -1
     end = -1
     escaped = False
-    for i, c in enumerate(string[offset:], start=offset):
+    for i in range(offset, len(string)):
+        c = string[i]
         if c == "\\" and not escaped:
             escaped = True
         elif c == "[" and not escaped:
@@ -436,18 +538,23 @@ def match_link_label(string, offset):
     return None
 
 
-def is_link_label(text):
+def is_link_label(text, start=0, end=None):
+    """Return the link definition of ``text[start:end]``, if it is a link label."""
+    if end is None:
+        end = len(text)
     escaped = False
-    for c in text:
+    for i in range(start, end):
+        c = text[i]
         if c == "\\" and not escaped:
             escaped = True
         elif (c == "[" or c == "]") and not escaped:
             return None
         elif escaped:
             escaped = False
-    if text.strip() != "":
+    label = text[start:end]
+    if label.strip() != "":
         link_definitions = get_parse_context().link_definitions
-        return link_definitions.get(normalize_label(text), None)
+        return link_definitions.get(normalize_label(label), None)
     return None
 
 
@@ -455,28 +562,6 @@ def normalize_label(text):
     return " ".join(text.split()).casefold()
 
 
-def next_closer(curr_pos, delimiters):
-    for i, delimiter in enumerate(delimiters[curr_pos:], start=curr_pos or 0):
-        if hasattr(delimiter, "close") and delimiter.close:
-            return i
-    return None
-
-
-def matching_opener(curr_pos, delimiters, bottom):
-    if curr_pos > 0:
-        curr_delimiter = delimiters[curr_pos]
-        index = curr_pos - 1
-        for delimiter in delimiters[curr_pos - 1 : bottom : -1]:
-            if (
-                hasattr(delimiter, "open")
-                and delimiter.open
-                and delimiter.closed_by(curr_delimiter)
-            ):
-                return index
-            index -= 1
-    return None
-
-
 def is_opener(start, end, string):
     if string[start] == "*":
         return is_left_delimiter(start, end, string)
@@ -530,28 +615,54 @@ def follows(string, index, char):
 
 
 def shift_whitespace(string, index):
-    for i, c in enumerate(string[index:], start=index):
-        if c not in whitespace:
-            return i
-    return len(string)
+    length = len(string)
+    while index < length and string[index] in whitespace:
+        index += 1
+    return index
 
 
 def deactivate_delimiters(delimiters, index, delimiter_type):
-    for delimiter in delimiters[:index]:
+    for i in range(index - 1, -1, -1):
+        delimiter = delimiters[i]
         if delimiter.type == delimiter_type:
+            if not delimiter.active:
+                # all those before were deactivated with it
+                break
             delimiter.active = False
 
 
 class Delimiter:
+    """A delimiter run of ``*`` or ``_``, or a link/image opener (``[`` or ``![``).
+
+    ``length`` is the length of the original run, and ``previous``/``next``
+    link the delimiter into a ``DelimiterList``.
+    """
+
+    __slots__ = (
+        "type",
+        "number",
+        "length",
+        "active",
+        "start",
+        "end",
+        "open",
+        "close",
+        "previous",
+        "next",
+    )
+
     def __init__(self, start, end, string):
         self.type = string[start:end]
-        self.number = end - start
+        self.number = self.length = end - start
         self.active = True
         self.start = start
         self.end = end
+        self.previous = self.next = None
         if self.type.startswith(("*", "_")):
             self.open = is_opener(start, end, string)
             self.close = is_closer(start, end, string)
+        else:
+            self.open = self.close = False
 
     def remove(self, n, left=True):
         if self.number - n == 0:
@@ -563,14 +674,16 @@ class Delimiter:
             return True
         self.end = self.end - n
         self.number = self.end - self.start
-        self.type = self.type[:n]
+        self.type = self.type[: self.number]
         return True
 
     def closed_by(self, other):
+        # the "rule of 3" applies to the lengths of the original runs
         return not (
             self.type[0] != other.type[0]
             or (self.open and self.close or other.open and other.close)
-            and (self.number + other.number) % 3 == 0
+            and other.length % 3 != 0
+            and (self.length + other.length) % 3 == 0
         )
 
     def __repr__(self):
@@ -581,13 +694,118 @@ class Delimiter:
         )
 
 
+class DelimiterList:
+    """A doubly linked list of delimiters,
+    for constant time removal from the middle of the list.
+    """
+
+    __slots__ = ("head", "tail")
+
+    def __init__(self):
+        self.head = self.tail = None
+
+    def __iter__(self):
+        delimiter = self.head
+        while delimiter is not None:
+            yield delimiter
+            delimiter = delimiter.next
+
+    def append(self, delimiter):
+        delimiter.previous = self.tail
+        delimiter.next = None
+        if self.tail is None:
+            self.head = delimiter
+        else:
+            self.tail.next = delimiter
+        self.tail = delimiter
+
+    def remove(self, delimiter):
+        """Remove a delimiter (which keeps its own links, to continue iteration)."""
+        if delimiter.previous is None:
+            self.head = delimiter.next
+        else:
+            delimiter.previous.next = delimiter.next
+        if delimiter.next is None:
+            self.tail = delimiter.previous
+        else:
+            delimiter.next.previous = delimiter.previous
+
+    def truncate(self, delimiter):
+        """Remove all delimiters after ``delimiter`` (or all if None)."""
+        if delimiter is None:
+            self.head = self.tail = None
+        else:
+            delimiter.next = None
+            self.tail = delimiter
+
+
+class CodeSpans:
+    """Find code spans, as ``code_pattern.search(string, pos)``,
+    but indexing the backtick runs of the string in a single pass
+    (the regex is quadratic for many runs, without a closing run of the same length).
+    """
+
+    __slots__ = ("string", "starts", "spans")
+
+    def __init__(self, string):
+        self.string = string
+        runs = [match.span() for match in backtick_pattern.finditer(string)]
+        # the starts of the matches (from any escaping backslashes)
+        self.starts = []
+        # (opening run, closing run) of each match
+        self.spans = []
+        closers = {}
+        # the first closing run (of the same length) after each run
+        closing = [None] * len(runs)
+        for index in range(len(runs) - 1, -1, -1):
+            length = runs[index][1] - runs[index][0]
+            closing[index] = closers.get(length)
+            closers[length] = runs[index]
+        for index, (start, end) in enumerate(runs):
+            if closing[index] is None:
+                continue
+            match_start = start
+            while match_start > 0 and string[match_start - 1] == "\\":
+                match_start -= 1
+            # an even number of backslashes, not preceded by a backtick
+            if (start - match_start) % 2 or (
+                match_start != start
+                and match_start > 0
+                and string[match_start - 1] == "`"
+            ):
+                continue
+            self.starts.append(match_start)
+            self.spans.append(((start, end), closing[index]))
+
+    def search(self, pos=0):
+        """Return the first code span match, starting at or after ``pos``."""
+        index = bisect_left(self.starts, pos)
+        if index == len(self.starts):
+            return None
+        (open_start, open_end), (close_start, close_end) = self.spans[index]
+        return MatchObj(
+            self.starts[index],
+            close_end,
+            (open_start, open_end),
+            (open_end, close_start),
+            string=self.string,
+        )
+
+
 class MatchObj:
-    """A mock of ``re.Match``, to parse to span tokens ``read()`` method."""
+    """A mock of ``re.Match``, to parse to span tokens ``read()`` method.
+
+    Each field is ``(start, end, text)``, or ``(start, end)`` for text
+    within ``string``, which is only sliced when requested by ``group``.
+    """
+
+    __slots__ = ("_start", "_end", "fields", "string", "type")
 
-    def __init__(self, start, end, *fields):
+    def __init__(self, start, end, *fields, string=None):
         self._start = start
         self._end = end
         self.fields = fields
+        self.string = string
 
     def start(self, n=0):
         if n == 0:
@@ -601,8 +819,11 @@ class MatchObj:
 
     def group(self, n=0):
         if n == 0:
-            return "".join([field[2] for field in self.fields])
-        return self.fields[n - 1][2]
+            return "".join([self.group(i) for i in range(1, len(self.fields) + 1)])
+        field = self.fields[n - 1]
+        if len(field) == 2:
+            return self.string[field[0] : field[1]]
+        return field[2]
 
     def __repr__(self):
         return "<MatchObj fields={} start={} end={}>".format(
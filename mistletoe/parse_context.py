@@ -5,11 +5,13 @@ are not changed by different threads.
 """
 from collections import OrderedDict
 from collections.abc import MutableSet
-from copy import deepcopy
+from copy import copy, deepcopy
 from importlib import import_module
 import logging
 from threading import local
-from typing import Optional
+from typing import Callable, Optional
+
+import attr
 
 THREAD = local()
 
@@ -17,10 +19,16 @@ LOGGER = logging.getLogger(__name__)
 
 
 class OrderedSet(MutableSet):
-    """An ordered set, optimized for `a in set` tests"""
+    """An ordered set, optimized for `a in set` tests.
+
+    Lookup tables derived from the set (see ``cached``)
+    are discarded whenever the set is mutated.
+    Copies of the set share these tables, until either is mutated.
+    """
 
-    def __init__(self, iterable=()):
+    def __init__(self, iterable=(), cache: Optional[dict] = None):
         self._items = OrderedDict((t, None) for t in iterable)
+        self._cache = {} if cache is None else cache
 
     def __repr__(self):
         return list(self._items).__repr__()
@@ -29,8 +37,7 @@ class OrderedSet(MutableSet):
         return item in self._items
 
     def __iter__(self):
-        for item in self._items:
-            yield item
+        return iter(self._items)
 
     def __len__(self):
         return len(self._items)
@@ -38,14 +45,17 @@ class OrderedSet(MutableSet):
     def add(self, item):
         if item not in self._items:
             self._items[item] = None
+            self._cache = {}
 
     def discard(self, item):
-        self._items.pop(item, None)
+        if self._items.pop(item, self) is not self:
+            self._cache = {}
 
     def insert(self, index, item):
         item_list = list(self._items.items())
         item_list.insert(index, (item, None))
         self._items = OrderedDict(item_list)
+        self._cache = {}
 
     def insert_after(self, item, after_item):
         assert after_item in self._items, after_item
@@ -53,6 +63,7 @@ class OrderedSet(MutableSet):
         token_list = list(self._items.items())
         token_list.insert(indx, (item, None))
         self._items = OrderedDict(token_list)
+        self._cache = {}
 
     def insert_before(self, item, before_item):
         assert before_item in self._items
@@ -60,6 +71,126 @@ class OrderedSet(MutableSet):
         token_list = list(self._items.items())
         token_list.insert(indx, (item, None))
         self._items = OrderedDict(token_list)
+        self._cache = {}
+
+    def __copy__(self):
+        new = self.__class__.__new__(self.__class__)
+        new.__dict__.update(self.__dict__)
+        new._items = OrderedDict(self._items)
+        return new
+
+    def __deepcopy__(self, memo):
+        # the items (token classes or names) are immutable, so are not copied
+        new = copy(self)
+        for name, value in vars(self).items():
+            if name not in ("_items", "_cache"):
+                setattr(new, name, deepcopy(value, memo))
+        return new
+
+    def cached(self, key, func):
+        """Return ``func(self)``, computed once and stored until the next mutation.
+
+        :param key: a unique key for the derived value
+        :param func: a function taking this set and returning the derived value
+        """
+        try:
+            return self._cache[key]
+        except KeyError:
+            value = self._cache[key] = func(self)
+            return value
+
+
+class ParseAborted(Exception):
+    """Raised when a parse is aborted, by the ``ParseContext.abort`` callback."""
+
+
+def _token_tuple(classes) -> tuple:
+    return tuple(tokens_from_classes(classes))
+
+
+@attr.s(frozen=True, slots=True)
+class TokenSetConfig:
+    """An immutable (and hashable) configuration of the tokens to parse,
+    which can be shared by any number of parse contexts and renderers.
+
+    Lookup tables derived from the tokens (such as the block start dispatch,
+    the span scanner and the names of render functions)
+    are computed once per configuration, rather than once per ``ParseContext``.
+    Use ``TokenSetConfig.get`` to reuse the configuration of a token set, e.g.::
+
+        TokenSetConfig.get(
+            token_sets.get_commonmark_block_tokens(),
+            token_sets.get_commonmark_span_tokens(),
+        )
+
+    :param block_tokens: the block token classes (or class paths) to search for
+    :param span_tokens: the span token classes (or class paths) to search for
+    """
+
+    block_tokens = attr.ib(converter=_token_tuple)
+    span_tokens = attr.ib(converter=_token_tuple)
+    _block_cache = attr.ib(factory=dict, init=False, eq=False, repr=False)
+    _span_cache = attr.ib(factory=dict, init=False, eq=False, repr=False)
+    _cache = attr.ib(factory=dict, init=False, eq=False, repr=False)
+
+    @classmethod
+    def get(cls, find_blocks=None, find_spans=None) -> "TokenSetConfig":
+        """Return the configuration of a token set, created once per process.
+
+        :param find_blocks: the block tokens, or None for
+            ``BaseRenderer.default_block_tokens``
+        :param find_spans: the span tokens, or None for
+            ``BaseRenderer.default_span_tokens``
+        """
+        if find_blocks is None or find_spans is None:
+            from mistletoe.renderers.base import BaseRenderer
+
+            if find_blocks is None:
+                find_blocks = BaseRenderer.default_block_tokens
+            if find_spans is None:
+                find_spans = BaseRenderer.default_span_tokens
+        key = (cls, tuple(find_blocks), tuple(find_spans))
+        try:
+            return _TOKEN_CONFIGS[key]
+        except KeyError:
+            return _TOKEN_CONFIGS.setdefault(key, cls(key[1], key[2]))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (self.__class__.get, (self.block_tokens, self.span_tokens))
+
+    def block_set(self) -> OrderedSet:
+        """Return a new set of the block tokens,
+        sharing the lookup tables of this configuration (until mutated).
+        """
+        return OrderedSet(self.block_tokens, self._block_cache)
+
+    def span_set(self) -> OrderedSet:
+        """Return a new set of the span tokens,
+        sharing the lookup tables of this configuration (until mutated).
+        """
+        return OrderedSet(self.span_tokens, self._span_cache)
+
+    def cached(self, key, func):
+        """Return ``func(self)``, computed once per configuration.
+
+        :param key: a unique key for the derived value
+        :param func: a function taking this configuration
+            and returning the derived value
+        """
+        try:
+            return self._cache[key]
+        except KeyError:
+            return self._cache.setdefault(key, func(self))
+
+
+# the configurations created by ``TokenSetConfig.get``
+_TOKEN_CONFIGS = {}
 
 
 class ParseContext:
@@ -69,12 +200,35 @@ class ParseContext:
         the standard blocks will be used from `BaseRenderer.default_block_token`.
     :param find_spans: a list of span tokens to use during the parse. If None,
         the standard blocks will be used from `BaseRenderer.default_span_tokens`.
+    :param token_config: a ``TokenSetConfig`` to use,
+        instead of ``find_blocks`` and ``find_spans``
     :param link_definitions: a dict of link definitons, obtained from `[def]: link`
     :param foot_definitions: a dict of footnote definitons,
         obtained from `[^def]: link` (if Footnote token active)
     :param nesting_matches: a dict of matches recorded from `find_nested_tokenizer`
+    :param span_engine: the engine used to search for span tokens,
+        ``"finditer"`` (search for each token in turn)
+        or ``"scanner"`` (single pass, see ``span_tokenizer.SpanScanner``)
+    :param profiler: if set, accumulates the call counts and times of
+        parsing/rendering phases (see ``mistletoe.profiler.Profiler``)
+    :param compact_positions: store token positions as ``CompactPosition``
+        ``(line_start, line_end)`` pairs, without the ``uri`` and ``data``
+        of the source (reducing the memory of large syntax trees)
+    :param abort: if set, a function called before reading each block token,
+        tokenizing each span (and every ``nested_tokenizer.ABORT_INTERVAL``
+        characters within it) and rendering each top-level block
+        (see ``BaseRenderer.emit_blocks``);
+        if it returns True, ``ParseAborted`` is raised
+        (e.g. to stop a parse that exceeds a time limit)
+    :param outline: only read the block structure (see ``block_tokenizer.outline``);
+        positions are stored as ``CompactPosition``,
+        and the span text of blocks is not stored
     """
 
+    span_engines = ("finditer", "scanner")
+    # the options which change the syntax tree of a parse (see ``tree_options``)
+    _tree_options = ("span_engine", "compact_positions", "outline", "parse_setext")
+
     def __init__(
         self,
         find_blocks=None,
@@ -82,20 +236,22 @@ class ParseContext:
         link_definitions=None,
         foot_definitions=None,
         logger: Optional[logging.Logger] = None,
+        span_engine: str = "finditer",
+        profiler=None,
+        compact_positions: bool = False,
+        abort: Optional[Callable[[], bool]] = None,
+        outline: bool = False,
+        token_config: Optional[TokenSetConfig] = None,
     ):
         # tokens used for matching
-        if find_blocks is not None:
-            self.block_tokens = OrderedSet(tokens_from_classes(find_blocks))
-        else:
-            from mistletoe.renderers.base import BaseRenderer
-
-            self.block_tokens = OrderedSet(BaseRenderer.default_block_tokens)
-        if find_spans is not None:
-            self.span_tokens = OrderedSet(tokens_from_classes(find_spans))
-        else:
-            from mistletoe.renderers.base import BaseRenderer
-
-            self.span_tokens = OrderedSet(BaseRenderer.default_span_tokens)
+        if token_config is None:
+            token_config = TokenSetConfig.get(find_blocks, find_spans)
+        elif find_blocks is not None or find_spans is not None:
+            raise ValueError("find_blocks/find_spans cannot be used with token_config")
+        self._token_config = token_config
+        # the token sets are only created when first used (see ``block_tokens``)
+        self._block_tokens = None
+        self._span_tokens = None
 
         # definition references, collected during parsing
         if link_definitions is None:
@@ -108,12 +264,26 @@ class ParseContext:
             self._foot_definitions = foot_definitions
 
         self.nesting_matches = {}
+        # state passed from the ``start`` to the ``read`` of a block token class
+        self.block_starts = {}
+        # whether a paragraph may be a setext heading (disabled within quotes)
+        self.parse_setext = True
+        # tokens read with ``SpanContainer`` children (in document order),
+        # to be expanded after the block parse (see ``expand_span_containers``)
+        self.span_containers = []
         self._foot_references = OrderedSet()
+        self._definition_lines = []
 
         if logger is None:
             logger = LOGGER
         self._logger = logger
 
+        self.span_engine = span_engine
+        self.profiler = profiler
+        self.compact_positions = compact_positions
+        self.abort = abort
+        self.outline = outline
+
     def __repr__(self):
         return "{0}(block_cls={1},span_cls={2},link_defs={3},footnotes={4})".format(
             self.__class__.__name__,
@@ -123,6 +293,41 @@ class ParseContext:
             len(self.foot_definitions),
         )
 
+    @property
+    def token_config(self) -> TokenSetConfig:
+        """The configuration that the token sets of this context were created from."""
+        return self._token_config
+
+    @property
+    def block_tokens(self) -> OrderedSet:
+        """The block tokens to search for.
+
+        Initially those of ``token_config``,
+        this set can be mutated (without changing ``token_config``).
+        """
+        if self._block_tokens is None:
+            self._block_tokens = self._token_config.block_set()
+        return self._block_tokens
+
+    @block_tokens.setter
+    def block_tokens(self, tokens):
+        self._block_tokens = OrderedSet(tokens_from_classes(tokens))
+
+    @property
+    def span_tokens(self) -> OrderedSet:
+        """The span tokens to search for.
+
+        Initially those of ``token_config``,
+        this set can be mutated (without changing ``token_config``).
+        """
+        if self._span_tokens is None:
+            self._span_tokens = self._token_config.span_set()
+        return self._span_tokens
+
+    @span_tokens.setter
+    def span_tokens(self, tokens):
+        self._span_tokens = OrderedSet(tokens_from_classes(tokens))
+
     @property
     def link_definitions(self) -> dict:
         return self._link_definitions
@@ -135,6 +340,23 @@ class ParseContext:
     def foot_references(self) -> OrderedSet:
         return self._foot_references
 
+    @property
+    def definition_lines(self) -> list:
+        """The ``(line_start, line_end)`` of link/footnote definitions read."""
+        return self._definition_lines
+
+    @property
+    def span_engine(self) -> str:
+        return self._span_engine
+
+    @span_engine.setter
+    def span_engine(self, engine: str):
+        if engine not in self.span_engines:
+            raise ValueError(
+                "span_engine must be one of {}: {}".format(self.span_engines, engine)
+            )
+        self._span_engine = engine
+
     @property
     def logger(self) -> logging.Logger:
         return self._logger
@@ -147,9 +369,59 @@ class ParseContext:
         self._link_definitions = {}
         self._foot_definitions = {}
         self._foot_references = OrderedSet()
+        self._definition_lines = []
+
+    def tree_options(self) -> dict:
+        """Return the options of this context (other than its token sets),
+        which change the syntax tree of a parse (e.g. for a cache key).
+        """
+        return {name: getattr(self, name) for name in self._tree_options}
 
     def copy(self):
-        return deepcopy(self)
+        """Return a copy of the configuration of this context,
+        with copies of its definitions, but none of the state of a parse in progress
+        (and no ``profiler``).
+
+        The ``token_config`` (and logger) is shared with the copy,
+        and the token sets share their lookup tables (until mutated).
+        The definitions are copied shallowly (sharing the footnote tokens).
+        """
+        context = copy(self)
+        for name in ("_block_tokens", "_span_tokens"):
+            value = getattr(self, name)
+            if value is not None:
+                setattr(context, name, copy(value))
+        context._link_definitions = copy(self._link_definitions)
+        context._foot_definitions = copy(self._foot_definitions)
+        context._foot_references = copy(self._foot_references)
+        context._definition_lines = list(self._definition_lines)
+        context.nesting_matches = {}
+        context.block_starts = {}
+        context.parse_setext = True
+        context.span_containers = []
+        context.profiler = None
+        return context
+
+    def span_context(self) -> "ParseContext":
+        """Return a context in which to expand spans after the parse
+        (see ``base_elements.LazySpans``).
+
+        It shares the span tokens and link/footnote definitions of this context
+        (the definitions being those the parsed document stores),
+        but not its per-parse state.
+        Each ``LazySpans`` created for the context is appended to its ``lazy_spans``
+        (in document order, see ``block_tokenizer.expand_span_containers``).
+        """
+        context = copy(self)
+        context.nesting_matches = {}
+        context.block_starts = {}
+        context.span_containers = []
+        context._definition_lines = []
+        context.profiler = None
+        context.abort = None
+        context._foot_references = OrderedSet()
+        context.lazy_spans = []
+        return context
 
 
 def get_parse_context(reset=False) -> ParseContext:
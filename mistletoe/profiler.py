@@ -0,0 +1,194 @@
+"""Per token type profiling of parsing and rendering.
+
+Set a ``Profiler`` on the ``ParseContext`` (before creating the renderer)::
+
+    >>> context = ParseContext(profiler=Profiler())
+    >>> with HTMLRenderer(parse_context=context) as renderer:
+    ...     renderer.render(Document.read(text))
+    >>> print(context.profiler.format_table())
+
+When no profiler is set, the parser only performs a single ``None`` check
+per block/span tokenization, and the renderer none at all.
+"""
+from collections import OrderedDict
+from time import perf_counter
+from typing import Callable, Dict, List, Optional
+
+from mistletoe.parse_context import get_parse_context
+from mistletoe.span_tokenizer import ParseToken
+
+
+class Profiler:
+    """Accumulate call counts and times, for each phase and token type.
+
+    The phases are: ``block.start``/``block.read`` (per block token class),
+    ``span.find`` (per span token class, or ``SpanScanner`` for the scanner engine),
+    ``span.make`` (``ParseToken.make`` per span token class),
+    and ``render`` (per token name).
+    Times are inclusive, e.g. the read of a ``Quote`` includes the reads
+    of its children.
+
+    :param timer: the function used to measure time (in seconds)
+    """
+
+    def __init__(self, timer: Callable[[], float] = perf_counter):
+        self.timer = timer
+        self._stats = {}  # type: Dict[tuple, list]
+        self._block_proxies = {}
+
+    def __repr__(self):
+        return "{0}(entries={1})".format(self.__class__.__name__, len(self._stats))
+
+    def reset(self):
+        """Remove all accumulated counters."""
+        self._stats.clear()
+
+    def add(self, phase: str, name: str, seconds: float, calls: int = 1):
+        """Add to the counters of a phase/name."""
+        try:
+            stat = self._stats[(phase, name)]
+        except KeyError:
+            stat = self._stats[(phase, name)] = [0, 0.0]
+        stat[0] += calls
+        stat[1] += seconds
+
+    def call(self, phase: str, name: str, func: Callable, *args, **kwargs):
+        """Call a function, adding its time to the counters of a phase/name."""
+        start = self.timer()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.add(phase, name, self.timer() - start)
+
+    def wrap(self, phase: str, name: str, func: Callable) -> Callable:
+        """Return a version of the function, which is timed on every call."""
+
+        def _timed(*args, **kwargs):
+            return self.call(phase, name, func, *args, **kwargs)
+
+        _timed.__wrapped__ = func
+        return _timed
+
+    def block_dispatch(self, dispatch):
+        """Wrap a ``block_tokenizer.StartDispatch``,
+        so that the ``start``/``read`` of its candidates are timed.
+        """
+        return _TimedDispatch(dispatch, self)
+
+    def find_tokens(self, string, token_types, fallback_token) -> List[ParseToken]:
+        """A timed version of ``span_tokenizer.find_tokens``."""
+        tokens = []
+        for token_type in token_types:
+            start = self.timer()
+            matches = list(token_type.find(string))
+            self.add("span.find", token_type.__name__, self.timer() - start)
+            for m in matches:
+                tokens.append(
+                    ParseToken(
+                        m.start(), m.end(), m, string, token_type, fallback_token
+                    )
+                )
+        return sorted(tokens)
+
+    @staticmethod
+    def time_parse_tokens(tokens: List[ParseToken]):
+        """Mark parse tokens (from a span tokenizer), for their ``make`` to be timed."""
+        for token in tokens:
+            token.__class__ = _TimedParseToken
+
+    def wrap_render_map(self, render_map: dict) -> dict:
+        """Return a copy of a renderer's ``render_map``, with all functions timed."""
+        return {
+            name: self.wrap("render", name, func) for name, func in render_map.items()
+        }
+
+    def to_dict(self) -> Dict[str, Dict[str, dict]]:
+        """Return the counters, as ``{phase: {name: {"calls": n, "seconds": s}}}``."""
+        data = OrderedDict()
+        for phase, name, calls, seconds in self.rows():
+            data.setdefault(phase, OrderedDict())[name] = {
+                "calls": calls,
+                "seconds": seconds,
+            }
+        return data
+
+    def rows(self, phase: Optional[str] = None) -> List[tuple]:
+        """Return ``(phase, name, calls, seconds)`` rows, slowest first."""
+        return sorted(
+            (
+                (key[0], key[1], stat[0], stat[1])
+                for key, stat in self._stats.items()
+                if phase is None or key[0] == phase
+            ),
+            key=lambda row: row[3],
+            reverse=True,
+        )
+
+    def format_table(self, phase: Optional[str] = None) -> str:
+        """Return the counters as a text table, slowest first."""
+        header = ("phase", "name", "calls", "total (s)", "per call (us)")
+        lines = [
+            (
+                row_phase,
+                name,
+                str(calls),
+                "{:.4f}".format(seconds),
+                "{:.2f}".format(1e6 * seconds / calls if calls else 0),
+            )
+            for row_phase, name, calls, seconds in self.rows(phase)
+        ]
+        widths = [max(len(r[i]) for r in [header] + lines) for i in range(5)]
+        text = []
+        for index, line in enumerate([header] + lines):
+            text.append(
+                "  ".join(
+                    cell.ljust(width) if column < 2 else cell.rjust(width)
+                    for column, (cell, width) in enumerate(zip(line, widths))
+                ).rstrip()
+            )
+            if index == 0:
+                text.append("  ".join("-" * width for width in widths))
+        return "\n".join(text)
+
+
+class _TimedBlock:
+    """A proxy for a block token class, timing its ``start`` and ``read``."""
+
+    __slots__ = ("cls", "profiler")
+
+    def __init__(self, cls, profiler):
+        self.cls = cls
+        self.profiler = profiler
+
+    def start(self, line):
+        return self.profiler.call(
+            "block.start", self.cls.__name__, self.cls.start, line
+        )
+
+    def read(self, lines):
+        return self.profiler.call("block.read", self.cls.__name__, self.cls.read, lines)
+
+
+class _TimedDispatch:
+    """A proxy for a ``StartDispatch``, returning timed block token candidates."""
+
+    __slots__ = ("dispatch", "proxies")
+
+    def __init__(self, dispatch, profiler: Profiler):
+        self.dispatch = dispatch
+        self.proxies = profiler._block_proxies
+
+        for cls in dispatch.all_tokens:
+            if cls not in self.proxies:
+                self.proxies[cls] = _TimedBlock(cls, profiler)
+
+    def candidates(self, line):
+        return tuple(self.proxies[c] for c in self.dispatch.candidates(line))
+
+
+class _TimedParseToken(ParseToken):
+    def make(self):
+        profiler = get_parse_context().profiler
+        if profiler is None:
+            return super().make()
+        return profiler.call("span.make", self.cls.__name__, super().make)
@@ -3,12 +3,100 @@ Base class for renderers.
 """
 
 from itertools import chain
+from operator import attrgetter
 import re
 import sys
-from typing import Optional
+from typing import Optional, Tuple
 
 from mistletoe import block_tokens, block_tokens_ext, span_tokens, span_tokens_ext
-from mistletoe.parse_context import ParseContext, set_parse_context
+from mistletoe.base_elements import LazySpans
+from mistletoe.parse_context import ParseAborted, ParseContext, set_parse_context
+
+
+class RenderMap(dict):
+    """A map of token names to render functions.
+
+    Lookups by token class (see ``find``) are stored in ``by_class``
+    (and the emit functions of ``BaseRenderer.emit`` in ``emit_by_class``),
+    which are cleared whenever the map is mutated.
+    """
+
+    __slots__ = ("by_class", "emit_by_class")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.by_class = {}
+        self.emit_by_class = {}
+
+    def find(self, cls):
+        """Return (and store) the render function of a token class."""
+        func = self.by_class[cls] = self[cls.__name__]
+        return func
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._changed()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed()
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+    def pop(self, *args):
+        self._changed()
+        return super().pop(*args)
+
+    def popitem(self):
+        self._changed()
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        self._changed()
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._changed()
+
+    def _changed(self):
+        self.by_class.clear()
+        self.emit_by_class.clear()
+
+
+class SinkBuffer(list):
+    """A list of emitted fragments (see ``BaseRenderer.emit``),
+    written to a sink (any object with a ``write`` method) in chunks.
+
+    ``flush_full`` is called by ``BaseRenderer.emit_blocks`` after each block,
+    and writes the fragments once they exceed ``buffer_size`` characters.
+    """
+
+    __slots__ = ("sink", "buffer_size", "_size", "_counted")
+
+    def __init__(self, sink, buffer_size: int = 2 ** 16):
+        super().__init__()
+        self.sink = sink
+        self.buffer_size = buffer_size
+        # the size of the fragments, up to index ``_counted``
+        self._size = 0
+        self._counted = 0
+
+    def flush_full(self):
+        """Write the fragments, if they exceed ``buffer_size`` characters."""
+        self._size += sum(map(len, self[self._counted :]))
+        self._counted = len(self)
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Write (and remove) all the fragments."""
+        if self:
+            self.sink.write("".join(self))
+            del self[:]
+        self._size = self._counted = 0
 
 
 class BaseRenderer:
@@ -48,8 +136,26 @@ class BaseRenderer:
     :param render_map: maps tokens to their corresponding render functions.
     :type render_map: dict
 
+    :param iterative_context_tokens: names of tokens whose rendering depends on state
+        set by the render functions of their ancestors,
+        which must not be rendered ahead of them by ``render_iterative``.
+
+    :Emission:
+
+    Render functions return the full string of their token,
+    which for nested tokens re-copies the strings of their descendants
+    at every level of nesting.
+    Renderers can instead define ``emit_`` methods (e.g. ``emit_paragraph``),
+    which append the fragments of the token (and its children)
+    to a single list (see ``emit``), joined only once,
+    with the render method made from it by ``render_from_emit``.
+    Any other render function (e.g. a ``render_`` method overridden by a subclass,
+    or replaced in ``render_map``)
+    is emitted by appending the string it returns.
     """
 
+    iterative_context_tokens: Tuple[str, ...] = ()
+
     default_block_tokens = (
         block_tokens.HTMLBlock,
         block_tokens.BlockCode,
@@ -97,13 +203,51 @@ class BaseRenderer:
         self.parse_context = parse_context
         set_parse_context(self.parse_context)
 
+        self._rendered = None
         self.render_map = self.get_default_render_map()
+        render_names = self.parse_context.token_config.cached(
+            (self.__class__, "render_names"), self._render_names
+        )
         for token in chain(
             self.parse_context.block_tokens, self.parse_context.span_tokens
         ):
             if token.__name__ not in self.render_map:
-                render_func = getattr(self, self._cls_to_func(token.__name__))
-                self.render_map[token.__name__] = render_func
+                name = render_names.get(token) or self._cls_to_func(token.__name__)
+                self.render_map[token.__name__] = getattr(self, name)
+        if self.parse_context.profiler is not None:
+            self.render_map = self.parse_context.profiler.wrap_render_map(
+                self.render_map
+            )
+        self.compile_render_map()
+
+    @property
+    def render_map(self) -> RenderMap:
+        """The map of token names to render functions."""
+        return self._render_map
+
+    @render_map.setter
+    def render_map(self, render_map: dict):
+        self._render_map = RenderMap(render_map)
+        self._by_class = self._render_map.by_class
+        self._emit_by_class = self._render_map.emit_by_class
+
+    def compile_render_map(self):
+        """Resolve the render function of every token class in the parse context,
+        keyed by class (which ``render`` and ``render_inner`` look up first).
+
+        ``RawText`` (if rendered by ``BaseRenderer.render_raw_text``)
+        is mapped directly to its content.
+        """
+        for token in chain(
+            (block_tokens.Document, span_tokens.RawText),
+            self.parse_context.block_tokens,
+            self.parse_context.span_tokens,
+        ):
+            if token.__name__ in self._render_map:
+                self._render_map.find(token)
+        func = self._by_class.get(span_tokens.RawText)
+        if getattr(func, "__func__", None) is BaseRenderer.render_raw_text:
+            self._by_class[span_tokens.RawText] = attrgetter("content")
 
     def get_default_render_map(self):
         """Return the default map of token names to methods."""
@@ -145,7 +289,13 @@ class BaseRenderer:
         Arguments:
             token: whose __class__.__name__ is in self.render_map.
         """
-        return self.render_map[token.__class__.__name__](token)
+        if self._rendered:
+            result = self._rendered.get(id(token))
+            if result is not None:
+                return result
+        cls = token.__class__
+        func = self._by_class.get(cls) or self._render_map.find(cls)
+        return func(token)
 
     def render_inner(self, token):
         """
@@ -159,7 +309,156 @@ class BaseRenderer:
 
         :param token: a branch node who has children attribute.
         """
-        return "".join(map(self.render, token.children or []))
+        children = token.children
+        if not children:
+            return ""
+        if self._rendered or type(self).render is not BaseRenderer.render:
+            return "".join(map(self.render, children))
+        # fast path: call the render functions directly
+        by_class = self._by_class
+        find = self._render_map.find
+        return "".join(
+            [
+                (by_class.get(child.__class__) or find(child.__class__))(child)
+                for child in children
+            ]
+        )
+
+    def emit(self, token, out: list):
+        """Append the rendering of a token to ``out``, as one or more strings.
+
+        ``"".join(out)`` then equals ``render(token)``.
+        """
+        if self._rendered:
+            result = self._rendered.get(id(token))
+            if result is not None:
+                out.append(result)
+                return
+        cls = token.__class__
+        func = self._emit_by_class.get(cls) or self._find_emit(cls)
+        func(token, out)
+
+    def emit_blocks(self, tokens, out: list, separator: str = ""):
+        """Emit (top-level) block tokens to ``out``, separated by ``separator``.
+
+        When rendering to a sink (see ``render_to``),
+        the output is written after each block, once enough is buffered.
+        The ``ParseContext.abort`` callback (if set) is called before each block.
+        """
+        emit = self.emit
+        flush = getattr(out, "flush_full", None)
+        abort = self.parse_context.abort
+        last = len(tokens) - 1
+        for index, token in enumerate(tokens):
+            if abort is not None and abort():
+                raise ParseAborted("while rendering block {}".format(index))
+            emit(token, out)
+            if separator and index != last:
+                out.append(separator)
+            if flush is not None:
+                flush()
+
+    def render_to(self, token, sink, buffer_size: int = 2 ** 16):
+        """Render a token, writing the output to ``sink``
+        (any object with a ``write`` method, e.g. a file or ``sys.stdout``).
+
+        The output is written in chunks, as the top-level blocks are rendered,
+        each time (at least) ``buffer_size`` characters have been buffered
+        (``0`` to write after every block),
+        rather than first joining the full output.
+        """
+        out = SinkBuffer(sink, buffer_size)
+        self.emit(token, out)
+        out.flush()
+
+    def emit_inner(self, token, out: list):
+        """Emit the children of a token to ``out`` (see ``render_inner``).
+
+        If ``render_inner`` is overridden (by a subclass or the instance),
+        the string it returns is appended.
+        """
+        if (
+            type(self).render_inner is not BaseRenderer.render_inner
+            or "render_inner" in vars(self)
+        ):
+            out.append(self.render_inner(token))
+            return
+        children = token.children
+        if not children:
+            return
+        if self._rendered or type(self).render is not BaseRenderer.render:
+            for child in children:
+                self.emit(child, out)
+            return
+        by_class = self._emit_by_class
+        find = self._find_emit
+        for child in children:
+            (by_class.get(child.__class__) or find(child.__class__))(child, out)
+
+    def _find_emit(self, cls):
+        """Return (and store) the emit function of a token class.
+
+        This is the ``emit_`` method of its render function,
+        if made by ``render_from_emit`` (and ``render`` is not overridden),
+        otherwise a function appending the string returned by the render function.
+        """
+        if type(self).render is not BaseRenderer.render:
+            render_func = self.render
+        else:
+            render_func = self._by_class.get(cls) or self._render_map.find(cls)
+        emit_name = getattr(getattr(render_func, "__func__", None), "emit_name", None)
+        if emit_name is not None:
+            func = getattr(self, emit_name)
+        else:
+
+            def func(token, out):
+                out.append(render_func(token))
+
+        self._emit_by_class[cls] = func
+        return func
+
+    def render_iterative(self, token, interval: int = 32):
+        """Render a token, without recursion (in Python) proportional to its depth.
+
+        Descendants are first rendered bottom-up, at every ``interval`` levels of
+        nesting, and their results stored, to be returned by ``render``
+        when reached from their parent.
+        This avoids a ``RecursionError`` for deeply nested quotes/lists.
+
+        Tokens in ``iterative_context_tokens`` are not rendered ahead of their parent.
+        Note, side effects of the render functions
+        (e.g. LaTeX packages added) may occur in a different order.
+        """
+        skip = set(self.iterative_context_tokens)
+        nodes = []
+        stack = [(child, 1) for child in token.children or []]
+        while stack:
+            node, distance = stack.pop()
+            children = node.children
+            if not isinstance(children, (list, LazySpans)) or not children:
+                continue
+            if distance >= interval and node.__class__.__name__ not in skip:
+                nodes.append(node)
+                distance = 0
+            stack.extend((child, distance + 1) for child in children)
+        previous = self._rendered
+        self._rendered = rendered = {} if previous is None else dict(previous)
+        try:
+            # the reverse of the (right-to-left) pre-order is a post-order
+            for node in reversed(nodes):
+                rendered[id(node)] = self.render(node)
+            return self.render(token)
+        finally:
+            self._rendered = previous
+
+    def reset_document(self):
+        """Clear any state stored while rendering a document,
+        so that the renderer can be reused for another.
+
+        Subclasses which store such state (e.g. ``LaTeXRenderer.packages``)
+        should extend this.
+        """
+        self._rendered = None
 
     def __enter__(self):
         """
@@ -180,6 +479,16 @@ class BaseRenderer:
         snake = "_".join(map(str.lower, cls._parse_name.findall(cls_name)))
         return "render_{}".format(snake)
 
+    @classmethod
+    def _render_names(cls, token_config) -> dict:
+        """Map the tokens of a ``TokenSetConfig`` to the names of their render methods
+        (stored per renderer class, on the configuration).
+        """
+        return {
+            token: cls._cls_to_func(token.__name__)
+            for token in chain(token_config.block_tokens, token_config.span_tokens)
+        }
+
     @staticmethod
     def _tokens_from_module(module):
         """
@@ -220,3 +529,20 @@ class BaseRenderer:
         if name.startswith("render_"):
             return self.unimplemented_renderer
         raise AttributeError(name).with_traceback(sys.exc_info()[2])
+
+
+def render_from_emit(emit_name: str):
+    """Return a render method, joining the fragments of the ``emit_name`` method,
+    e.g. ``render_strong = render_from_emit("emit_strong")``.
+
+    ``BaseRenderer.emit`` then calls the ``emit_`` method directly.
+    """
+
+    def render(self, token):
+        out = []
+        getattr(self, emit_name)(token, out)
+        return "".join(out)
+
+    render.emit_name = emit_name
+    render.__doc__ = "Join the fragments of ``{}``.".format(emit_name)
+    return render
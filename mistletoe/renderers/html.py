@@ -2,14 +2,16 @@
 HTML renderer for mistletoe.
 """
 
-import re
 import sys
 from textwrap import dedent
-from typing import Optional
+from typing import Iterator, Optional
 from urllib.parse import quote
 
-from mistletoe.parse_context import ParseContext
-from mistletoe.renderers.base import BaseRenderer
+from mistletoe._html import escape_text, unescape_terminated
+from mistletoe.block_tokens import Document
+from mistletoe.parse_context import ParseContext, get_parse_context
+from mistletoe.renderers.base import BaseRenderer, render_from_emit
+from mistletoe.span_tokens import RawText
 
 if sys.version_info < (3, 4):
     from mistletoe import _html as html
@@ -20,6 +22,9 @@ else:
 class HTMLRenderer(BaseRenderer):
     """HTML renderer class."""
 
+    # their <p> tags depend on the ``_suppress_ptag_stack`` of the enclosing list
+    iterative_context_tokens = ("Paragraph", "ListItem")
+
     def __init__(
         self,
         parse_context: Optional[ParseContext] = None,
@@ -42,41 +47,120 @@ class HTMLRenderer(BaseRenderer):
         self.as_standalone = as_standalone
         self.add_css = add_css
         self._suppress_ptag_stack = [False]
-        # html.entities.html5 includes entitydefs not ending with ';',
-        # CommonMark seems to hate them, so...
-        self._stdlib_charref = html._charref
-        _charref = re.compile(
-            r"&(#[0-9]+;" r"|#[xX][0-9a-fA-F]+;" r"|[^\t\n\f <&#;]{1,32};)"
-        )
-        html._charref = _charref
-        # TODO when to reset? on every `__enter__` or just in `render_document`?
         self.footnotes_referenced = []
 
-    def __exit__(self, *args):
-        super().__exit__(*args)
-        html._charref = self._stdlib_charref
+    def reset_document(self):
+        super().reset_document()
+        self._suppress_ptag_stack = [False]
+        self.footnotes_referenced = []
 
-    def render_document(self, token):
-        self.footnotes_referenced = token.footref_order
+    def compile_render_map(self):
+        """As for ``BaseRenderer.compile_render_map``, but ``RawText``
+        (if rendered by ``HTMLRenderer.render_raw_text``)
+        is mapped directly to the escape of its content.
+        """
+        super().compile_render_map()
+        func = self._by_class.get(RawText)
+        if getattr(func, "__func__", None) is HTMLRenderer.render_raw_text:
+            escape = self.escape_html
+            self._by_class[RawText] = lambda token: escape(token.content)
 
-        inner = "\n".join([self.render(child) for child in token.children])
-        body = "{}\n".format(inner) if inner else ""
-
-        if token.footref_order:
-            body += '<hr class="footnotes-sep">\n'
-            body += '<section class="footnotes">\n'
-            body += '<ol class="footnotes-list">\n'
-            for index, target in enumerate(token.footref_order, 1):
-                footnote = token.footnotes[target]
-                body += '<li id="fn{}" class="footnote-item">\n'.format(index)
-                body += "\n".join([self.render(child) for child in footnote.children])
-                body += "\n</li>\n"
-            body += "</ol>\n"
-            body += "</section>\n"
-
-        if not self.as_standalone:
-            return body
-        return minimal_html_page(body, css=self.add_css or "")
+    def emit_document(self, token, out: list):
+        self.footnotes_referenced = token.footref_order
+        tail = None
+        if self.as_standalone:
+            head, tail = minimal_html_page("\0", css=self.add_css or "").split("\0")
+            out.append(head)
+        if len(token.children) == 1:
+            # a single (e.g. link definition) token may render to nothing
+            inner = []
+            self.emit(token.children[0], inner)
+            if any(inner):
+                out.extend(inner)
+                out.append("\n")
+        elif token.children:
+            self.emit_blocks(token.children, out, "\n")
+            out.append("\n")
+        self._emit_footnotes(token.footref_order, token.footnotes, out)
+        if tail is not None:
+            out.append(tail)
+
+    render_document = render_from_emit("emit_document")
+
+    def _emit_joined(self, tokens, separator: str, out: list):
+        """Emit tokens to ``out``, separated by ``separator``."""
+        emit = self.emit
+        for index, child in enumerate(tokens):
+            if index:
+                out.append(separator)
+            emit(child, out)
+
+    def render_iterative(self, token, interval: int = 32):
+        if isinstance(token, Document):
+            # set before the (pre-rendered) footnote references are reached
+            self.footnotes_referenced = token.footref_order
+        return super().render_iterative(token, interval)
+
+    def _emit_footnotes(self, footref_order, footnotes, out: list):
+        if not footref_order:
+            return
+        out.append(
+            '<hr class="footnotes-sep">\n'
+            '<section class="footnotes">\n'
+            '<ol class="footnotes-list">\n'
+        )
+        for index, target in enumerate(footref_order, 1):
+            out.append('<li id="fn{}" class="footnote-item">\n'.format(index))
+            self._emit_joined(footnotes[target].children, "\n", out)
+            out.append("\n</li>\n")
+        out.append("</ol>\n</section>\n")
+
+    def _render_footnotes(self, footref_order, footnotes):
+        out = []
+        self._emit_footnotes(footref_order, footnotes, out)
+        return "".join(out)
+
+    def render_stream(self, lines, **read_kwargs) -> Iterator[str]:
+        """Lazily read and render a document, yielding HTML chunks.
+
+        The HTML for each top-level token is yielded as soon as it is read,
+        and any link/footnote definitions it may refer to are read
+        (see ``Document.iter_read``), and the footnotes at the end.
+        The joined chunks equal ``render(Document.read(lines))``,
+        unless ``expand_spans="eager"`` is used,
+        or a reference is defined more than ``max_pending`` blocks after its use.
+
+        :param lines: the source text, or an iterable of lines (e.g. a file object)
+        :param read_kwargs: key-word arguments to parse to ``Document.iter_read``
+        """
+        tail = ""
+        if self.as_standalone:
+            head, tail = minimal_html_page("\0", css=self.add_css or "").split("\0")
+            yield head
+        parse_context = get_parse_context()
+        self.footnotes_referenced = []
+        n_references = 0
+        for token in Document.iter_read(lines, **read_kwargs):
+            if token.name == "FrontMatter":
+                continue
+            if len(parse_context.foot_references) != n_references:
+                n_references = len(parse_context.foot_references)
+                self.footnotes_referenced = [
+                    t
+                    for t in parse_context.foot_references
+                    if t in parse_context.foot_definitions
+                ]
+            yield self.render(token) + "\n"
+        self.footnotes_referenced = [
+            t
+            for t in parse_context.foot_references
+            if t in parse_context.foot_definitions
+        ]
+        footnotes = self._render_footnotes(
+            self.footnotes_referenced, parse_context.foot_definitions
+        )
+        if footnotes or tail:
+            yield footnotes + tail
 
     def render_to_plain(self, token):
         if token.children is not None:
@@ -84,22 +168,31 @@ class HTMLRenderer(BaseRenderer):
             return "".join(inner)
         return self.escape_html(token.content)
 
-    def render_strong(self, token):
-        template = "<strong>{}</strong>"
-        return template.format(self.render_inner(token))
+    def emit_strong(self, token, out: list):
+        out.append("<strong>")
+        self.emit_inner(token, out)
+        out.append("</strong>")
 
-    def render_emphasis(self, token):
-        template = "<em>{}</em>"
-        return template.format(self.render_inner(token))
+    render_strong = render_from_emit("emit_strong")
+
+    def emit_emphasis(self, token, out: list):
+        out.append("<em>")
+        self.emit_inner(token, out)
+        out.append("</em>")
+
+    render_emphasis = render_from_emit("emit_emphasis")
 
     def render_inline_code(self, token):
         template = "<code>{}</code>"
         inner = html.escape(token.children[0].content)
         return template.format(inner)
 
-    def render_strikethrough(self, token):
-        template = "<del>{}</del>"
-        return template.format(self.render_inner(token))
+    def emit_strikethrough(self, token, out: list):
+        out.append("<del>")
+        self.emit_inner(token, out)
+        out.append("</del>")
+
+    render_strikethrough = render_from_emit("emit_strikethrough")
 
     def render_image(self, token):
         template = '<img src="{}" alt="{}"{} />'
@@ -109,15 +202,16 @@ class HTMLRenderer(BaseRenderer):
             title = ""
         return template.format(token.src, self.render_to_plain(token), title)
 
-    def render_link(self, token):
-        template = '<a href="{target}"{title}>{inner}</a>'
-        target = self.escape_url(token.target)
+    def emit_link(self, token, out: list):
         if token.title:
             title = ' title="{}"'.format(self.escape_html(token.title))
         else:
             title = ""
-        inner = self.render_inner(token)
-        return template.format(target=target, title=title, inner=inner)
+        out.append('<a href="{}"{}>'.format(self.escape_url(token.target), title))
+        self.emit_inner(token, out)
+        out.append("</a>")
+
+    render_link = render_from_emit("emit_link")
 
     def render_auto_link(self, token):
         template = '<a href="{target}">{inner}</a>'
@@ -128,8 +222,10 @@ class HTMLRenderer(BaseRenderer):
         inner = self.render_inner(token)
         return template.format(target=target, inner=inner)
 
-    def render_escape_sequence(self, token):
-        return self.render_inner(token)
+    def emit_escape_sequence(self, token, out: list):
+        self.emit_inner(token, out)
+
+    render_escape_sequence = render_from_emit("emit_escape_sequence")
 
     def render_raw_text(self, token):
         return self.escape_html(token.content)
@@ -138,23 +234,33 @@ class HTMLRenderer(BaseRenderer):
     def render_html_span(token):
         return token.content
 
-    def render_heading(self, token):
-        template = "<h{level}>{inner}</h{level}>"
-        inner = self.render_inner(token)
-        return template.format(level=token.level, inner=inner)
+    def emit_heading(self, token, out: list):
+        out.append("<h{}>".format(token.level))
+        self.emit_inner(token, out)
+        out.append("</h{}>".format(token.level))
 
-    def render_quote(self, token):
-        elements = ["<blockquote>"]
+    render_heading = render_from_emit("emit_heading")
+
+    def emit_quote(self, token, out: list):
+        out.append("<blockquote>")
         self._suppress_ptag_stack.append(False)
-        elements.extend([self.render(child) for child in token.children])
+        for child in token.children:
+            out.append("\n")
+            self.emit(child, out)
         self._suppress_ptag_stack.pop()
-        elements.append("</blockquote>")
-        return "\n".join(elements)
+        out.append("\n</blockquote>")
+
+    render_quote = render_from_emit("emit_quote")
 
-    def render_paragraph(self, token):
+    def emit_paragraph(self, token, out: list):
         if self._suppress_ptag_stack[-1]:
-            return "{}".format(self.render_inner(token))
-        return "<p>{}</p>".format(self.render_inner(token))
+            self.emit_inner(token, out)
+            return
+        out.append("<p>")
+        self.emit_inner(token, out)
+        out.append("</p>")
+
+    render_paragraph = render_from_emit("emit_paragraph")
 
     def render_block_code(self, token):
         template = "<pre><code{attr}>{inner}</code></pre>"
@@ -167,47 +273,48 @@ class HTMLRenderer(BaseRenderer):
         inner = html.escape(token.children[0].content)
         return template.format(attr=attr, inner=inner)
 
-    def render_list(self, token):
-        template = "<{tag}{attr}>\n{inner}\n</{tag}>"
+    def emit_list(self, token, out: list):
         if token.start_at is not None:
             tag = "ol"
             attr = ' start="{}"'.format(token.start_at) if token.start_at != 1 else ""
         else:
             tag = "ul"
             attr = ""
+        out.append("<{}{}>\n".format(tag, attr))
         self._suppress_ptag_stack.append(not token.loose)
-        inner = "\n".join([self.render(child) for child in token.children])
+        self._emit_joined(token.children, "\n", out)
         self._suppress_ptag_stack.pop()
-        return template.format(tag=tag, attr=attr, inner=inner)
-
-    def render_list_item(self, token):
-        if len(token.children) == 0:
-            return "<li></li>"
-        inner = "\n".join([self.render(child) for child in token.children])
-        inner_template = "\n{}\n"
-        if self._suppress_ptag_stack[-1]:
-            if token.children[0].__class__.__name__ == "Paragraph":
-                inner_template = inner_template[1:]
-            if token.children[-1].__class__.__name__ == "Paragraph":
-                inner_template = inner_template[:-1]
-        return "<li>{}</li>".format(inner_template.format(inner))
-
-    def render_table(self, token):
-        # This is actually gross and I wonder if there's a better way to do it.
-        #
-        # The primary difficulty seems to be passing down alignment options to
-        # reach individual cells.
-        template = "<table>\n{inner}</table>"
+        out.append("\n</{}>".format(tag))
+
+    render_list = render_from_emit("emit_list")
+
+    def emit_list_item(self, token, out: list):
+        children = token.children
+        if len(children) == 0:
+            out.append("<li></li>")
+            return
+        suppress = self._suppress_ptag_stack[-1]
+        out.append("<li>")
+        if not (suppress and children[0].__class__.__name__ == "Paragraph"):
+            out.append("\n")
+        self._emit_joined(children, "\n", out)
+        if not (suppress and children[-1].__class__.__name__ == "Paragraph"):
+            out.append("\n")
+        out.append("</li>")
+
+    render_list_item = render_from_emit("emit_list_item")
+
+    def emit_table(self, token, out: list):
+        out.append("<table>\n")
         if getattr(token, "header", None) is not None:
-            head_template = "<thead>\n{inner}</thead>\n"
-            head_inner = self.render_table_row(token.header, is_header=True)
-            head_rendered = head_template.format(inner=head_inner)
-        else:
-            head_rendered = ""
-        body_template = "<tbody>\n{inner}</tbody>\n"
-        body_inner = self.render_inner(token)
-        body_rendered = body_template.format(inner=body_inner)
-        return template.format(inner=head_rendered + body_rendered)
+            out.append("<thead>\n")
+            out.append(self.render_table_row(token.header, is_header=True))
+            out.append("</thead>\n")
+        out.append("<tbody>\n")
+        self.emit_inner(token, out)
+        out.append("</tbody>\n</table>")
+
+    render_table = render_from_emit("emit_table")
 
     def render_table_row(self, token, is_header=False):
         template = "<tr>\n{inner}</tr>\n"
@@ -243,14 +350,17 @@ class HTMLRenderer(BaseRenderer):
 
     @staticmethod
     def escape_html(raw):
-        return html.escape(html.unescape(raw)).replace("&#x27;", "'")
+        """Unescape the (terminated) character references of ``raw``,
+        then escape ``&<>"`` (see ``_html.escape_text``).
+        """
+        return escape_text(raw)
 
     @staticmethod
     def escape_url(raw):
         """
         Escape urls to prevent code injection craziness. (Hopefully.)
         """
-        return html.escape(quote(html.unescape(raw), safe="/#:()*?=%@+,&"))
+        return html.escape(quote(unescape_terminated(raw), safe="/#:()*?=%@+,&"))
 
     def render_foot_reference(self, token):
         index = self.footnotes_referenced.index(token.target) + 1
@@ -5,7 +5,7 @@ from typing import Optional
 
 from mistletoe import block_tokens, block_tokens_ext, span_tokens, span_tokens_ext
 from mistletoe.parse_context import ParseContext
-from mistletoe.renderers.base import BaseRenderer
+from mistletoe.renderers.base import BaseRenderer, render_from_emit
 
 
 class LaTeXRenderer(BaseRenderer):
@@ -41,28 +41,45 @@ class LaTeXRenderer(BaseRenderer):
         self.packages = {}
         super().__init__(parse_context=parse_context)
 
-    def render_strong(self, token):
-        return "\\textbf{{{}}}".format(self.render_inner(token))
+    def reset_document(self):
+        super().reset_document()
+        self.packages = {}
+
+    def _emit_wrapped(self, token, out: list, start: str, end: str):
+        out.append(start)
+        self.emit_inner(token, out)
+        out.append(end)
+
+    def emit_strong(self, token, out: list):
+        self._emit_wrapped(token, out, "\\textbf{", "}")
+
+    render_strong = render_from_emit("emit_strong")
+
+    def emit_emphasis(self, token, out: list):
+        self._emit_wrapped(token, out, "\\textit{", "}")
+
+    render_emphasis = render_from_emit("emit_emphasis")
 
-    def render_emphasis(self, token):
-        return "\\textit{{{}}}".format(self.render_inner(token))
+    def emit_inline_code(self, token, out: list):
+        self._emit_wrapped(token, out, "\\verb|", "|")
 
-    def render_inline_code(self, token):
-        return "\\verb|{}|".format(self.render_inner(token))
+    render_inline_code = render_from_emit("emit_inline_code")
 
-    def render_strikethrough(self, token):
+    def emit_strikethrough(self, token, out: list):
         self.packages["ulem"] = ["normalem"]
-        return "\\sout{{{}}}".format(self.render_inner(token))
+        self._emit_wrapped(token, out, "\\sout{", "}")
+
+    render_strikethrough = render_from_emit("emit_strikethrough")
 
     def render_image(self, token):
         self.packages["graphicx"] = []
         return "\n\\includegraphics{{{}}}\n".format(token.src)
 
-    def render_link(self, token):
+    def emit_link(self, token, out: list):
         self.packages["hyperref"] = []
-        template = "\\href{{{target}}}{{{inner}}}"
-        inner = self.render_inner(token)
-        return template.format(target=token.target, inner=inner)
+        self._emit_wrapped(token, out, "\\href{{{}}}{{".format(token.target), "}")
+
+    render_link = render_from_emit("emit_link")
 
     def render_auto_link(self, token):
         self.packages["hyperref"] = []
@@ -72,8 +89,10 @@ class LaTeXRenderer(BaseRenderer):
     def render_math(token):
         return token.content
 
-    def render_escape_sequence(self, token):
-        return self.render_inner(token)
+    def emit_escape_sequence(self, token, out: list):
+        self.emit_inner(token, out)
+
+    render_escape_sequence = render_from_emit("emit_escape_sequence")
 
     def render_raw_text(self, token, escape=True):
         return (
@@ -88,21 +107,29 @@ class LaTeXRenderer(BaseRenderer):
             else token.content
         )
 
-    def render_heading(self, token):
-        inner = self.render_inner(token)
+    def emit_heading(self, token, out: list):
         if token.level == 1:
-            return "\n\\section{{{}}}\n".format(inner)
+            start = "\n\\section{"
         elif token.level == 2:
-            return "\n\\subsection{{{}}}\n".format(inner)
-        return "\n\\subsubsection{{{}}}\n".format(inner)
+            start = "\n\\subsection{"
+        else:
+            start = "\n\\subsubsection{"
+        self._emit_wrapped(token, out, start, "}\n")
+
+    render_heading = render_from_emit("emit_heading")
 
-    def render_quote(self, token):
+    def emit_quote(self, token, out: list):
         self.packages["csquotes"] = []
-        template = "\\begin{{displayquote}}\n{inner}\\end{{displayquote}}\n"
-        return template.format(inner=self.render_inner(token))
+        self._emit_wrapped(
+            token, out, "\\begin{displayquote}\n", "\\end{displayquote}\n"
+        )
 
-    def render_paragraph(self, token):
-        return "\n{}\n".format(self.render_inner(token))
+    render_quote = render_from_emit("emit_quote")
+
+    def emit_paragraph(self, token, out: list):
+        self._emit_wrapped(token, out, "\n", "\n")
+
+    render_paragraph = render_from_emit("emit_paragraph")
 
     def render_block_code(self, token):
         self.packages["listings"] = []
@@ -110,25 +137,22 @@ class LaTeXRenderer(BaseRenderer):
         inner = self.render_raw_text(token.children[0], False)
         return template.format(token.language, inner)
 
-    def render_list(self, token):
+    def emit_list(self, token, out: list):
         self.packages["listings"] = []
-        template = "\\begin{{{tag}}}\n{inner}\\end{{{tag}}}\n"
         tag = "enumerate" if token.start_at is not None else "itemize"
-        inner = self.render_inner(token)
-        return template.format(tag=tag, inner=inner)
+        self._emit_wrapped(
+            token, out, "\\begin{{{}}}\n".format(tag), "\\end{{{}}}\n".format(tag)
+        )
 
-    def render_list_item(self, token):
-        inner = self.render_inner(token)
-        return "\\item {}\n".format(inner)
+    render_list = render_from_emit("emit_list")
 
-    def render_table(self, token):
-        def render_align(column_align):
-            if column_align != [None]:
-                cols = [get_align(col) for col in token.column_align]
-                return "{{{}}}".format(" ".join(cols))
-            else:
-                return ""
+    def emit_list_item(self, token, out: list):
+        self._emit_wrapped(token, out, "\\item ", "\n")
 
+    render_list_item = render_from_emit("emit_list_item")
+
+    @staticmethod
+    def _render_align(column_align) -> str:
         def get_align(col):
             if col is None:
                 return "l"
@@ -138,23 +162,35 @@ class LaTeXRenderer(BaseRenderer):
                 return "r"
             raise RuntimeError("Unrecognized align option: " + col)
 
-        template = "\\begin{{tabular}}{align}\n" "{inner}" "\\end{{tabular}}\n"
+        if column_align != [None]:
+            cols = [get_align(col) for col in column_align]
+            return "{{{}}}".format(" ".join(cols))
+        return ""
+
+    def emit_table(self, token, out: list):
+        align = self._render_align(token.column_align)
+        out.append("\\begin{{tabular}}{}\n".format(align))
         if getattr(token, "header", None) is not None:
-            head_template = "{inner}\\hline\n"
-            head_inner = self.render_table_row(token.header)
-            head_rendered = head_template.format(inner=head_inner)
-        else:
-            head_rendered = ""
-        inner = self.render_inner(token)
-        align = render_align(token.column_align)
-        return template.format(inner=head_rendered + inner, align=align)
+            out.append(self.render_table_row(token.header))
+            out.append("\\hline\n")
+        self.emit_inner(token, out)
+        out.append("\\end{tabular}\n")
+
+    render_table = render_from_emit("emit_table")
+
+    def emit_table_row(self, token, out: list):
+        for index, child in enumerate(token.children):
+            if index:
+                out.append(" & ")
+            self.emit(child, out)
+        out.append(" \\\\\n")
 
-    def render_table_row(self, token):
-        cells = [self.render(child) for child in token.children]
-        return " & ".join(cells) + " \\\\\n"
+    render_table_row = render_from_emit("emit_table_row")
 
-    def render_table_cell(self, token):
-        return self.render_inner(token)
+    def emit_table_cell(self, token, out: list):
+        self.emit_inner(token, out)
+
+    render_table_cell = render_from_emit("emit_table_cell")
 
     @staticmethod
     def render_thematic_break(token):
@@ -171,14 +207,16 @@ class LaTeXRenderer(BaseRenderer):
             for package, options in self.packages.items()
         )
 
-    def render_document(self, token):
-        template = (
-            "\\documentclass{{article}}\n"
-            "{packages}"
-            "\\begin{{document}}\n"
-            "{inner}"
-            "\\end{{document}}\n"
-        )
-        return template.format(
-            inner=self.render_inner(token), packages=self.render_packages()
+    def emit_document(self, token, out: list):
+        # the packages are only known once the inner tokens are rendered
+        inner = []
+        self.emit_inner(token, inner)
+        out.append(
+            "\\documentclass{article}\n"
+            + self.render_packages()
+            + "\\begin{document}\n"
         )
+        out.extend(inner)
+        out.append("\\end{document}\n")
+
+    render_document = render_from_emit("emit_document")
@@ -0,0 +1,423 @@
+"""A compact binary serialization of syntax trees, which can be loaded again.
+
+::
+
+    >>> from mistletoe import Document, serialize
+    >>> data = serialize.dumps(Document.read("some *text*"))
+    >>> serialize.loads(data)
+    Document(children=1, link_definitions=0, footnotes=0, footref_order=0, ...)
+
+Unlike ``serialize_tokens`` (JSON, for inspection),
+the tokens are reconstructed as instances of their original classes,
+which are looked up (by module and qualified name) in the modules already imported
+when loading; data naming any other module is rejected, rather than importing it.
+Token attributes may be (nested) tokens, positions,
+``None``, ``bool``, ``int``, ``float``, ``str``, ``list``, ``tuple`` or ``dict``.
+
+The format is::
+
+    magic, format version
+    string table: the number of strings, their lengths, then their joined UTF-8
+    token-type table: per type, its "module:qualname" and attribute names
+    the value
+
+Integers are written as unsigned LEB128 varints
+(other integers in values are zig-zag encoded),
+strings as indices into the string table,
+and every value is prefixed by a single (tag) byte,
+which also holds small integers and the index of (one of the first 96) token types.
+"""
+from collections import OrderedDict
+from itertools import accumulate
+import struct
+import sys
+from typing import Any
+
+from mistletoe.base_elements import (
+    CompactPosition,
+    LazyFootrefOrder,
+    Position,
+    SpanContainer,
+    Token,
+    _slot_names,
+)
+from mistletoe.block_tokenizer import ParseBuffer
+
+__all__ = ["dumps", "loads", "FORMAT_VERSION"]
+
+MAGIC = b"MLTB"
+FORMAT_VERSION = 1
+
+_NONE = 0
+_TRUE = 1
+_FALSE = 2
+_INT = 3
+_FLOAT = 4
+_STR = 5
+_LIST = 6
+_TUPLE = 7
+_DICT = 8
+_ORDERED_DICT = 9
+_PARSE_BUFFER = 10
+_TOKEN = 11
+_POSITION = 12
+_POSITION_LINES = 13
+_COMPACT_POSITION = 14
+_UNSET = 15
+# tags from ``_TOKEN_TAG`` hold the token type index,
+# and from ``_SMALL_INT`` an integer (``tag - _SMALL_INT``)
+_TOKEN_TAG = 0x20
+_SMALL_INT = 0x80
+
+_FLOAT_STRUCT = struct.Struct("<d")
+# the value of a token slot, which is not set
+_UNSET_VALUE = object()
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize a token (or a list, dict, etc of tokens) to bytes.
+
+    :raises TypeError: if the tree contains a value that is not supported
+    """
+    encoder = _Encoder()
+    encoder.write(obj)
+    out = bytearray(MAGIC)
+    _write_varint(out, FORMAT_VERSION)
+    _write_varint(out, len(encoder.strings))
+    for string in encoder.strings:
+        _write_varint(out, len(string))
+    blob = "".join(encoder.strings).encode("utf8", "surrogatepass")
+    _write_varint(out, len(blob))
+    out += blob
+    _write_varint(out, len(encoder.types))
+    for name_index, field_indices in encoder.types.values():
+        _write_varint(out, name_index)
+        _write_varint(out, len(field_indices))
+        for index in field_indices:
+            _write_varint(out, index)
+    out += encoder.out
+    return bytes(out)
+
+
+def loads(data: bytes) -> Any:
+    """Load a token (or other value) serialized by ``dumps``.
+
+    :raises ValueError: if the data is invalid (however it is corrupted),
+        or of a different format version
+    """
+    data = memoryview(data)
+    if bytes(data[:4]) != MAGIC:
+        raise ValueError("data is not a serialized mistletoe syntax tree")
+    try:
+        version, pos = _read_varint(data, 4)
+        if version != FORMAT_VERSION:
+            raise ValueError(
+                "cannot load format version {}, only {}".format(
+                    version, FORMAT_VERSION
+                )
+            )
+        count, pos = _read_varint(data, pos)
+        lengths = []
+        for _ in range(count):
+            length, pos = _read_varint(data, pos)
+            lengths.append(length)
+        nbytes, pos = _read_varint(data, pos)
+        text = str(data[pos : pos + nbytes], "utf8", "surrogatepass")
+        pos += nbytes
+        strings = [
+            text[end - length : end]
+            for length, end in zip(lengths, accumulate(lengths))
+        ]
+        count, pos = _read_varint(data, pos)
+        types = []
+        for _ in range(count):
+            index, pos = _read_varint(data, pos)
+            cls = _import_token(strings[index])
+            nfields, pos = _read_varint(data, pos)
+            names = []
+            for _ in range(nfields):
+                index, pos = _read_varint(data, pos)
+                names.append(strings[index])
+            has_dict = bool(names) and names[-1] == "__dict__"
+            if has_dict:
+                names.pop()
+            _check_fields(cls, names, has_dict)
+            types.append((cls, names, has_dict))
+        next_byte = iter(data[pos:]).__next__
+        value = _read_value(next_byte, strings, types)
+    except ValueError:
+        raise
+    except (IndexError, StopIteration):
+        raise ValueError("serialized data is truncated or invalid")
+    except Exception as error:
+        # e.g. a corrupted value of the wrong type (for a dict key, etc)
+        raise ValueError("serialized data is invalid: {!r}".format(error)) from error
+    try:
+        next_byte()
+    except StopIteration:
+        return value
+    raise ValueError("unexpected data after the serialized value")
+
+
+def _write_varint(out: bytearray, value: int):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _is_lines(position) -> bool:
+    """Return whether the lines of a position can be written as varints."""
+    start, end = position.line_start, position.line_end
+    return (
+        type(start) is int
+        and start >= 0
+        and (end is None or (type(end) is int and end >= 0))
+    )
+
+
+def _class_path(cls) -> str:
+    return "{}:{}".format(cls.__module__, cls.__qualname__)
+
+
+class _Encoder:
+    """Write values to ``out``, collecting the string and token-type tables."""
+
+    def __init__(self):
+        self.out = bytearray()
+        # string -> index
+        self.strings = {}
+        # token class -> (name index, field name indices), in index order
+        self.types = {}
+        # token class -> (tag bytes, field names)
+        self._type_info = {}
+
+    def string_index(self, string: str) -> int:
+        try:
+            return self.strings[string]
+        except KeyError:
+            index = self.strings[string] = len(self.strings)
+            return index
+
+    def _add_type(self, cls):
+        names = _slot_names(cls)
+        if cls.__dictoffset__:
+            # the instance ``__dict__`` is stored as a final field
+            names.append("__dict__")
+        index = len(self.types)
+        self.types[cls] = (
+            self.string_index(_class_path(cls)),
+            [self.string_index(name) for name in names],
+        )
+        tag = bytearray()
+        if index < _SMALL_INT - _TOKEN_TAG:
+            tag.append(_TOKEN_TAG + index)
+        else:
+            tag.append(_TOKEN)
+            _write_varint(tag, index)
+        info = self._type_info[cls] = (bytes(tag), names)
+        return info
+
+    def write(self, obj):
+        out = self.out
+        cls = type(obj)
+        if cls is str:
+            out.append(_STR)
+            _write_varint(out, self.string_index(obj))
+        elif obj is None:
+            out.append(_NONE)
+        elif cls is list:
+            out.append(_LIST)
+            _write_varint(out, len(obj))
+            for item in obj:
+                self.write(item)
+        elif isinstance(obj, Token):
+            try:
+                tag, names = self._type_info[cls]
+            except KeyError:
+                tag, names = self._add_type(cls)
+            out += tag
+            for name in names:
+                try:
+                    value = object.__getattribute__(obj, name)
+                except AttributeError:
+                    out.append(_UNSET)
+                else:
+                    self.write(value)
+        elif cls is bool:
+            out.append(_TRUE if obj else _FALSE)
+        elif cls is int:
+            if 0 <= obj < 0x100 - _SMALL_INT:
+                out.append(_SMALL_INT + obj)
+            else:
+                out.append(_INT)
+                _write_varint(out, obj << 1 if obj >= 0 else (-obj << 1) - 1)
+        elif cls is Position:
+            if obj.uri is None and not obj.data and _is_lines(obj):
+                out.append(_POSITION_LINES)
+                _write_varint(out, obj.line_start)
+                _write_varint(out, 0 if obj.line_end is None else obj.line_end + 1)
+            else:
+                out.append(_POSITION)
+                self.write(obj.line_start)
+                self.write(obj.line_end)
+                self.write(obj.uri)
+                self.write(dict(obj.data))
+        elif cls is CompactPosition and _is_lines(obj):
+            out.append(_COMPACT_POSITION)
+            _write_varint(out, obj[0])
+            _write_varint(out, 0 if obj[1] is None else obj[1] + 1)
+        elif cls is ParseBuffer:
+            out.append(_PARSE_BUFFER)
+            self.write(obj.loose)
+            _write_varint(out, len(obj))
+            for item in obj:
+                self.write(item)
+        elif cls is tuple:
+            out.append(_TUPLE)
+            _write_varint(out, len(obj))
+            for item in obj:
+                self.write(item)
+        elif cls is dict or cls is OrderedDict:
+            out.append(_DICT if cls is dict else _ORDERED_DICT)
+            _write_varint(out, len(obj))
+            for key, value in obj.items():
+                self.write(key)
+                self.write(value)
+        elif cls is float:
+            out.append(_FLOAT)
+            out += _FLOAT_STRUCT.pack(obj)
+        elif isinstance(obj, (SpanContainer, LazyFootrefOrder)):
+            # as for ``serialize_tokens``
+            self.write(list(obj.expand()))
+        else:
+            raise TypeError("cannot serialize {!r} object".format(cls.__name__))
+
+
+def _read_varint(data: memoryview, pos: int):
+    """Return the varint at ``pos``, and the position after it."""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+def _import_token(path: str):
+    """Return the token class at ``path``, from the modules already imported."""
+    module_name, _, qualname = path.partition(":")
+    obj = sys.modules.get(module_name)
+    if obj is None:
+        raise ValueError("cannot import token class (not loaded): {}".format(path))
+    try:
+        for name in qualname.split("."):
+            obj = getattr(obj, name)
+    except AttributeError:
+        raise ValueError("cannot import token class: {}".format(path))
+    if not (isinstance(obj, type) and issubclass(obj, Token)):
+        raise ValueError("not a token class: {}".format(path))
+    return obj
+
+
+def _check_fields(cls, names: list, has_dict: bool):
+    """Check the stored attribute names are (still) slots of the token class."""
+    slots = _slot_names(cls)
+    for name in names:
+        if name not in slots:
+            raise ValueError(
+                "not a slot of token class {}: {!r}".format(cls.__name__, name)
+            )
+    if has_dict and not cls.__dictoffset__:
+        raise ValueError("token class has no __dict__: {}".format(cls.__name__))
+
+
+def _read_value(next_byte, strings, types):
+    """Read a single value, recursively."""
+    new = object.__new__
+    setter = object.__setattr__
+
+    def varint():
+        byte = next_byte()
+        if byte < 0x80:
+            return byte
+        value = byte & 0x7F
+        shift = 7
+        while byte & 0x80:
+            byte = next_byte()
+            value |= (byte & 0x7F) << shift
+            shift += 7
+        return value
+
+    def read():
+        tag = next_byte()
+        if tag >= _SMALL_INT:
+            return tag - _SMALL_INT
+        if tag >= _TOKEN_TAG or tag == _TOKEN:
+            cls, names, has_dict = types[
+                tag - _TOKEN_TAG if tag != _TOKEN else varint()
+            ]
+            token = new(cls)
+            for name in names:
+                value = read()
+                if value is not _UNSET_VALUE:
+                    setter(token, name, value)
+            if has_dict:
+                value = read()
+                if type(value) is dict:
+                    token.__dict__.update(value)
+                elif value is not _UNSET_VALUE:
+                    raise ValueError("token __dict__ is not a dict")
+            return token
+        if tag == _STR:
+            return strings[varint()]
+        if tag == _LIST:
+            return [read() for _ in range(varint())]
+        if tag == _NONE:
+            return None
+        if tag == _POSITION_LINES:
+            position = new(Position)
+            position.line_start = varint()
+            end = varint()
+            position.line_end = end - 1 if end else None
+            position.uri = None
+            position.data = {}
+            return position
+        if tag == _PARSE_BUFFER:
+            loose = read()
+            # (not a generator, which would turn StopIteration into RuntimeError)
+            buffer = ParseBuffer([read() for _ in range(varint())])
+            buffer.loose = loose
+            return buffer
+        if tag == _TRUE:
+            return True
+        if tag == _FALSE:
+            return False
+        if tag == _INT:
+            value = varint()
+            return -((value + 1) >> 1) if value & 1 else value >> 1
+        if tag == _UNSET:
+            return _UNSET_VALUE
+        if tag == _TUPLE:
+            return tuple([read() for _ in range(varint())])
+        if tag == _DICT or tag == _ORDERED_DICT:
+            items = [(read(), read()) for _ in range(varint())]
+            return dict(items) if tag == _DICT else OrderedDict(items)
+        if tag == _POSITION:
+            position = new(Position)
+            position.line_start = read()
+            position.line_end = read()
+            position.uri = read()
+            position.data = read()
+            return position
+        if tag == _COMPACT_POSITION:
+            start = varint()
+            end = varint()
+            return CompactPosition((start, end - 1 if end else None))
+        if tag == _FLOAT:
+            return _FLOAT_STRUCT.unpack(bytes([next_byte() for _ in range(8)]))[0]
+        raise ValueError("invalid tag in serialized data: {}".format(tag))
+
+    return read()
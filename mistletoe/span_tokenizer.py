@@ -1,21 +1,51 @@
 """
 Inline tokenizer for mistletoe.
 """
-from mistletoe.parse_context import get_parse_context
+import re
+
+from mistletoe.base_elements import SpanToken
+from mistletoe.parse_context import get_parse_context, OrderedSet, ParseAborted
 
 
 def tokenize_span(string, token_types=None):
     """Convert a string to a list of span tokens.
 
+    The search for tokens is performed by the ``span_engine``
+    set in the global context:
+    either ``"finditer"`` (each token is searched for in turn),
+    or ``"scanner"`` (see ``SpanScanner``).
+
     :param string: the string to parse
     :param token_types: override block-level tokens set in global context
 
     :returns: list of span-level token instances.
     """
+    parse_context = get_parse_context()
+    if parse_context.abort is not None and parse_context.abort():
+        raise ParseAborted()
     if token_types is None:
-        token_types = get_parse_context().span_tokens
-    *token_types, fallback_token = token_types
-    tokens = find_tokens(string, token_types, fallback_token)
+        token_types = parse_context.span_tokens
+    profiler = parse_context.profiler
+    if parse_context.span_engine == "scanner":
+        if isinstance(token_types, OrderedSet):
+            scanner = token_types.cached("span_scanner", SpanScanner)
+        else:
+            scanner = SpanScanner(token_types)
+        if profiler is None:
+            tokens = scanner.find_tokens(string)
+        else:
+            tokens = profiler.call(
+                "span.find", "SpanScanner", scanner.find_tokens, string
+            )
+        fallback_token = scanner.fallback_token
+    else:
+        *token_types, fallback_token = token_types
+        if profiler is None:
+            tokens = find_tokens(string, token_types, fallback_token)
+        else:
+            tokens = profiler.find_tokens(string, token_types, fallback_token)
+    if profiler is not None:
+        profiler.time_parse_tokens(tokens)
     token_buffer = []
     if tokens:
         prev = tokens[0]
@@ -35,6 +65,147 @@ def find_tokens(string, token_types, fallback_token):
     return sorted(tokens)
 
 
+class SpanScanner:
+    """Search for all span tokens in a single left-to-right pass of the string.
+
+    The patterns of all tokens that use the default ``SpanToken.find``
+    are compiled into a single alternation (with one named group per token).
+    Tokens that override ``find`` (such as ``CoreTokens``) are still called in turn.
+    The returned ``ParseToken`` are identical to those of ``find_tokens``.
+
+    :param token_types: the span tokens to search for (the last being the fallback)
+    """
+
+    # patterns with back-references or named groups are not embedded
+    # in the alternation, since their group numbers/names would be changed
+    _uncombinable = re.compile(r"\\[1-9]|\(\?P[<=]")
+
+    def __init__(self, token_types):
+        *token_types, self.fallback_token = token_types
+        self.token_types = tuple(token_types)
+        self.pattern_tokens = tuple(
+            t
+            for t in self.token_types
+            if t.pattern is not None
+            and getattr(t.find, "__func__", None) is SpanToken.find.__func__
+            and not self._uncombinable.search(t.pattern.pattern)
+        )
+        self.combined = None
+        self._groups = {}
+        if not self.pattern_tokens:
+            return
+        alternatives = []
+        group_index = 1
+        for index, token_type in enumerate(self.pattern_tokens):
+            self._groups["_t{}".format(index)] = (index, group_index)
+            group_index += token_type.pattern.groups + 1
+            alternatives.append(
+                "(?P<_t{0}>(?{1}:{2}))".format(
+                    index,
+                    self._inline_flags(token_type.pattern.flags),
+                    token_type.pattern.pattern,
+                )
+            )
+        prefilter = self._prefilter(self.pattern_tokens)
+        self.combined = re.compile(prefilter + "(?:" + "|".join(alternatives) + ")")
+
+    @staticmethod
+    def _inline_flags(flags):
+        return "".join(
+            char
+            for char, flag in (("i", re.I), ("m", re.M), ("s", re.S), ("x", re.X))
+            if flags & flag
+        ) or "-x"
+
+    @staticmethod
+    def _prefilter(token_types):
+        """Return a lookahead for the possible first characters of a match,
+        or an empty string if any token does not declare ``start_chars``.
+        """
+        chars = set()
+        for token_type in token_types:
+            if token_type.start_chars is None:
+                return ""
+            chars.update(token_type.start_chars)
+        return "(?=[{}])".format("".join(re.escape(c) for c in sorted(chars)))
+
+    def scan(self, string):
+        """Return a mapping of pattern tokens to their (non-overlapping) matches."""
+        found = {token_type: [] for token_type in self.pattern_tokens}
+        if self.combined is None:
+            return found
+        next_pos = [0] * len(self.pattern_tokens)
+        search = self.combined.search
+        match = search(string)
+        while match is not None:
+            pos = match.start()
+            first, group_index = self._groups[match.lastgroup]
+            if pos >= next_pos[first]:
+                found[self.pattern_tokens[first]].append(
+                    GroupMatch(match, group_index)
+                )
+                next_pos[first] = match.end() if match.end() > pos else pos + 1
+            # other tokens may also match at this position
+            for index in range(first + 1, len(self.pattern_tokens)):
+                token_type = self.pattern_tokens[index]
+                if pos < next_pos[index] or (
+                    token_type.start_chars is not None
+                    and string[pos] not in token_type.start_chars
+                ):
+                    continue
+                other = token_type.pattern.match(string, pos)
+                if other is not None:
+                    found[token_type].append(other)
+                    next_pos[index] = other.end() if other.end() > pos else pos + 1
+            match = search(string, pos + 1)
+        return found
+
+    def find_tokens(self, string):
+        """Return the sorted ``ParseToken`` for all span tokens in the string."""
+        found = None
+        tokens = []
+        for token_type in self.token_types:
+            if token_type in self.pattern_tokens:
+                if found is None:
+                    found = self.scan(string)
+                matches = found[token_type]
+            else:
+                matches = token_type.find(string)
+            for m in matches:
+                tokens.append(
+                    ParseToken(
+                        m.start(), m.end(), m, string, token_type, self.fallback_token
+                    )
+                )
+        return sorted(tokens)
+
+
+class GroupMatch:
+    """A view of a single alternative within a ``SpanScanner`` match,
+    with group numbers relative to the original token pattern.
+    """
+
+    __slots__ = ("_match", "_offset")
+
+    def __init__(self, match, offset):
+        self._match = match
+        self._offset = offset
+
+    def start(self, n=0):
+        return self._match.start(self._offset + n)
+
+    def end(self, n=0):
+        return self._match.end(self._offset + n)
+
+    def group(self, n=0):
+        return self._match.group(self._offset + n)
+
+    def __repr__(self):
+        return "<GroupMatch span=({},{}) match={!r}>".format(
+            self.start(), self.end(), self.group()
+        )
+
+
 def eval_tokens(x, y, token_buffer):
     r = relation(x, y)
     if r == 0:
@@ -25,6 +25,8 @@ __all__ = [
 
 
 class CoreTokens(SpanToken):
+    __slots__ = ()
+
     precedence = 3
 
     @classmethod
@@ -45,6 +47,8 @@ class Strong(SpanToken):
     :param children: list of child tokens
     """
 
+    __slots__ = ("content", "children")
+
 
 class Emphasis(SpanToken):
     """
@@ -54,6 +58,8 @@ class Emphasis(SpanToken):
     :param children: list of child tokens
     """
 
+    __slots__ = ("content", "children")
+
 
 @autodoc
 @attr.s(kw_only=True, slots=True)
@@ -138,6 +144,7 @@ class AutoLink(SpanToken):
         r"(?<!\\)(?:\\\\)*<([A-Za-z][A-Za-z0-9+.-]{1,31}:[^ <>]*?|[A-Za-z0-9.!#$%&'*+/=?^_`{|}~-]+@[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?(?:\.[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?)*)>"  # noqa: E501
     )
     parse_inner = False
+    start_chars = "\\<"
 
     target: str = attr.ib(metadata={"doc": "link target"})
     mailto: bool = attr.ib(default=False, metadata={"doc": "if the link is an email"})
@@ -170,6 +177,7 @@ class EscapeSequence(SpanToken):
     pattern = re.compile(r"\\([!\"#$%&'()*+,-./:;<=>?@\[\\\]^_`{|}~])")
     parse_inner = False
     precedence = 2
+    start_chars = "\\"
 
     children: list = attr.ib(
         repr=False, metadata={"doc": "a single RawText node for alternative text."}
@@ -197,6 +205,7 @@ class LineBreak(SpanToken):
     pattern = re.compile(r"( *|\\)\n")
     parse_inner = False
     parse_group = 0
+    start_chars = " \\\n"
 
     content: bool = attr.ib(default="", repr=False, metadata={"doc": "raw content."})
     soft: bool = attr.ib(metadata={"doc": "if the break is soft or hard."})
@@ -317,6 +326,8 @@ class HTMLSpan(SpanToken):
     :param children: list of child tokens
     """
 
+    __slots__ = ("content", "children")
+
     pattern = re.compile(
         "|".join(
             [_open_tag, _closing_tag, _comment, _instruction, _declaration, _cdata]
@@ -325,3 +336,4 @@ class HTMLSpan(SpanToken):
     )
     parse_inner = False
     parse_group = 0
+    start_chars = "<"
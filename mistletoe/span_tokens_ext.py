@@ -17,6 +17,8 @@ class Strikethrough(SpanToken):
     Must be ordered after `CoreTokens` in the parsing list.
     """
 
+    __slots__ = ("content", "children")
+
     pattern = re.compile(r"(?<!\\)(?:\\\\)*~~(.+?)~~", re.DOTALL)
 
     @classmethod
@@ -31,6 +33,8 @@ class Math(SpanToken):
     Must be ordered after `CoreTokens` in the parsing list.
     """
 
+    __slots__ = ("content", "children")
+
     pattern = re.compile(r"(?<!\\)(?:\\\\)*(\${1,2})([^\$]+?)\1")
     parse_inner = False
     parse_group = 0
@@ -59,7 +63,7 @@ class FootReference(SpanToken):
     Must be ordered after `CoreTokens` in the token parsing list.
     """
 
-    pattern = re.compile(r"^\[\^([a-zA-Z0-9#@]+)\]")
+    pattern = re.compile(r"\[\^([a-zA-Z0-9#@]+)\]")
     parse_inner = False
     parse_group = 0
 
@@ -1,4 +1,5 @@
 from mistletoe import block_tokens, block_tokens_ext, span_tokens, span_tokens_ext
+from mistletoe.parse_context import TokenSetConfig
 
 
 def get_commonmark_block_tokens():
@@ -56,3 +57,15 @@ def get_extended_span_tokens():
         span_tokens.LineBreak,
         span_tokens.RawText,
     )
+
+
+def get_commonmark_config():
+    """Return the (shared) ``TokenSetConfig`` of the CommonMark tokens."""
+    return TokenSetConfig.get(
+        get_commonmark_block_tokens(), get_commonmark_span_tokens()
+    )
+
+
+def get_extended_config():
+    """Return the (shared) ``TokenSetConfig`` of the extended tokens."""
+    return TokenSetConfig.get(get_extended_block_tokens(), get_extended_span_tokens())
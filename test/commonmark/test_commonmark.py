@@ -1,9 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
 import json
 import os
+import sys
 
 import pytest
 
-from mistletoe import Document
+from mistletoe import Document, markdown
 from mistletoe.renderers.html import HTMLRenderer
 
 with open(os.path.join(os.path.dirname(__file__), "commonmark.json"), "r") as fin:
@@ -16,3 +18,27 @@ def test_commonmark(entry):
     with HTMLRenderer() as renderer:
         output = renderer.render(Document.read(test_case))
     assert entry["html"] == output
+
+
+def test_commonmark_threads():
+    """Render the spec concurrently, from 32 threads (each in a different order)."""
+    expected = [entry["html"] for entry in tests]
+
+    def render_all(offset):
+        outputs = [None] * len(tests)
+        for index in range(offset, offset + len(tests)):
+            index %= len(tests)
+            outputs[index] = markdown(tests[index]["markdown"])
+        return outputs
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-3)
+    try:
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            offsets = range(0, len(tests), len(tests) // 32 + 1)
+            results = list(executor.map(render_all, offsets))
+    finally:
+        sys.setswitchinterval(interval)
+    assert len(results) == 32
+    for outputs in results:
+        assert outputs == expected
@@ -0,0 +1,190 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from mistletoe import aio, markdown, Document
+from mistletoe.parse_context import ParseAborted
+from mistletoe.renderers.html import HTMLRenderer
+
+# a document that takes (at least) seconds to parse
+HUGE = "- a *b*\n\n" * 100000
+# a single paragraph that takes (at least) seconds to parse
+HUGE_PARAGRAPH = "*a* [b](c) " * 100000
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+class CountingRenderer(HTMLRenderer):
+    """A renderer recording its instances (and contexts), and concurrent renders."""
+
+    lock = threading.Lock()
+    instances = 0
+    contexts = set()
+    renders = 0
+    running = 0
+    max_running = 0
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        with self.lock:
+            CountingRenderer.instances += 1
+            CountingRenderer.contexts.add(id(self.parse_context))
+
+    def render_document(self, token):
+        with self.lock:
+            CountingRenderer.renders += 1
+            CountingRenderer.running += 1
+            CountingRenderer.max_running = max(
+                CountingRenderer.max_running, CountingRenderer.running
+            )
+        time.sleep(0.05)
+        with self.lock:
+            CountingRenderer.running -= 1
+        return super().render_document(token)
+
+    @classmethod
+    def reset(cls):
+        cls.instances = cls.renders = cls.running = cls.max_running = 0
+        cls.contexts = set()
+
+
+@pytest.fixture()
+def counting():
+    CountingRenderer.reset()
+    yield CountingRenderer
+    CountingRenderer.reset()
+
+
+def test_render():
+    text = "# a\n\nsome *text* [b]\n\n[b]: c\n"
+    assert run(aio.render(text)) == markdown(text)
+    assert aio.get_service() is aio.get_service(HTMLRenderer)
+
+
+def test_reuse_parse_context(counting):
+    service = aio.RenderService(counting, max_workers=1)
+
+    async def main():
+        for text in ("a", "b", "c"):
+            assert await service.render(text) == "<p>{}</p>\n".format(text)
+
+    run(main())
+    service.close()
+    # the renderer (and parse context) of the worker is reused
+    assert counting.instances == 1
+    assert len(counting.contexts) == 1
+    assert counting.renders == 3
+
+
+def test_max_concurrency(counting):
+    service = aio.RenderService(counting, max_workers=4, max_concurrency=2)
+
+    async def main():
+        return await asyncio.gather(*(service.render(str(i)) for i in range(6)))
+
+    assert run(main()) == ["<p>{}</p>\n".format(i) for i in range(6)]
+    service.close()
+    assert counting.renders == 6
+    assert counting.max_running == 2
+
+
+def test_coalesce(counting):
+    service = aio.RenderService(counting, max_workers=4)
+
+    async def main():
+        results = await asyncio.gather(*(service.render("a") for _ in range(5)))
+        return results + [await service.render("a")]
+
+    assert run(main()) == ["<p>a</p>\n"] * 6
+    assert counting.renders == 2
+    service.coalesce = False
+    run(main())
+    service.close()
+    assert counting.renders == 8
+
+
+def test_timeout():
+    service = aio.RenderService(max_workers=1, timeout=0.05)
+
+    async def main():
+        with pytest.raises(asyncio.TimeoutError):
+            await service.render(HUGE)
+        # the worker is freed by the aborted parse
+        start = time.perf_counter()
+        assert await service.render("a", timeout=None) == "<p>a</p>\n"
+        return time.perf_counter() - start
+
+    assert run(main()) < 0.5
+    service.close()
+
+
+def test_timeout_paragraph():
+    """A parse is aborted within a long paragraph."""
+    service = aio.RenderService(max_workers=1, timeout=0.05)
+
+    async def main():
+        start = time.perf_counter()
+        with pytest.raises(asyncio.TimeoutError):
+            await service.render(HUGE_PARAGRAPH)
+        assert await service.render("a", timeout=None) == "<p>a</p>\n"
+        return time.perf_counter() - start
+
+    assert run(main()) < 1
+    service.close()
+
+
+def test_abort_render():
+    with HTMLRenderer() as renderer:
+        doc = Document.read("a\n\nb\n")
+        renderer.parse_context.abort = lambda: True
+        try:
+            with pytest.raises(ParseAborted):
+                renderer.render(doc)
+        finally:
+            renderer.parse_context.abort = None
+
+
+def test_cancel():
+    service = aio.RenderService(max_workers=1)
+
+    async def main():
+        task = asyncio.ensure_future(service.render(HUGE))
+        other = asyncio.ensure_future(service.render(HUGE))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.sleep(0.05)
+        # the render continues, for the other request
+        assert not other.done()
+        other.cancel()
+        for cancelled in (task, other):
+            with pytest.raises(asyncio.CancelledError):
+                await cancelled
+        start = time.perf_counter()
+        assert await service.render("a") == "<p>a</p>\n"
+        return time.perf_counter() - start
+
+    assert run(main()) < 0.5
+    service.close()
+
+
+def test_process_pool():
+    service = aio.RenderService(executor="process", max_workers=1)
+
+    async def main():
+        return await asyncio.gather(service.render("*a*"), service.render("b"))
+
+    assert run(main()) == ["<p><em>a</em></p>\n", "<p>b</p>\n"]
+    service.close()
+
+
+def test_bad_executor():
+    with pytest.raises(ValueError):
+        aio.RenderService(executor="other")
@@ -1,6 +1,16 @@
+import pickle
 from textwrap import dedent
 
-from mistletoe import Document
+import pytest
+
+from mistletoe import Document, HTMLRenderer, ParseContext, token_sets
+from mistletoe.base_elements import (
+    CompactPosition,
+    MappedLines,
+    Position,
+    SourceLines,
+    serialize_tokens,
+)
 
 
 def test_walk():
@@ -29,3 +39,116 @@ def test_walk():
         ("Emphasis", "Link", 3),
         ("RawText", "Emphasis", 4),
     ]
+
+
+def test_tokens_slotted():
+    doc = Document.read("# a\n\n*b* **c** <d> e\\\nf\n\n- g\n")
+    for item in doc.walk(include_self=True):
+        assert not hasattr(item.node, "__dict__"), item.node.name
+    emphasis = doc.children[1].children[0]
+    # the fallbacks of unset attributes
+    assert emphasis.content == ""
+    assert emphasis.position is None
+    assert doc.children[0].children[0].children is None
+    assert emphasis.to_dict() == {"children": emphasis.children}
+    copied = pickle.loads(pickle.dumps(doc))
+    assert serialize_tokens(copied) == serialize_tokens(doc)
+
+
+def test_compact_positions():
+    text = "# a\n\nb\nc\n\n| d |\n| --- |\n| e |\n"
+    context = ParseContext(find_blocks=token_sets.get_extended_block_tokens())
+    with HTMLRenderer(parse_context=context):
+        full = Document.read(text)
+    context.compact_positions = True
+    with HTMLRenderer(parse_context=context):
+        doc = Document.read(text)
+        heading, paragraph, table = doc.children
+        assert isinstance(heading.position, CompactPosition)
+        assert heading.position == (1, None)
+        assert paragraph.position.line_start == 3
+        assert paragraph.position.line_end == 4
+        assert paragraph.position.uri is None
+        assert table.header.position == (6, None)
+        assert table.children[0].position == (8, None)
+        assert paragraph.position.to_dict() == {
+            "line_start": 3,
+            "line_end": 4,
+            "uri": None,
+            "data": {},
+        }
+        assert paragraph.position.make_loc_str() == ":3:4"
+        assert repr(paragraph.position) == "CompactPosition(lines=[3:4])"
+        assert pickle.loads(pickle.dumps(doc)).children[1].position == (3, 4)
+        compact = serialize_tokens(doc)
+        doc.reparse(text.replace("c\n", "c\nx\n"), (3, 4))
+        assert doc.children[-1].position == (7, 9)
+        assert doc.children[-1].header.position == (7, None)
+    assert isinstance(full.children[0].position, Position)
+    assert compact == serialize_tokens(full)
+
+
+def test_position_make():
+    """The lines record whether positions are compact, for the parse."""
+    lines = SourceLines("a\n")
+    context = ParseContext(compact_positions=True)
+    with HTMLRenderer(parse_context=context):
+        assert isinstance(Position.make(1, lines=lines), CompactPosition)
+        lines.compact_positions = False
+        assert isinstance(Position.make(1, lines=lines), Position)
+        assert isinstance(Position.make(1), CompactPosition)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        b"\xef\xbb\xbf",
+        b"\xef\xbb\xbf# a\n",
+        b"a\r\nb\r\n\r\n- c",
+        b"a\rb\r\rc\n",
+        b"# \xc3\xa9\n\nx *y*\n",
+        b"a\n\n\n",
+    ],
+)
+def test_source_lines_from_path(tmp_path, data):
+    path = tmp_path / "source.md"
+    path.write_bytes(data)
+    text = data.decode("utf-8-sig").replace("\r\n", "\n").replace("\r", "\n")
+    expected = [line.rstrip("\n") + "\n" for line in text.splitlines(keepends=True)]
+    with SourceLines.from_path(path) as lines:
+        assert list(lines.lines) == expected
+        assert serialize_tokens(Document.read(lines)) == serialize_tokens(
+            Document.read(expected)
+        )
+
+
+def test_source_lines_from_path_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(MappedLines, "chunk_size", 2)
+    path = tmp_path / "source.md"
+    path.write_bytes(b"a\r\nb\nc\rd")
+    lines = SourceLines.from_path(path, standardize_ends=False)
+    assert lines.lines[::-1] == ["d", "c\r", "b\n", "a\r\n"]
+    lines = SourceLines.from_path(path)
+    assert lines.lines[-1] == "d\n"
+    assert lines.lines[1:3] == ["b\n", "c\n"]
+    assert [next(lines), lines.peek(), next(lines)] == ["a\n", "b\n", "b\n"]
+    with pytest.raises(IndexError):
+        lines.lines[4]
+    lines.close()
+
+
+@pytest.mark.parametrize(
+    "lines,expected",
+    [
+        ("a\nb", ["a\n", "b\n"]),
+        ("a\r\nb\rc\r\n", ["a\n", "b\n", "c\n"]),
+        ("a\x0cb\n", ["a\x0c\n", "b\n"]),
+        (["a\n", "b\n"], ["a\n", "b\n"]),
+        (["a", "b\r", "c\r\n", "d\re\n"], ["a\n", "b\n", "c\n", "d\re\n"]),
+        (iter(["a\n", "b"]), ["a\n", "b\n"]),
+        ([], []),
+    ],
+)
+def test_standardize_ends(lines, expected):
+    assert SourceLines(lines, standardize_ends=True).lines == expected
@@ -0,0 +1,47 @@
+import pathlib
+import tempfile
+
+import pytest
+
+from mistletoe import markdown
+from mistletoe.batch import render_many
+from mistletoe.renderers.latex import LaTeXRenderer
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_render_many(jobs):
+    with tempfile.TemporaryDirectory() as tempdir:
+        path = pathlib.Path(tempdir).joinpath("test.md")
+        path.write_text("[a]: b\n\n[a]")
+        sources = ["# a", path, pathlib.Path(tempdir).joinpath("missing.md"), "*b*"]
+        results = list(render_many(sources, jobs=jobs))
+    assert [r.index for r in results] == [0, 1, 2, 3]
+    assert [r.output for r in results] == [
+        markdown("# a"),
+        markdown("[a]: b\n\n[a]"),
+        None,
+        markdown("*b*"),
+    ]
+    assert results[2].error.strip().endswith("missing.md'")
+
+
+def test_render_many_unordered():
+    sources = ["*{}*".format(i) for i in range(10)]
+    results = list(render_many(sources, jobs=2, ordered=False, chunksize=3))
+    assert sorted(r.index for r in results) == list(range(10))
+    for result in results:
+        assert result.output == markdown(result.source)
+
+
+def test_render_many_renderer():
+    results = list(render_many(["*a*"], renderer=LaTeXRenderer))
+    assert results[0].output == markdown("*a*", LaTeXRenderer)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_render_many_renderer_state(jobs):
+    """No per-document state (e.g. LaTeX packages) is carried between documents."""
+    sources = ["~~a~~\n\n```\nb\n```\n", "c\n", "> d\n", "e\n"] * 2
+    results = list(render_many(sources, renderer=LaTeXRenderer, jobs=jobs))
+    for result in results:
+        assert result.output == markdown(result.source, LaTeXRenderer)
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from mistletoe.cli import benchmark, benchmark_suite
+from mistletoe.parse_context import ParseContext
+
+
+def test_collect_documents(tmp_path):
+    tmp_path.joinpath("a.md").write_text("# a")
+    tmp_path.joinpath("sub").mkdir()
+    tmp_path.joinpath("sub", "b.md").write_text("b")
+    tmp_path.joinpath("c.txt").write_text("c")
+    documents = benchmark_suite.collect_documents([str(tmp_path)], synthetic=False)
+    assert [text for _, text in documents] == ["# a", "b"]
+    documents = benchmark_suite.collect_documents(
+        [str(tmp_path.joinpath("*.txt"))], synthetic=True
+    )
+    assert [name for name, _ in documents][1:] == list(benchmark_suite.SYNTHETIC)
+
+
+@pytest.mark.parametrize("name", list(benchmark_suite.SYNTHETIC))
+def test_synthetic(name):
+    text = benchmark_suite.SYNTHETIC[name]()
+    result = benchmark_suite.benchmark_document(
+        text, ParseContext(), iterations=1, warmup=0, memory=False
+    )
+    assert result["bytes"] == len(text)
+    assert result["lines"]["median"] <= result["parse"]["median"]
+    assert result["peak_memory"] is None
+
+
+@pytest.mark.parametrize("name", list(benchmark_suite.pathological_documents(10)))
+def test_pathological(name):
+    # the time per input should be (roughly) linear in its length
+    text, pattern = benchmark_suite.pathological_documents(10000)[name]
+    status, _ = benchmark_suite.check_pathological(
+        text, pattern, ParseContext(), time_limit=2.0
+    )
+    assert status == "ok"
+
+
+def test_pathological_timeout():
+    text, pattern = benchmark_suite.pathological_documents(100)["nested brackets"]
+    assert benchmark_suite.check_pathological(
+        text, pattern, ParseContext(), time_limit=0
+    )[0] == "timeout"
+    assert benchmark_suite.check_pathological(text, "other", ParseContext())[0] == (
+        "failed"
+    )
+
+
+def test_pathological_cli(capsys):
+    benchmark.main(["--pathological", "--time-limit", "5"])
+    assert "nested brackets" in capsys.readouterr().out
+
+
+def test_percentile():
+    values = [5.0, 1.0, 4.0, 2.0, 3.0]
+    assert benchmark_suite.percentile(values, 0.5) == 3.0
+    assert benchmark_suite.percentile(values, 0.99) == 5.0
+    assert benchmark_suite.percentile(values, 0.0) == 1.0
+
+
+def test_compare_results():
+    def make(seconds):
+        return {
+            "documents": {"a": {"total": {"median": seconds}}},
+            "aggregate": {"seconds": seconds},
+        }
+
+    assert benchmark_suite.compare_results(make(1.05), make(1.0), 0.1) == []
+    assert len(benchmark_suite.compare_results(make(1.2), make(1.0), 0.1)) == 2
+
+
+def test_suite_cli(tmp_path, capsys):
+    path = tmp_path.joinpath("a.md")
+    path.write_text("# a\n\n*b*\n")
+    json_path = tmp_path.joinpath("results.json")
+    args = [str(path), "--suite", "-n", "2", "--no-synthetic", "--json", str(json_path)]
+    benchmark.main(args)
+    results = json.loads(json_path.read_text())
+    assert len(results["documents"]) == 1
+    assert list(results["documents"].values())[0]["peak_memory"] > 0
+    assert list(results["documents"].values())[0]["tokens"] == 5
+    assert list(results["documents"].values())[0]["bytes_per_token"] > 0
+    assert "1 document(s)" in capsys.readouterr().out
+
+    for document in results["documents"].values():
+        document["total"]["median"] /= 100
+    results["aggregate"]["seconds"] /= 100
+    baseline_path = tmp_path.joinpath("baseline.json")
+    baseline_path.write_text(json.dumps(results))
+    with pytest.raises(SystemExit):
+        benchmark.main(args + ["--baseline", str(baseline_path)])
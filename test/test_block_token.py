@@ -1,9 +1,23 @@
 import pytest
 
+import mistletoe
 from mistletoe import block_tokens, block_tokens_ext
-from mistletoe.base_elements import serialize_tokens
+from mistletoe.base_elements import (
+    LazySpans,
+    SourceLines,
+    SpanContainer,
+    StreamSourceLines,
+    serialize_tokens,
+)
 from mistletoe.parse_context import get_parse_context
-from mistletoe.block_tokenizer import tokenize_main
+from mistletoe.block_tokenizer import (
+    StartDispatch,
+    expand_span_containers,
+    outline,
+    tokenize_block,
+    tokenize_main,
+    tokenize_stream,
+)
 
 
 @pytest.mark.parametrize(
@@ -288,3 +302,185 @@ def test_table_row(name, source, row_align, data_regression):
 def test_table_cell(data_regression):
     token = block_tokens_ext.TableCell.read("cell 2")
     data_regression.check(serialize_tokens(token, as_dict=True))
+
+
+def test_start_dispatch():
+    block_set = get_parse_context().block_tokens
+    dispatch = block_set.cached("start_dispatch", StartDispatch)
+    assert dispatch.candidates("# heading\n") == (
+        block_tokens.Heading,
+        block_tokens_ext.Table,
+        block_tokens.Paragraph,
+    )
+    assert dispatch.candidates("   > quote\n")[0] == block_tokens.Quote
+    assert dispatch.candidates("    code\n") == tuple(block_set)
+    assert dispatch.candidates("\tcode\n") == tuple(block_set)
+    assert dispatch.candidates("text\n") == (
+        block_tokens_ext.Table,
+        block_tokens.Paragraph,
+    )
+    # the dispatch is rebuilt when the token set is mutated
+    block_set.discard(block_tokens.Heading)
+    dispatch = block_set.cached("start_dispatch", StartDispatch)
+    assert block_tokens.Heading not in dispatch.candidates("# heading\n")
+
+
+@pytest.mark.parametrize(
+    "name,old,changed_range,replace",
+    [
+        ("edit_paragraph", ["# a\n", "\n", "b\n", "\n", "c\n"], (2, 3), ["b *x*\n"]),
+        ("insert_lines", ["# a\n", "\n", "b\n"], (1, 1), ["- x\n", "- y\n", "\n"]),
+        ("delete_lines", ["a\n", "\n", "- b\n", "\n", "c\n"], (1, 3), []),
+        ("open_fence", ["a\n", "\n", "b\n", "\n", "c\n"], (1, 2), ["```\n"]),
+        ("lazy_continuation", ["> a\n", "\n", "b\n"], (1, 2), []),
+        ("add_definition", ["[a]\n", "\n", "b\n"], (2, 3), ["[a]: /url\n"]),
+        ("edit_definition", ["[a]\n", "\n", "[a]: /url\n"], (2, 3), ["[a]: /b\n"]),
+    ],
+)
+def test_reparse(name, old, changed_range, replace):
+    document = block_tokens.Document.read(old)
+    start, stop = changed_range
+    new = old[:start] + replace + old[stop:]
+    assert document.reparse(new, changed_range) is document
+    expected = block_tokens.Document.read(new)
+    assert serialize_tokens(document) == serialize_tokens(expected)
+    assert document.link_definitions == expected.link_definitions
+
+
+def test_reparse_reuses_blocks():
+    old = ["# a\n", "\n", "b\n", "\n", "c\n", "\n", "d\n"]
+    document = block_tokens.Document.read(old)
+    first, last = document.children[0], document.children[-1]
+    document.reparse(old[:4] + ["e\n"] + old[5:], (4, 5))
+    assert document.children[0] is first
+    assert document.children[-1] is last
+    assert document.children[2].children[0].content == "e"
+
+
+def test_reparse_bad_range():
+    document = block_tokens.Document.read(["a\n"])
+    with pytest.raises(ValueError):
+        document.reparse(["a\n"], (0, 2))
+
+
+def test_iter_read():
+    source = ["---\n", "a: 1\n", "---\n", "# a\n", "[b]: /c\n", "[b]\n", "\n", "> d\n"]
+    tokens = block_tokens.Document.iter_read(iter(source), front_matter=True)
+    assert next(tokens).name == "FrontMatter"
+    assert next(tokens).name == "Heading"
+    assert get_parse_context().link_definitions == {}
+    remaining = serialize_tokens(list(tokens))
+    assert get_parse_context().link_definitions == {"b": ("/c", "")}
+    assert remaining == serialize_tokens(
+        block_tokens.Document.read(source, front_matter=True).children[1:]
+    )
+
+
+def test_tokenize_stream_unexpanded():
+    tokens = list(tokenize_stream(["a *b*\n"], expand_spans=None))
+    assert isinstance(tokens[0].children, SpanContainer)
+    with pytest.raises(ValueError):
+        next(tokenize_stream(["a"], expand_spans="other"))
+
+
+def test_tokenize_stream_barrier():
+    source = ["a\n", "\n", "x[^2] [b]\n", "\n", "c\n", "\n", "[b]: /u\n", "[^2]: d\n"]
+    source += ["\n", "e [f]\n", "\n", "g\n"]
+    pulled = []
+
+    def lines():
+        for line in source:
+            pulled.append(line)
+            yield line
+
+    tokens = tokenize_stream(lines())
+    assert next(tokens).children[0].content == "a"
+    assert len(pulled) <= 3
+    # held back until its references are defined
+    token = next(tokens)
+    assert "[^2]: d\n" in pulled
+    assert "e [f]\n" not in pulled
+    assert next(tokens).children[0].content == "c"
+    # "[f]" is never defined, so the rest is held back to the end
+    remaining = list(tokens)
+    assert [token.children[0].content for token in remaining] == ["e [f]", "g"]
+    children = block_tokens.Document.read(source).children
+    assert [child.name for child in children[1].children] == [
+        "RawText",
+        "Link",
+        "RawText",
+        "Link",
+    ]
+    assert serialize_tokens([token]) == serialize_tokens(children[1:2])
+    assert serialize_tokens(remaining) == serialize_tokens(children[3:])
+
+
+def test_stream_source_lines():
+    lines = StreamSourceLines(["a\n", "b\n", "c"], standardize_ends=True)
+    assert lines.peek() == "a\n"
+    assert next(lines) == "a\n"
+    assert next(lines) == "b\n"
+    lines.release()
+    assert lines.lines == ["b\n"]
+    assert lines.lineno == 2
+    lines.backstep()
+    assert next(lines) == "b\n"
+    assert next(lines) == "c\n"
+    assert lines.peek() is None
+
+
+def test_span_containers():
+    source = ["# a\n", "\n", "> *b*\n", "- c\n", "+ d\n"]
+    span_containers = get_parse_context().span_containers
+    tokens = tokenize_main(source)
+    assert span_containers == []
+    assert serialize_tokens(tokens) == serialize_tokens(list(tokenize_stream(source)))
+    tokenize_main(source, expand_spans=False)
+    assert span_containers == []
+    # recorded in document order (the list item re-read for "+" only once)
+    tokens = tokenize_block(SourceLines(source))
+    assert [token.children.text for token in span_containers] == ["a", "*b*", "c", "d"]
+    expand_span_containers()
+    assert span_containers == []
+    assert tokens[1].children[0].children[0].name == "Emphasis"
+
+
+def test_lazy_spans():
+    source = ["# a *b*\n", "\n", "[c]\n", "\n", "[c]: /d\n"]
+    document = block_tokens.Document.read(source, lazy_spans=True)
+    heading, paragraph = document.children
+    assert isinstance(heading.children, LazySpans)
+    assert not heading.children.expanded
+    # expanded against the definitions of the document, not the current context
+    get_parse_context(reset=True)
+    assert paragraph.children[0].name == "Link"
+    assert paragraph.children.expanded and not heading.children.expanded
+    assert [child.name for child in heading.children] == ["RawText", "Emphasis"]
+    assert serialize_tokens(document) == serialize_tokens(
+        block_tokens.Document.read(source)
+    )
+
+
+def test_outline():
+    source = [
+        "# a *b*\n",
+        "\n",
+        "- c\n",
+        "\n",
+        "  ```python\n",
+        "  d\n",
+        "  ```\n",
+        "\n",
+        "[e]: /f\n",
+    ]
+    entries = outline(source)
+    assert entries == [
+        ("Heading", 1, None, 1),
+        ("List", 2, 7, None),
+        ("ListItem", 2, 7, "-"),
+        ("Paragraph", 3, 3, None),
+        ("CodeFence", 5, 7, "python"),
+    ]
+    assert get_parse_context().outline is False
+    assert get_parse_context().link_definitions == {"e": ("/f", "")}
+    assert mistletoe.outline("a\n===\n") == [("SetextHeading", 1, 2, 1)]
@@ -0,0 +1,184 @@
+import os
+
+from mistletoe import markdown
+from mistletoe.base_elements import serialize_tokens
+from mistletoe.block_tokens import Document
+from mistletoe.cache import DiskCache, ParseCache
+from mistletoe.parse_context import get_parse_context
+from mistletoe.renderers.html import HTMLRenderer
+
+
+def test_hit_and_miss():
+    cache = ParseCache()
+    with HTMLRenderer():
+        first = cache.read("a *b* [c][^1]\n\n[c]: /url\n\n[^1]: foot\n")
+        get_parse_context().reset_definitions()
+        second = cache.read("a *b* [c][^1]\n\n[c]: /url\n\n[^1]: foot\n")
+        assert get_parse_context().link_definitions == {"c": ("/url", "")}
+        assert list(get_parse_context().foot_definitions) == ["1"]
+        assert list(get_parse_context().foot_references) == ["1"]
+        cache.read("a *b* [c][^1]\n", front_matter=True)
+    assert serialize_tokens(first) == serialize_tokens(second)
+    assert first is not second
+    assert cache.stats() == {
+        "entries": 2,
+        "bytes": cache.nbytes,
+        "hits": 1,
+        "misses": 2,
+        "evictions": 0,
+    }
+
+
+def test_copies_are_independent():
+    cache = ParseCache()
+    first = cache.read(["a *b*\n"])
+    first.children[0].children[0].content = "changed"
+    assert cache.read("a *b*\n").children[0].children[0].content == "a "
+    assert cache.hits == 1
+
+
+def test_key_includes_context():
+    cache = ParseCache()
+    cache.read("text")
+    block_tokens = get_parse_context().block_tokens
+    block_tokens.discard(list(block_tokens)[0])
+    cache.read("text")
+    assert cache.misses == 2
+    get_parse_context(reset=True)
+
+
+def test_key_includes_options():
+    cache = ParseCache()
+    parse_context = get_parse_context()
+    full = cache.read("# a\n\nb\n")
+    parse_context.outline = True
+    try:
+        outlined = cache.read("# a\n\nb\n")
+    finally:
+        parse_context.outline = False
+    assert cache.misses == 2
+    assert serialize_tokens(cache.read("# a\n\nb\n")) == serialize_tokens(full)
+    assert serialize_tokens(outlined) != serialize_tokens(full)
+    get_parse_context(reset=True)
+
+
+def test_eviction():
+    cache = ParseCache(max_entries=2)
+    for text in ["a", "b", "a", "c"]:
+        cache.read(text)
+    assert cache.evictions == 1
+    assert len(cache) == 2
+    cache.read("a")
+    assert cache.hits == 2
+    cache.read("b")
+    assert cache.misses == 4
+
+    cache = ParseCache(max_bytes=1)
+    cache.read("a")
+    assert len(cache) == 0 and cache.nbytes == 0
+
+
+def test_uncached_reads():
+    cache = ParseCache()
+    cache.read("a", reset_definitions=False)
+    assert cache.misses == 0 and len(cache) == 0
+
+
+def test_markdown():
+    cache = ParseCache()
+    assert markdown("*a*", parse_cache=cache) == markdown("*a*")
+    assert markdown("*a*", parse_cache=cache) == markdown("*a*")
+    assert cache.hits == 1
+    assert isinstance(cache.read("*a*"), Document)
+
+
+def test_render():
+    cache = ParseCache()
+    with HTMLRenderer() as renderer:
+        assert cache.render("*a*", renderer) == "<p><em>a</em></p>\n"
+        assert cache.render("*a*", renderer) == "<p><em>a</em></p>\n"
+        assert cache.hits == 1
+        cache.render("*a*", renderer, fingerprint="option")
+        assert cache.misses == 2
+
+
+def test_disk_cache(tmp_path):
+    cache = DiskCache(tmp_path / "cache")
+    with HTMLRenderer():
+        first = cache.read("a [c]\n\n[c]: /url\n")
+        get_parse_context().reset_definitions()
+        # a new instance (e.g. in another process) shares the entries
+        second = DiskCache(tmp_path / "cache").read("a [c]\n\n[c]: /url\n")
+        assert get_parse_context().link_definitions == {"c": ("/url", "")}
+    assert serialize_tokens(first) == serialize_tokens(second)
+    assert len(cache) == 1
+    assert not list((tmp_path / "cache").glob("*.tmp"))
+    # a corrupted entry is parsed (and stored) again
+    (path,) = (tmp_path / "cache").glob("*.entry")
+    path.write_bytes(b"corrupted")
+    third = cache.read("a [c]\n\n[c]: /url\n")
+    assert serialize_tokens(third) == serialize_tokens(first)
+    assert path.read_bytes() != b"corrupted"
+    cache.clear()
+    assert len(cache) == 0 and cache.nbytes == 0
+
+
+def test_disk_cache_eviction(tmp_path):
+    cache = DiskCache(tmp_path, max_entries=2)
+    with HTMLRenderer() as renderer:
+        for text in ["a", "b", "c"]:
+            cache.render(text, renderer)
+            # age the entries, to ensure distinct modification times
+            for _, _, path in cache._scan():
+                os.utime(path, (0, os.stat(path).st_mtime - 10))
+            if text == "b":
+                # "a" is now the most recently used, so "b" is evicted
+                cache.render("a", renderer)
+        assert cache.evictions == 1
+        assert len(cache) == 2
+        cache.render("a", renderer)
+        assert cache.hits == 2
+
+    cache = DiskCache(tmp_path / "small", max_bytes=1)
+    cache.read("a")
+    assert len(cache) == 0 and cache.stats()["bytes"] == 0
+
+
+def test_disk_cache_corrupted(tmp_path):
+    """Any entry which cannot be loaded is a miss, and removed."""
+    cache = DiskCache(tmp_path)
+    with HTMLRenderer() as renderer:
+        cache.read("# a *b*\n")
+        (path,) = tmp_path.glob("*.entry")
+        data = path.read_bytes()
+        for index in range(4, len(data)):
+            path.write_bytes(data[:index] + b"\xff" + data[index + 1 :])
+            cache.read("# a *b*\n")
+        cache.render("a", renderer)
+        (path,) = set(tmp_path.glob("*.entry")) - {path}
+        path.write_bytes(b"\xff")
+        misses = cache.misses
+        assert cache.render("a", renderer) == "<p>a</p>\n"
+        assert cache.misses == misses + 1
+        assert cache.render("a", renderer) == "<p>a</p>\n"
+        assert cache.hits and cache.misses == misses + 1
+
+
+def test_disk_cache_accounting(tmp_path):
+    cache = DiskCache(tmp_path)
+    with HTMLRenderer() as renderer:
+        cache.render("a", renderer)
+        for fingerprint in ("", "", "other"):
+            key = cache.make_key("a", Document, {}, (fingerprint,))
+            cache._store(key, b"x" * 10)
+            cache._store(key, b"x" * 20)
+    # overwritten entries are not counted twice
+    assert cache._nentries == len(cache) == 3
+    assert cache._nbytes == cache.nbytes
+    # stale temporary files (e.g. from an interrupted write) are removed
+    stale, recent = tmp_path / "stale.tmp", tmp_path / "recent.tmp"
+    stale.write_bytes(b"x")
+    recent.write_bytes(b"x")
+    os.utime(str(stale), (0, 0))
+    assert len(cache) == 3
+    assert not stale.exists() and recent.exists()
@@ -1,8 +1,12 @@
+import os
 import pathlib
 import tempfile
 from unittest import TestCase
 from unittest.mock import call, patch, sentinel, mock_open, Mock
 
+import pytest
+
+import mistletoe
 from mistletoe import cli
 from mistletoe.cli import benchmark
 
@@ -20,13 +24,21 @@ class TestCLI(TestCase):
     @patch(
         "mistletoe.cli.parse.parse_args",
         return_value=Mock(
-            filenames=["foo.md"], renderer=sentinel.Renderer, front_matter=False
+            filenames=["foo.md"],
+            renderer=sentinel.Renderer,
+            front_matter=False,
+            jobs=1,
+            output_dir=None,
+            output=None,
+            cache_dir=None,
         ),
     )
     @patch("mistletoe.cli.parse.convert")
     def test_main_to_convert(self, mock_convert, mock_parse):
         cli.parse.main(None)
-        mock_convert.assert_called_with(["foo.md"], sentinel.Renderer, False)
+        mock_convert.assert_called_with(
+            ["foo.md"], sentinel.Renderer, False, output=None, cache_dir=None
+        )
 
     @patch("importlib.import_module", return_value=Mock(Renderer=sentinel.RendererCls))
     def test_parse_renderer(self, mock_import_module):
@@ -43,17 +55,52 @@ class TestCLI(TestCase):
     def test_convert(self, mock_convert_file):
         filenames = ["foo", "bar"]
         cli.parse.convert(filenames, sentinel.RendererCls)
-        calls = [call(filename, sentinel.RendererCls, False) for filename in filenames]
+        calls = [
+            call(filename, sentinel.RendererCls, False, cache=None)
+            for filename in filenames
+        ]
         mock_convert_file.assert_has_calls(calls)
 
-    @patch("mistletoe.markdown", return_value="rendered text")
-    @patch("builtins.print")
+    @patch("mistletoe.markdown", return_value=None)
     @patch("builtins.open", new_callable=mock_open)
-    def test_convert_file_success(self, mock_open_, mock_print, mock_markdown):
+    def test_convert_file_success(self, mock_open_, mock_markdown):
         filename = "foo"
-        cli.parse.convert_file(filename, sentinel.RendererCls)
+        with patch("sys.stdout", sentinel.stdout):
+            cli.parse.convert_file(filename, sentinel.RendererCls)
         mock_open_.assert_called_with(filename, "r")
-        mock_print.assert_called_with("rendered text", end="")
+        mock_markdown.assert_called_with(
+            mock_open_.return_value,
+            sentinel.RendererCls,
+            read_kwargs={},
+            sink=sentinel.stdout,
+        )
+
+    def test_convert_output(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            path1 = pathlib.Path(tempdir) / "a.md"
+            path1.write_text("# a\n")
+            path2 = pathlib.Path(tempdir) / "b.md"
+            path2.write_text("*b*\n")
+            output = pathlib.Path(tempdir) / "out.html"
+            cli.parse.main([str(path1), str(path2), "--output", str(output)])
+            self.assertEqual(output.read_text(), "<h1>a</h1>\n<p><em>b</em></p>\n")
+
+    def test_convert_cache_dir(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = pathlib.Path(tempdir) / "a.md"
+            path.write_text("# a\n")
+            output = pathlib.Path(tempdir) / "out.html"
+            cache_dir = pathlib.Path(tempdir) / "cache"
+            args = [str(path), "--output", str(output), "--cache-dir", str(cache_dir)]
+            for _ in range(2):
+                cli.parse.main(args)
+                self.assertEqual(output.read_text(), "<h1>a</h1>\n")
+            self.assertEqual(len(list(cache_dir.glob("*.entry"))), 1)
+            output_dir = pathlib.Path(tempdir) / "out"
+            args = [str(path), "--output-dir", str(output_dir)]
+            cli.parse.main(args + ["--cache-dir", str(cache_dir)])
+            self.assertEqual((output_dir / "a.html").read_text(), "<h1>a</h1>\n")
+            self.assertEqual(len(list(cache_dir.glob("*.entry"))), 1)
 
     @patch("builtins.open", side_effect=OSError)
     @patch("sys.exit")
@@ -150,3 +197,59 @@ def test_benchmark():
         path = pathlib.Path(tempdir).joinpath("test.md")
         path.write_text("a b c")
         assert benchmark.main(["-n", "1", "-p", "mistletoe", str(path)])
+
+
+def test_convert_many():
+    with tempfile.TemporaryDirectory() as tempdir:
+        path = pathlib.Path(tempdir).joinpath("test.md")
+        path.write_text("# a b c")
+        outdir = pathlib.Path(tempdir).joinpath("out")
+        cli.parse.main(["-j", "2", "--output-dir", str(outdir), str(path)])
+        assert outdir.joinpath("test.html").read_text() == "<h1>a b c</h1>\n"
+
+
+def test_convert_many_output_paths():
+    with tempfile.TemporaryDirectory() as tempdir:
+        root = pathlib.Path(tempdir)
+        for name in ("a", "b"):
+            root.joinpath(name).mkdir()
+            root.joinpath(name, "x.md").write_text("# " + name)
+        outdir = root.joinpath("sub", "out")
+        sources = [str(root / "a" / "x.md"), str(root / "a" / ".." / "b" / "x.md")]
+        cli.parse.main(["--output-dir", str(outdir)] + sources)
+        assert sorted(
+            str(path.relative_to(root)) for path in root.glob("**/*.html")
+        ) == [os.path.join("sub", "out", name, "x.html") for name in ("a", "b")]
+        assert outdir.joinpath("b", "x.html").read_text(encoding="utf-8") == (
+            "<h1>b</h1>\n"
+        )
+        root.joinpath("a", "x.markdown").write_text("# c")
+        with pytest.raises(SystemExit, match="would both be written"):
+            cli.parse.main(
+                ["--output-dir", str(outdir), str(root / "a" / "x.markdown")]
+                + sources
+            )
+
+
+def test_convert_many_error():
+    with tempfile.TemporaryDirectory() as tempdir:
+        path = pathlib.Path(tempdir).joinpath("missing.md")
+        with patch("sys.exit") as mock_exit:
+            cli.parse.convert_many([str(path)], mistletoe.HTMLRenderer, jobs=1)
+        mock_exit.assert_called_with(1)
+
+
+def test_convert_many_output():
+    with tempfile.TemporaryDirectory() as tempdir:
+        root = pathlib.Path(tempdir)
+        sources = []
+        for name in ("a", "b", "é"):
+            root.joinpath(name + ".md").write_text("# " + name, encoding="utf-8")
+            sources.append(str(root / (name + ".md")))
+        output = root / "out.html"
+        cli.parse.main(["-j", "2", "-o", str(output)] + sources)
+        assert output.read_text(encoding="utf-8") == (
+            "<h1>a</h1>\n<h1>b</h1>\n<h1>é</h1>\n"
+        )
+        with pytest.raises(SystemExit):
+            cli.parse.main(["-o", str(output), "--output-dir", tempdir] + sources)
@@ -1,9 +1,9 @@
 import pytest
 
-from mistletoe import block_tokens, block_tokens_ext
+from mistletoe import block_tokens, block_tokens_ext, HTMLRenderer, token_sets
 from mistletoe.base_elements import serialize_tokens
 from mistletoe.block_tokenizer import tokenize_main
-from mistletoe.parse_context import get_parse_context
+from mistletoe.parse_context import get_parse_context, ParseContext
 from mistletoe.span_tokenizer import tokenize_span
 from mistletoe.span_tokens import CoreTokens
 from mistletoe.span_tokens_ext import FootReference
@@ -76,3 +76,53 @@ def test_resolution(name, source, data_regression):
         serialize_tokens(block_tokens.Document.read(source), as_dict=True),
         basename=f"test_resolution_{name}",
     )
+
+
+def test_reference_order():
+    get_parse_context().span_tokens.insert_after(FootReference, CoreTokens)
+    get_parse_context().block_tokens.insert_before(
+        block_tokens_ext.Footnote, block_tokens.LinkDefinition
+    )
+    source = ["- a [^b]\n", "  - c [^a]\n", "\n", "  d [^c]\n", "\n"]
+    source += ["[^a]: x\n", "[^b]: y\n", "[^c]: z\n"]
+    document = block_tokens.Document.read(source)
+    assert list(document.footref_order) == ["b", "a", "c"]
+
+
+def test_lazy_reference_order():
+    get_parse_context().span_tokens.insert_after(FootReference, CoreTokens)
+    get_parse_context().block_tokens.insert_before(
+        block_tokens_ext.Footnote, block_tokens.LinkDefinition
+    )
+    source = ["a [^b] [^a]\n", "\n", "[^a]: x\n", "[^b]: y\n"]
+    document = block_tokens.Document.read(source, lazy_spans=True)
+    assert not document.children[0].children.expanded
+    # the spans are expanded when the order is first used
+    assert document.footref_order == ["b", "a"]
+    assert document.children[0].children.expanded
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "text\n\n[^a]: see [^b]\n\n[^b]: x\n",
+        "[^c] [^a]\n\n[^c]: [^y]\n\n[^a]: [^x] [^c]\n\n[^x]: 1\n\n[^y]: 2\n",
+    ],
+)
+def test_lazy_reference_parity(source):
+    """Footnotes are referenced and rendered as for an eager read."""
+    context = ParseContext(
+        find_blocks=token_sets.get_extended_block_tokens(),
+        find_spans=token_sets.get_extended_span_tokens(),
+    )
+    with HTMLRenderer(parse_context=context) as renderer:
+        eager = block_tokens.Document.read(source)
+        lazy = block_tokens.Document.read(source, lazy_spans=True)
+        # expanded out of order, before the footnote order is used
+        lazy.footnotes["a"].children.expand()
+        assert list(lazy.footref_order) == eager.footref_order
+        output = renderer.render(eager)
+        assert renderer.render(block_tokens.Document.read(source, lazy_spans=True)) == (
+            output
+        )
+    assert serialize_tokens(lazy) == serialize_tokens(eager)
@@ -1,7 +1,10 @@
 from unittest import TestCase
 from mistletoe.nested_tokenizer import (
     MatchObj,
+    CodeSpans,
+    code_pattern,
     Delimiter,
+    DelimiterList,
     follows,
     shift_whitespace,
     is_control_char,
@@ -24,6 +27,14 @@ class TestNestedTokenizer(TestCase):
         self.assertEqual(match.group(1), "a")
         self.assertEqual(match.group(2), "b")
 
+    def test_match_obj_lazy(self):
+        match = MatchObj(1, 8, (2, 4), (-1, -1, "c"), string="a[bc](d)")
+        self.assertEqual(match.start(1), 2)
+        self.assertEqual(match.end(1), 4)
+        self.assertEqual(match.group(1), "bc")
+        self.assertEqual(match.group(2), "c")
+        self.assertEqual(match.group(), "bcc")
+
     def test_delimiter(self):
         delimiter = Delimiter(4, 6, "abcd**")
         self.assertEqual(delimiter.type, "**")
@@ -50,6 +61,49 @@ class TestNestedTokenizer(TestCase):
         delimiter = Delimiter(4, 6, "abcd**")
         self.assertFalse(delimiter.remove(2))
 
+    def test_delimiter_remove_right_type(self):
+        delimiter = Delimiter(3, 6, "abc***")
+        self.assertTrue(delimiter.remove(2, left=False))
+        self.assertEqual(delimiter.type, "*")
+        self.assertEqual(delimiter.length, 3)
+
+    def test_delimiter_list(self):
+        s = "abcd"
+        delimiters = DelimiterList()
+        items = [Delimiter(i, i + 1, s) for i in range(4)]
+        for delimiter in items:
+            delimiters.append(delimiter)
+        self.assertEqual([d.type for d in delimiters], ["a", "b", "c", "d"])
+        delimiters.remove(items[0])
+        delimiters.remove(items[2])
+        self.assertEqual([d.type for d in delimiters], ["b", "d"])
+        delimiters.remove(items[3])
+        self.assertIs(delimiters.tail, items[1])
+        delimiters.append(items[2])
+        delimiters.truncate(items[1])
+        self.assertEqual([d.type for d in delimiters], ["b"])
+        delimiters.truncate(None)
+        self.assertEqual(list(delimiters), [])
+
+    def test_code_spans(self):
+        for string in ["`a` ``b`` `c``", r"\\`a` \`b`", "``a`b``c```", r"x`\\`a`"]:
+            code_spans = CodeSpans(string)
+            for pos in range(len(string) + 1):
+                expected = code_pattern.search(string, pos)
+                match = code_spans.search(pos)
+                if expected is None:
+                    self.assertIsNone(match)
+                    continue
+                self.assertEqual(
+                    (match.start(), match.end(), match.group(1), match.group(2)),
+                    (
+                        expected.start(),
+                        expected.end(),
+                        expected.group(1),
+                        expected.group(2),
+                    ),
+                )
+
     def test_follows(self):
         string = "(foobar)"
         self.assertTrue(follows(string, 6, ")"))
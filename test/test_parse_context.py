@@ -0,0 +1,86 @@
+import pickle
+
+import attr
+import pytest
+
+from mistletoe import Document, HTMLRenderer, token_sets
+from mistletoe.block_tokenizer import StartDispatch
+from mistletoe.block_tokens import Heading
+from mistletoe.span_tokens_ext import Strikethrough
+from mistletoe.parse_context import ParseContext, TokenSetConfig
+from mistletoe.profiler import Profiler
+
+
+def test_token_config_shared():
+    config = token_sets.get_commonmark_config()
+    assert config is token_sets.get_commonmark_config()
+    assert config is TokenSetConfig.get(
+        list(token_sets.get_commonmark_block_tokens()),
+        token_sets.get_commonmark_span_tokens(),
+    )
+    assert config == TokenSetConfig(config.block_tokens, config.span_tokens)
+    assert hash(config) == hash(TokenSetConfig(config.block_tokens, config.span_tokens))
+    assert config != token_sets.get_extended_config()
+    assert pickle.loads(pickle.dumps(config)) is config
+    with pytest.raises(attr.exceptions.FrozenInstanceError):
+        config.block_tokens = ()
+    assert ParseContext().token_config is TokenSetConfig.get()
+
+
+def test_token_config_tables():
+    config = token_sets.get_extended_config()
+    context1 = ParseContext(token_config=config)
+    context2 = ParseContext(
+        find_blocks=token_sets.get_extended_block_tokens(),
+        find_spans=token_sets.get_extended_span_tokens(),
+    )
+    assert context2.token_config is config
+    dispatch = context1.block_tokens.cached("start_dispatch", StartDispatch)
+    assert context2.block_tokens.cached("start_dispatch", StartDispatch) is dispatch
+    assert context1.copy().block_tokens.cached("start_dispatch", StartDispatch) is (
+        dispatch
+    )
+    # mutating the token set of one context does not affect the others
+    context1.block_tokens.discard(Heading)
+    assert Heading not in context1.block_tokens.cached(
+        "start_dispatch", StartDispatch
+    ).candidates("# a\n")
+    assert Heading in context2.block_tokens.cached(
+        "start_dispatch", StartDispatch
+    ).candidates("# a\n")
+    assert Heading in config.block_tokens
+    assert Heading in ParseContext(token_config=config).block_tokens
+    with pytest.raises(ValueError):
+        ParseContext(find_blocks=[Heading], token_config=config)
+
+
+def test_copy():
+    context = ParseContext(token_config=token_sets.get_commonmark_config())
+    with HTMLRenderer(parse_context=context) as renderer:
+        renderer.render(Document.read("[a]\n\n[a]: b\n"))
+    copied = context.copy()
+    assert copied.token_config is context.token_config
+    assert copied.link_definitions == context.link_definitions == {"a": ("b", "")}
+    copied.link_definitions["c"] = ("d", "")
+    copied.block_tokens.discard(Heading)
+    assert "c" not in context.link_definitions
+    assert Heading in context.block_tokens
+
+
+def test_copy_parse_state():
+    """The copy has none of the state of a parse in progress."""
+    context = ParseContext(profiler=Profiler())
+    context.span_containers.append(object())
+    context.nesting_matches["a"] = object()
+    copied = context.copy()
+    assert copied.profiler is None
+    assert copied.span_containers == [] and copied.nesting_matches == {}
+    assert len(context.span_containers) == 1
+
+
+def test_renderer_token_config():
+    context = ParseContext(token_config=token_sets.get_extended_config())
+    with HTMLRenderer(parse_context=context) as renderer:
+        assert renderer.render(Document.read("~~b~~")) == "<p><del>b</del></p>\n"
+    names = context.token_config.cached((HTMLRenderer, "render_names"), None)
+    assert names[Strikethrough] == "render_strikethrough"
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from mistletoe import Document, ParseContext
+from mistletoe.cli import benchmark
+from mistletoe.profiler import Profiler
+from mistletoe.renderers.html import HTMLRenderer
+
+
+@pytest.mark.parametrize("span_engine", ["finditer", "scanner"])
+def test_profiler(span_engine):
+    context = ParseContext(profiler=Profiler(), span_engine=span_engine)
+    with HTMLRenderer(parse_context=context) as renderer:
+        output = renderer.render(Document.read("# *a*\n\n> b `c`\n"))
+    with HTMLRenderer() as renderer:
+        assert output == renderer.render(Document.read("# *a*\n\n> b `c`\n"))
+    data = context.profiler.to_dict()
+    assert set(data) == {
+        "block.start",
+        "block.read",
+        "span.find",
+        "span.make",
+        "render",
+    }
+    assert data["block.read"]["Quote"]["calls"] == 1
+    assert data["block.read"]["Paragraph"]["calls"] == 1
+    assert data["span.make"]["InlineCode"]["calls"] == 1
+    assert data["render"]["Document"]["calls"] == 1
+    if span_engine == "scanner":
+        assert "SpanScanner" in data["span.find"]
+    else:
+        assert data["span.find"]["CoreTokens"]["calls"] == 2
+    table = context.profiler.format_table(phase="render")
+    assert table.splitlines()[0].split() == [
+        "phase",
+        "name",
+        "calls",
+        "total",
+        "(s)",
+        "per",
+        "call",
+        "(us)",
+    ]
+    assert "block.read" not in table
+
+    context.profiler.reset()
+    assert context.profiler.rows() == []
+
+
+def test_profiler_rows():
+    profiler = Profiler()
+    profiler.add("render", "a", 1.0)
+    profiler.add("render", "b", 3.0, calls=2)
+    profiler.add("render", "a", 1.0)
+    assert profiler.rows() == [("render", "b", 2, 3.0), ("render", "a", 2, 2.0)]
+    assert profiler.wrap("render", "c", lambda x: x + 1)(1) == 2
+    assert profiler.to_dict()["render"]["c"]["calls"] == 1
+
+
+def test_benchmark_profile(tmp_path, capsys):
+    path = tmp_path.joinpath("test.md")
+    path.write_text("# a\n\n*b*\n")
+    json_path = tmp_path.joinpath("profile.json")
+    benchmark.main(
+        [str(path), "-n", "2", "--profile", "--profile-json", str(json_path)]
+    )
+    assert "Profile of mistletoe (2 parse(s))" in capsys.readouterr().out
+    data = json.loads(json_path.read_text())
+    assert data["block.read"]["Heading"]["calls"] == 2
@@ -1,3 +1,4 @@
+import sys
 from textwrap import dedent
 import pytest
 
@@ -186,3 +187,179 @@ def test_footer_ref_in_definition(html_renderer):
         </section>
         """
     )
+
+
+@pytest.mark.parametrize("expand_spans", ["barrier", "eager", "deferred"])
+def test_render_stream(html_renderer_standalone, expand_spans):
+    source = [
+        "# a [^1]\n",
+        "\n",
+        "[^1]: the footnote*text*\n",
+        "[b]: /url\n",
+        "\n",
+        "- [b] [^1]\n",
+        "```\n",
+        "code\n",
+        "```\n",
+    ]
+    chunks = list(
+        html_renderer_standalone.render_stream(iter(source), expand_spans=expand_spans)
+    )
+    assert len(chunks) == 5
+    output = html_renderer_standalone.render(Document.read(source))
+    if expand_spans != "eager":
+        assert "".join(chunks) == output
+    else:
+        # the footnote is referenced before it is defined
+        assert "".join(chunks) == output.replace(
+            '<sup class="footnote-ref"><a href="#fn1">[1]</a></sup>', "[^1]", 1
+        )
+
+
+@pytest.mark.parametrize(
+    "first", ["see [the docs](http://x.org) here", "![a](b.png) [c][]", "arr[0] = 1"]
+)
+def test_render_stream_first_chunk(html_renderer, first):
+    """The first chunk is yielded before the whole source is read."""
+    pulled = []
+
+    def lines():
+        for line in [first + "\n"] + ["\n", "para\n"] * 10000:
+            pulled.append(line)
+            yield line
+
+    chunks = html_renderer.render_stream(lines(), max_pending=8)
+    assert next(chunks) == html_renderer.render(Document.read(first))
+    assert len(pulled) < 30
+
+
+def test_render_map_by_class(html_renderer):
+    by_class = html_renderer.render_map.by_class
+    assert by_class[block_tokens.Paragraph] == html_renderer.render_paragraph
+    assert by_class[block_tokens.Document] == html_renderer.render_document
+    html_renderer.render_map["Emphasis"] = lambda token: "EM"
+    assert span_tokens.Emphasis not in by_class
+    assert html_renderer.render(Document.read("*a* b")) == "<p>EM b</p>\n"
+    assert by_class[span_tokens.Emphasis]
+
+
+def test_emit(html_renderer):
+    doc = Document.read("# a *b*\n\n- c\n  - d [e](f)\n\n> g\n")
+    out = []
+    html_renderer.emit(doc, out)
+    assert len(out) > 10
+    assert "".join(out) == html_renderer.render(doc)
+    assert html_renderer.render(doc) == dedent(
+        """\
+        <h1>a <em>b</em></h1>
+        <ul>
+        <li>c
+        <ul>
+        <li>d <a href="f">e</a></li>
+        </ul>
+        </li>
+        </ul>
+        <blockquote>
+        <p>g</p>
+        </blockquote>
+        """
+    )
+
+
+def test_emit_overridden():
+    """Render methods overridden by a subclass are emitted via their strings."""
+
+    class Renderer(HTMLRenderer):
+        def render_emphasis(self, token):
+            return "<i>{}</i>".format(self.render_inner(token))
+
+    with Renderer() as renderer:
+        doc = Document.read("- *a* **b**\n")
+        assert renderer.render(doc) == (
+            "<ul>\n<li><i>a</i> <strong>b</strong></li>\n</ul>\n"
+        )
+        by_class = renderer.render_map.emit_by_class
+        assert by_class[span_tokens.Strong] == renderer.emit_strong
+        assert by_class[span_tokens.Emphasis] != renderer.emit_emphasis
+        renderer.render_map["Strong"] = lambda token: "S"
+        assert renderer.render(doc) == "<ul>\n<li><i>a</i> S</li>\n</ul>\n"
+
+
+def test_emit_overridden_emit():
+    """``emit_`` methods overridden by a subclass are also used by ``render_``."""
+
+    class Renderer(HTMLRenderer):
+        def emit_strong(self, token, out):
+            out.append("<b>")
+            self.emit_inner(token, out)
+            out.append("</b>")
+
+    with Renderer() as renderer:
+        doc = Document.read("**a**\n")
+        assert renderer.render(doc) == "<p><b>a</b></p>\n"
+        assert renderer.render_strong(doc.children[0].children[0]) == "<b>a</b>"
+
+
+def test_render_to(html_renderer):
+    doc = Document.read("# a\n\n- b\n\n> c\n\nd *e*\n")
+
+    class Sink:
+        def __init__(self):
+            self.writes = []
+
+        def write(self, text):
+            self.writes.append(text)
+
+    sink = Sink()
+    assert html_renderer.render_to(doc, sink) is None
+    assert sink.writes == [html_renderer.render(doc)]
+    sink = Sink()
+    html_renderer.render_to(doc, sink, buffer_size=0)
+    assert sink.writes[:2] == ["<h1>a</h1>\n", "<ul>\n<li>b</li>\n</ul>\n"]
+    assert "".join(sink.writes) == html_renderer.render(doc)
+
+
+@pytest.mark.parametrize(
+    "raw,expected",
+    [
+        ("text 'quoted'", "text 'quoted'"),
+        ('a < b > c "d"', "a &lt; b &gt; c &quot;d&quot;"),
+        ("&amp; &lt;b&gt; &#34; &copy;", "&amp; &lt;b&gt; &quot; \u00a9"),
+        ("&nbsp &unknown; & x", "&amp;nbsp &amp;unknown; &amp; x"),
+    ],
+)
+def test_escape_html(html_renderer, raw, expected):
+    assert html_renderer.escape_html(raw) == expected
+    token = span_tokens.RawText(raw)
+    assert html_renderer.render(token) == expected
+    html_renderer.render_raw_text = lambda token: "RAW"
+    html_renderer.render_map["RawText"] = html_renderer.render_raw_text
+    assert html_renderer.render(token) == "RAW"
+
+
+@pytest.mark.parametrize(
+    "text",
+    (
+        "> " * 300 + "a\n",
+        "".join("  " * i + "- a\n" for i in range(300)),
+        "".join("  " * i + "- a [^1]\n\n" for i in range(300)) + "[^1]: b\n",
+    ),
+    ids=["quotes", "tight_lists", "loose_lists"],
+)
+def test_render_iterative(html_renderer, text):
+    document = Document.read(text)
+    output = html_renderer.render_iterative(document)
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(10000)
+    try:
+        assert output == html_renderer.render(document)
+    finally:
+        sys.setrecursionlimit(limit)
+    assert html_renderer.render_iterative(document, interval=3) == output
+
+
+def test_render_iterative_recursion_error(html_renderer):
+    document = Document.read("".join("  " * i + "- a\n" for i in range(300)))
+    with pytest.raises(RecursionError):
+        html_renderer.render(document)
+    assert html_renderer.render_iterative(document).count("<li>") == 300
@@ -144,3 +144,21 @@ class TestLaTeXlink_definitions(TestCase):
             "\\end{document}\n"
         )
         self.assertEqual(self.renderer.render(Document.read(raw)), target)
+
+    def test_emit(self):
+        from mistletoe import Document
+
+        doc = Document.read(
+            "- a ~~b~~\n  - c\n\n| x | z |\n| --- | ---: |\n| y | w |\n"
+        )
+        out = []
+        self.renderer.emit(doc, out)
+        self.assertEqual("".join(out), self.renderer.render(doc))
+        self.assertIn(
+            "\\begin{itemize}\n"
+            "\\item \na \\sout{b}\n"
+            "\\begin{itemize}\n\\item \nc\n\n\\end{itemize}\n\n"
+            "\\end{itemize}\n"
+            "\\begin{tabular}{l r}\nx & z \\\\\n\\hline\ny & w \\\\\n\\end{tabular}\n",
+            "".join(out),
+        )
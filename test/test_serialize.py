@@ -0,0 +1,126 @@
+from collections import OrderedDict
+
+import pytest
+
+from mistletoe import Document, HTMLRenderer, ParseContext, serialize, token_sets
+from mistletoe.base_elements import CompactPosition, Position, serialize_tokens
+from mistletoe.block_tokenizer import ParseBuffer
+from mistletoe.span_tokens import Emphasis, RawText
+
+
+class DictToken(RawText):
+    """A token with an instance ``__dict__``."""
+
+
+def test_round_trip():
+    text = (
+        "---\na: 1\n---\n# a *b*\n\n- [c][d] ~~e~~\n\n  f[^1]\n"
+        "\n| x | y |\n| - | -: |\n| 1 | 2 |\n\n[d]: /url 'title'\n[^1]: foot\n"
+    )
+    context = ParseContext(
+        find_blocks=token_sets.get_extended_block_tokens(),
+        find_spans=token_sets.get_extended_span_tokens(),
+    )
+    with HTMLRenderer(parse_context=context) as renderer:
+        doc = Document.read(text, front_matter=True)
+        data = serialize.dumps(doc)
+        loaded = serialize.loads(data)
+        assert renderer.render(loaded) == renderer.render(doc)
+    assert serialize_tokens(loaded) == serialize_tokens(doc)
+    assert type(loaded.children) is ParseBuffer
+    assert type(loaded.children[1].children[0]).__name__ == "ListItem"
+    assert loaded._block_lines == doc._block_lines
+    assert loaded.children[0].position.line_start == 4
+    assert len(data) < len(serialize_tokens(doc))
+
+
+def test_unset_slots():
+    token = Emphasis(children=[RawText("a")])
+    loaded = serialize.loads(serialize.dumps(token))
+    assert "content" not in loaded.__getstate__()[1]
+    assert loaded.children[0].content == "a"
+
+
+def test_positions():
+    tokens = [
+        RawText("a", position=Position(line_start=0, line_end=0)),
+        RawText("b", position=Position(line_start=300)),
+        RawText("c", position=Position(line_start=1, uri="doc.md", data={"x": 1})),
+        RawText("d", position=CompactPosition((2, None))),
+        RawText("e", position=CompactPosition((2, 5))),
+    ]
+    loaded = serialize.loads(serialize.dumps(tokens))
+    for token, loaded_token in zip(tokens, loaded):
+        assert type(loaded_token.position) is type(token.position)
+        assert loaded_token.position.to_dict() == token.position.to_dict()
+
+
+def test_values():
+    value = {
+        "ints": [0, 127, 128, -1, -(2 ** 70), 2 ** 70],
+        "float": 1.5,
+        "bools": (True, False, None),
+        "nested": OrderedDict([("a", ["é\U0001f600", "", "a"])]),
+    }
+    loaded = serialize.loads(serialize.dumps(value))
+    assert loaded == value
+    assert type(loaded["nested"]) is OrderedDict
+
+
+def test_dict_token():
+    token = DictToken("a")
+    token.extra = ["b"]
+    loaded = serialize.loads(serialize.dumps(token))
+    assert type(loaded) is DictToken
+    assert loaded.extra == ["b"] and loaded.content == "a"
+
+
+def test_many_types():
+    """More than 96 token types are indexed with a varint."""
+    classes = [type("Token{}".format(i), (RawText,), {}) for i in range(100)]
+    # the classes must be importable
+    globals().update((cls.__name__, cls) for cls in classes)
+    try:
+        tokens = [cls(str(i)) for i, cls in enumerate(classes)]
+        loaded = serialize.loads(serialize.dumps(tokens))
+        assert [type(t) for t in loaded] == classes
+        assert [t.content for t in loaded] == [str(i) for i in range(100)]
+    finally:
+        for cls in classes:
+            del globals()[cls.__name__]
+
+
+def test_errors():
+    data = serialize.dumps(Document.read("*a*"))
+    with pytest.raises(ValueError, match="not a serialized"):
+        serialize.loads(b"{}")
+    with pytest.raises(ValueError, match="version"):
+        serialize.loads(serialize.MAGIC + b"\x7f" + data[5:])
+    with pytest.raises(ValueError, match="truncated"):
+        serialize.loads(data[:-1])
+    with pytest.raises(ValueError, match="unexpected data"):
+        serialize.loads(data + b"\x00")
+    with pytest.raises(TypeError, match="set"):
+        serialize.dumps(RawText({"a"}))
+    with pytest.raises(ValueError, match="not a token class"):
+        serialize.loads(data.replace(b"tokens:Document", b"tokens:Optional"))
+    with pytest.raises(ValueError, match="not loaded"):
+        serialize.loads(data.replace(b"tokens:Document", b"tokenz:Document"))
+    with pytest.raises(ValueError, match="not a slot"):
+        serialize.loads(data.replace(b"children", b"__init__"))
+
+
+def test_corrupted():
+    """Any corruption of the data raises ValueError (or loads another value)."""
+    data = serialize.dumps(
+        Document.read("# a\n\n- *b* `c`\n\n> d [e]\n\n1. ~~f~~\n\n[e]: g 'h'\n")
+    )
+    for index in range(len(data)):
+        for byte in (0x00, 0x05, 0x0A, 0x0E, 0x7F, 0xFF, data[index] ^ 0x01):
+            try:
+                serialize.loads(data[:index] + bytes([byte]) + data[index + 1 :])
+            except ValueError:
+                pass
+    for length in range(len(data)):
+        with pytest.raises(ValueError):
+            serialize.loads(data[:length])
@@ -1,5 +1,6 @@
 import pytest
 
+from mistletoe import markdown
 from mistletoe.span_tokenizer import tokenize_span
 from mistletoe.span_tokens import CoreTokens, HTMLSpan
 from mistletoe.span_tokens_ext import Math
@@ -181,3 +182,37 @@ def test_nested(name, source, data_regression):
         serialize_tokens(tokenize_span(source), as_dict=True),
         basename=f"test_nested_{name}",
     )
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "a \\*b\\* <a href='x'>c</a>",
+        "\\<http://a.b> <http://a.b> \\\\<http://a.b>",
+        "line  \nbreak\\\nsoft\nbreak",
+        "`<a>` <!-- comment --> **<b>**",
+    ],
+)
+def test_span_scanner(source):
+    expected = serialize_tokens(tokenize_span(source))
+    get_parse_context().span_engine = "scanner"
+    assert serialize_tokens(tokenize_span(source)) == expected
+
+
+def test_span_engine_unknown():
+    with pytest.raises(ValueError):
+        get_parse_context().span_engine = "other"
+
+
+@pytest.mark.parametrize(
+    "source,expected",
+    [
+        # openers are only skipped for the same kind of closer
+        ("__bb***a***", "<p>__bb<em><strong>a</strong></em></p>\n"),
+        # link destinations / titles at the end of the string
+        ("[a](", "<p>[a](</p>\n"),
+        ("[a](b (", "<p>[a](b (</p>\n"),
+    ],
+)
+def test_emphasis_and_links_html(source, expected):
+    assert markdown(source) == expected